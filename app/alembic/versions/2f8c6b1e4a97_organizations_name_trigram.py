@@ -0,0 +1,34 @@
+"""Trigram GIN index for organization name search
+
+Revision ID: 2f8c6b1e4a97
+Revises: e7a3d95b2c18
+Create Date: 2026-10-16 19:48:11.530672
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2f8c6b1e4a97'
+down_revision = 'e7a3d95b2c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ILIKE '%...%' не использует btree-индекс; GIN по триграммам — использует.
+    # Без pg_trgm на сервере миграция ничего не делает, поиск остаётся на ILIKE.
+    conn = op.get_bind()
+    available = conn.execute(
+        sa.text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if available:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_organizations_name_trgm "
+            "ON organizations USING gin (name gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_organizations_name_trgm")
@@ -0,0 +1,136 @@
+"""Commit-safe row versions: row_version from the writing transaction id, version horizon functions
+
+Revision ID: 3b7e5a9c1d64
+Revises: 8a4f2c6d9e13
+Create Date: 2026-10-17 09:41:27.530816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3b7e5a9c1d64'
+down_revision = '8a4f2c6d9e13'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ('organizations', 'buildings', 'organization_phones', 'activities')
+# Строки-сигналы без триггеров: их увеличивает приложение (imports — завершённый массовый импорт)
+SIGNALS = ('imports',)
+
+
+def upgrade():
+    # row_version из nextval выдаётся при записи, а видна строка с коммита: транзакция,
+    # взявшая версию раньше, может зафиксироваться позже — и «максимальная версия» не растёт.
+    # Теперь версия строки — id пишущей транзакции (xid8) со сдвигом на последнее значение
+    # data_change_seq, чтобы новые версии были больше старых. Для id транзакций снимок
+    # знает точную границу: всё, что меньше pg_snapshot_xmin, уже завершено.
+    offset = op.get_bind().execute(sa.text("SELECT last_value FROM data_change_seq")).scalar()
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION row_version_offset() RETURNS bigint
+        IMMUTABLE LANGUAGE sql AS 'SELECT {int(offset)}::bigint'
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION current_row_version() RETURNS bigint
+        VOLATILE LANGUAGE sql AS $$
+            SELECT pg_current_xact_id()::text::bigint + row_version_offset()
+        $$
+    """)
+    # Все версии не больше этой принадлежат завершённым транзакциям: строк с такими версиями
+    # больше не появится — граница для инкрементальной выгрузки и сверки кэшей
+    op.execute("""
+        CREATE OR REPLACE FUNCTION committed_row_version() RETURNS bigint
+        STABLE LANGUAGE sql AS $$
+            SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint + row_version_offset() - 1
+        $$
+    """)
+    # Версии транзакций, ещё не видимых в снимке: их коммит меняет данные без роста max(row_version)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION pending_row_versions() RETURNS bigint[]
+        STABLE LANGUAGE sql AS $$
+            SELECT coalesce(array_agg(xid::text::bigint + row_version_offset() ORDER BY xid), '{}')
+            FROM pg_snapshot_xip(pg_current_snapshot()) AS xid
+        $$
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+        BEGIN
+            NEW.row_version := current_row_version();
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # Одна транзакция удаляет много строк с одной версией — первичный ключ надгробий отдельный
+    op.execute("ALTER TABLE deleted_rows DROP CONSTRAINT IF EXISTS deleted_rows_pkey")
+    op.execute(
+        "ALTER TABLE deleted_rows ADD COLUMN IF NOT EXISTS id bigint NOT NULL DEFAULT nextval('data_change_seq')"
+    )
+    op.create_primary_key('deleted_rows_pkey', 'deleted_rows', ['id'])
+    op.create_index('ix_deleted_rows_row_version', 'deleted_rows', ['row_version'], if_not_exists=True)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION track_row_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO deleted_rows (table_name, row_id, row_version)
+            SELECT TG_TABLE_NAME, id, current_row_version() FROM deleted;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # Версию вставки тоже выставляет триггер: DEFAULT nextval остаётся для create_all без миграций
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_change ON {table}")
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_row_change BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION track_row_change()"
+        )
+
+    op.create_table(
+        'data_versions',
+        sa.Column('table_name', sa.Text(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+        if_not_exists=True,
+    )
+    op.execute(
+        "INSERT INTO data_versions (table_name) VALUES "
+        + ", ".join(f"('{name}')" for name in SIGNALS)
+        + " ON CONFLICT DO NOTHING"
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions', if_exists=True)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+        BEGIN
+            NEW.row_version := nextval('data_change_seq');
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_change ON {table}")
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_row_change BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION track_row_change()"
+        )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION track_row_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO deleted_rows (table_name, row_id) SELECT TG_TABLE_NAME, id FROM deleted;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_index('ix_deleted_rows_row_version', table_name='deleted_rows', if_exists=True)
+    op.execute("ALTER TABLE deleted_rows DROP CONSTRAINT IF EXISTS deleted_rows_pkey")
+    # Версии надгробий одной транзакции совпадают — первичным ключом снова становится id
+    op.execute("UPDATE deleted_rows SET row_version = id")
+    op.execute("ALTER TABLE deleted_rows DROP COLUMN id")
+    op.create_primary_key('deleted_rows_pkey', 'deleted_rows', ['row_version'])
+    for name in ('pending_row_versions', 'committed_row_version', 'current_row_version', 'row_version_offset'):
+        op.execute(f"DROP FUNCTION IF EXISTS {name}()")
@@ -0,0 +1,107 @@
+"""Change tracking for incremental export: row_version/updated_at and deleted_rows tombstones
+
+Revision ID: 5d1e9a3c7b20
+Revises: 2f8c6b1e4a97
+Create Date: 2026-10-16 23:12:40.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5d1e9a3c7b20'
+down_revision = '2f8c6b1e4a97'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ('organizations', 'buildings', 'organization_phones', 'activities')
+
+
+def upgrade():
+    # Одна последовательность на все таблицы: версия экспорта — её текущее значение
+    op.execute("CREATE SEQUENCE IF NOT EXISTS data_change_seq")
+
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"ADD COLUMN IF NOT EXISTS row_version bigint NOT NULL DEFAULT nextval('data_change_seq'), "
+            f"ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now()"
+        )
+        op.create_index(f'ix_{table}_row_version', table, ['row_version'], if_not_exists=True)
+
+    op.create_table(
+        'deleted_rows',
+        sa.Column('row_version', sa.BigInteger(), server_default=sa.text("nextval('data_change_seq')"), nullable=False),
+        sa.Column('table_name', sa.Text(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('row_version'),
+        if_not_exists=True,
+    )
+
+    # UPDATE любой колонки (в том числе ON CONFLICT DO UPDATE импорта) получает новую версию
+    op.execute("""
+        CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+        BEGIN
+            NEW.row_version := nextval('data_change_seq');
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # Удаления пишутся надгробиями одной вставкой на оператор
+    op.execute("""
+        CREATE OR REPLACE FUNCTION track_row_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO deleted_rows (table_name, row_id) SELECT TG_TABLE_NAME, id FROM deleted;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # activity_ids входят в выгрузку организаций: изменение связей меняет версию организации
+    op.execute("""
+        CREATE OR REPLACE FUNCTION touch_organization_activity() RETURNS trigger AS $$
+        BEGIN
+            UPDATE organizations SET updated_at = now()
+            WHERE id IN (SELECT DISTINCT organization_id FROM changed);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_change ON {table}")
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_row_change BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION track_row_change()"
+        )
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_delete ON {table}")
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_row_delete AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION track_row_delete()"
+        )
+
+    # Триггер с таблицей переходов допускает только одно событие — отдельно на вставку и удаление
+    for event, transition in (('insert', 'NEW'), ('delete', 'OLD')):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_organization_activity_{event} ON organization_activity")
+        op.execute(
+            f"CREATE TRIGGER trg_organization_activity_{event} AFTER {event.upper()} ON organization_activity "
+            f"REFERENCING {transition} TABLE AS changed FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION touch_organization_activity()"
+        )
+
+
+def downgrade():
+    for event in ('insert', 'delete'):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_organization_activity_{event} ON organization_activity")
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_delete ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS touch_organization_activity()")
+    op.execute("DROP FUNCTION IF EXISTS track_row_delete()")
+    op.execute("DROP FUNCTION IF EXISTS track_row_change()")
+    op.drop_table('deleted_rows', if_exists=True)
+    for table in TRACKED_TABLES:
+        op.drop_index(f'ix_{table}_row_version', table_name=table, if_exists=True)
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS row_version, DROP COLUMN IF EXISTS updated_at")
+    op.execute("DROP SEQUENCE IF EXISTS data_change_seq")
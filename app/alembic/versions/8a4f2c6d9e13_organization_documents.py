@@ -0,0 +1,133 @@
+"""Denormalized organization documents (JSONB read model) maintained by triggers
+
+Revision ID: 8a4f2c6d9e13
+Revises: 5d1e9a3c7b20
+Create Date: 2026-10-17 00:05:52.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '8a4f2c6d9e13'
+down_revision = '5d1e9a3c7b20'
+branch_labels = None
+depends_on = None
+
+# (таблица, событие) -> триггер обновления документов.
+# organization_activity отдельного триггера не требует: её изменения уже обновляют
+# organizations (touch_organization_activity из 5d1e9a3c7b20), а это — UPDATE-триггер ниже.
+DOCUMENT_TRIGGERS = (
+    ('organizations', 'insert'),
+    ('organizations', 'update'),
+    ('organization_phones', 'insert'),
+    ('organization_phones', 'update'),
+    ('organization_phones', 'delete'),
+    ('buildings', 'update'),
+    ('activities', 'update'),
+)
+
+
+def upgrade():
+    op.create_table(
+        'organization_documents',
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('document', postgresql.JSONB(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('organization_id'),
+        if_not_exists=True,
+    )
+
+    # Документ в форме OrganizationSchema; порядок телефонов и видов деятельности — как в API
+    op.execute("""
+        CREATE OR REPLACE FUNCTION organization_document(org_id integer) RETURNS jsonb AS $$
+            SELECT jsonb_build_object(
+                'id', o.id,
+                'name', o.name,
+                'building', jsonb_build_object(
+                    'id', b.id, 'address', b.address, 'latitude', b.latitude, 'longitude', b.longitude
+                ),
+                'phones', COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object(
+                        'id', p.id, 'phone', p.phone, 'position', p.position, 'is_primary', p.is_primary
+                    ) ORDER BY p.position, p.id)
+                    FROM organization_phones p WHERE p.organization_id = o.id
+                ), '[]'::jsonb),
+                'activities', COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object(
+                        'id', a.id, 'name', a.name, 'parent_id', a.parent_id
+                    ) ORDER BY a.id)
+                    FROM organization_activity oa JOIN activities a ON a.id = oa.activity_id
+                    WHERE oa.organization_id = o.id
+                ), '[]'::jsonb)
+            )
+            FROM organizations o JOIN buildings b ON b.id = o.building_id
+            WHERE o.id = org_id
+        $$ LANGUAGE sql STABLE
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_organization_documents(ids integer[]) RETURNS void AS $$
+            INSERT INTO organization_documents (organization_id, document, refreshed_at)
+            SELECT o.id, organization_document(o.id), now() FROM organizations o WHERE o.id = ANY(ids)
+            ON CONFLICT (organization_id) DO UPDATE
+            SET document = EXCLUDED.document, refreshed_at = EXCLUDED.refreshed_at
+        $$ LANGUAGE sql
+    """)
+    # Один пересчёт на оператор: затронутые организации берутся из таблицы переходов.
+    # UPDATE телефона может перенести его в другую организацию — пересчитываются обе:
+    # прежняя из old_changed, новая из changed
+    op.execute("""
+        CREATE OR REPLACE FUNCTION organization_documents_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'organizations' THEN
+                PERFORM refresh_organization_documents(ARRAY(SELECT id FROM changed));
+            ELSIF TG_TABLE_NAME = 'organization_phones' AND TG_OP = 'UPDATE' THEN
+                PERFORM refresh_organization_documents(ARRAY(
+                    SELECT organization_id FROM changed UNION SELECT organization_id FROM old_changed
+                ));
+            ELSIF TG_TABLE_NAME = 'organization_phones' THEN
+                PERFORM refresh_organization_documents(ARRAY(SELECT DISTINCT organization_id FROM changed));
+            ELSIF TG_TABLE_NAME = 'buildings' THEN
+                PERFORM refresh_organization_documents(ARRAY(
+                    SELECT o.id FROM organizations o JOIN changed c ON c.id = o.building_id
+                ));
+            ELSIF TG_TABLE_NAME = 'activities' THEN
+                PERFORM refresh_organization_documents(ARRAY(
+                    SELECT DISTINCT oa.organization_id
+                    FROM organization_activity oa JOIN changed c ON c.id = oa.activity_id
+                ));
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    transitions = {
+        'insert': 'NEW TABLE AS changed',
+        'update': 'OLD TABLE AS old_changed NEW TABLE AS changed',
+        'delete': 'OLD TABLE AS changed',
+    }
+    for table, event in DOCUMENT_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_document_{event} ON {table}")
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_document_{event} AFTER {event.upper()} ON {table} "
+            f"REFERENCING {transitions[event]} FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION organization_documents_trigger()"
+        )
+
+    op.execute(
+        "INSERT INTO organization_documents (organization_id, document) "
+        "SELECT id, organization_document(id) FROM organizations "
+        "ON CONFLICT (organization_id) DO NOTHING"
+    )
+
+
+def downgrade():
+    for table, event in DOCUMENT_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_document_{event} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS organization_documents_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS refresh_organization_documents(integer[])")
+    op.execute("DROP FUNCTION IF EXISTS organization_document(integer)")
+    op.drop_table('organization_documents', if_exists=True)
@@ -0,0 +1,23 @@
+"""Index on activities.parent_id for recursive tree queries
+
+Revision ID: 9b2e4c7d1a05
+Revises: 4321aff51f61
+Create Date: 2026-10-16 10:12:03.418210
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9b2e4c7d1a05'
+down_revision = '4321aff51f61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Рекурсивный CTE по дереву деятельности идёт по parent_id на каждом шаге
+    op.create_index('ix_activities_parent', 'activities', ['parent_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_activities_parent', table_name='activities', if_exists=True)
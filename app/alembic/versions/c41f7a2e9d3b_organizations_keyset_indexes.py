@@ -0,0 +1,27 @@
+"""Indexes for keyset pagination of organizations
+
+Revision ID: c41f7a2e9d3b
+Revises: 9b2e4c7d1a05
+Create Date: 2026-10-16 14:37:52.106344
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a2e9d3b'
+down_revision = '9b2e4c7d1a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Списки организаций сортируются по (name, id): страница читается прямо из индекса
+    op.create_index('ix_organizations_name_id', 'organizations', ['name', 'id'], if_not_exists=True)
+    op.create_index(
+        'ix_organizations_building_name_id', 'organizations', ['building_id', 'name', 'id'], if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_organizations_building_name_id', table_name='organizations', if_exists=True)
+    op.drop_index('ix_organizations_name_id', table_name='organizations', if_exists=True)
@@ -0,0 +1,38 @@
+"""Geo indexes for buildings: (latitude, longitude) btree and optional earthdistance GiST
+
+Revision ID: e7a3d95b2c18
+Revises: c41f7a2e9d3b
+Create Date: 2026-10-16 17:05:29.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3d95b2c18'
+down_revision = 'c41f7a2e9d3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Префильтр радиус-поиска по прямоугольнику (GEO_SEARCH_MODE=bbox)
+    op.create_index('ix_buildings_lat_lon', 'buildings', ['latitude', 'longitude'], if_not_exists=True)
+
+    # GiST-индекс для GEO_SEARCH_MODE=earthdistance — только если расширения доступны на сервере
+    conn = op.get_bind()
+    available = conn.execute(
+        sa.text("SELECT count(*) FROM pg_available_extensions WHERE name IN ('cube', 'earthdistance')")
+    ).scalar()
+    if available == 2:
+        op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+        op.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_buildings_earth "
+            "ON buildings USING gist (ll_to_earth(latitude, longitude))"
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_buildings_earth")
+    op.drop_index('ix_buildings_lat_lon', table_name='buildings', if_exists=True)
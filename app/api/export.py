@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from api.organization import organization_filters
+from core.auth import api_key_auth
+from db.database import ReadSessionLocal
+from exceptions.exceptions import AppException
+from repositories.export import EXPORT_BATCH_SIZE
+from schemas.organization import OrganizationFilters
+from services.export import EXPORT_FORMATS, ExportService
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/export")
+export_service = ExportService()
+
+
+@router.get("/{dataset}", response_class=StreamingResponse)
+async def export_dataset(
+    dataset: Literal["organizations", "buildings", "phones", "activities", "deletions"],
+    format: Literal["csv", "parquet", "arrow"] = Query("parquet", description="Формат выгрузки"),
+    since_version: Optional[int] = Query(None, ge=0, description="Только строки с версией больше заданной (X-Export-Version прошлой выгрузки)"),
+    since: Optional[datetime] = Query(None, description="Только строки, изменённые после момента (ISO 8601)"),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=100_000, description="Строк в одной порции (record batch / row group)"),
+    filters: OrganizationFilters = Depends(organization_filters),
+    _: None = Depends(api_key_auth),
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка набора данных для аналитики: Parquet, Arrow IPC (stream) или CSV.
+
+    - organizations: id, name, building_id, activity_ids
+    - buildings: id, address, latitude, longitude
+    - phones: id, organization_id, phone, position, is_primary
+    - activities: id, name, parent_id (дерево целиком)
+    - deletions: table_name, row_id — удалённые строки (для инкрементальной выгрузки)
+
+    У каждой строки есть row_version и updated_at. Фильтры списка организаций сужают
+    organizations, phones и buildings.
+
+    Заголовок X-Export-Version — значение since_version для следующей инкрементальной
+    выгрузки. Это граница зафиксированных транзакций: в выгрузку входят строки с версией
+    не больше неё, а строки с большей версией (в том числе незавершённых сейчас транзакций)
+    придут в следующую — ни одна строка не теряется и не выгружается дважды.
+    Версии не монотонны во времени коммита, поэтому сравнивать их можно только с границей
+    из X-Export-Version, а не с max(row_version) полученных строк.
+    """
+    try:
+        export_service.check_format(format)
+        # Сессия живёт столько же, сколько поток: версия и строки читаются с одного сервера
+        db = ReadSessionLocal()
+        try:
+            version = await export_service.current_version(db)
+        except Exception:
+            await db.close()
+            raise
+    except (HTTPException, AppException):
+        raise
+    except Exception as e:
+        logger.error("Ошибка при подготовке выгрузки %s: %s", dataset, e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    async def chunks():
+        try:
+            async for chunk in export_service.export(db, dataset, format, filters, since_version, version, since, batch_size):
+                yield chunk
+        except Exception as e:
+            logger.error("Ошибка при выгрузке %s в %s: %s", dataset, format, e)
+            raise
+        finally:
+            await db.close()
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{dataset}.{extension}"',
+            "X-Export-Version": str(version),
+        },
+    )
@@ -0,0 +1,36 @@
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from core.auth import api_key_auth
+from schemas.imports import ImportReportSchema
+from services.importer import ImportService, DEFAULT_BATCH_SIZE, iter_lines
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/import")
+import_service = ImportService()
+
+
+@router.post("/{kind}", response_model=ImportReportSchema)
+async def import_data(
+    kind: Literal["buildings", "activities", "organizations"],
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query("ndjson", description="Формат тела запроса"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100_000, description="Строк в одной транзакции"),
+    _: None = Depends(api_key_auth),
+) -> ImportReportSchema:
+    """
+    Массовый импорт из тела запроса (CSV с заголовком или NDJSON), читается потоком.
+
+    - buildings: id, address, latitude, longitude
+    - activities: id, name, parent_id — родитель раньше потомка, не глубже 3 уровней
+    - organizations: id, name, building_id, phones, activity_ids (в CSV списки через ';')
+
+    Существующие записи с тем же id обновляются. Ответ — отчёт с ошибками по строкам.
+    """
+    try:
+        return await import_service.run(kind, iter_lines(request.stream()), format, batch_size)
+    except Exception as e:
+        logger.error("Ошибка при импорте %s: %s", kind, e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
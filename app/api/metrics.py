@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from api.stats import cache_snapshot, db_snapshot
+from core.auth import api_key_auth
+from core.metrics import format_labels, gauge_lines, metrics_registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(_: None = Depends(api_key_auth)) -> PlainTextResponse:
+    """
+    Метрики в формате Prometheus: запросы и их задержки по маршрутам, SQL-запросы,
+    сериализация, медленные запросы, а также счётчики кэшей, батч-загрузчика и пула (/stats/*)
+    """
+    lines = metrics_registry.render()
+    for name, stats in cache_snapshot().items():
+        lines += gauge_lines(f"app_{name}", stats)
+    db = db_snapshot()
+    replicas = db.pop("replicas")
+    lines += gauge_lines("db_pool", db)
+    if replicas:
+        lines.append("# TYPE db_replica_healthy gauge")
+        lines += [
+            f"db_replica_healthy{format_labels({'host': replica['host']})} {int(replica['healthy'])}"
+            for replica in replicas
+        ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,23 +1,39 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.organization import OrganizationService
-from db.database import get_db
-from schemas.organization import OrganizationSchema
+from db.database import get_db, get_read_db, ReadSessionLocal
+from schemas.organization import (
+    OrganizationSchema, OrganizationPageSchema, NearestOrganizationSchema, OrganizationSuggestionSchema,
+    OrganizationFilters, TileSchema, nearest_list_adapter, organization_list_adapter,
+    BatchRequestSchema, BatchIdsSchema, BatchResultSchema, OrganizationBatchGetSchema,
+)
 from core.auth import api_key_auth
+from core.conditional import conditional_get
+from core.config import settings
+from core.geo import MAX_TILE_ZOOM
+from core.metrics import serialization_timer
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from core.responses import RawJSONResponse, raw_json
+from exceptions.exceptions import AppException
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/organizations")
 organization_service = OrganizationService()
 
+LIMIT_QUERY = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы")
+CURSOR_QUERY = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)")
+
+
+def organization_filters(
+    building_id: Optional[int] = Query(None, description="Фильтр по зданию"),
+    activity_id: Optional[int] = Query(None, description="Фильтр по виду деятельности"),
+    root_activity_id: Optional[int] = Query(None, description="Фильтр по дереву деятельности"),
+    name: Optional[str] = Query(None, min_length=1, description="Поиск по имени (частичное совпадение, регистронезависимое)"),
 
-@router.get("/map", response_model=List[OrganizationSchema])
-async def list_organizations_map(
     # радиус
     lat: Optional[float] = Query(None, description="Широта центра точки"),
     lon: Optional[float] = Query(None, description="Долгота центра точки"),
@@ -28,112 +44,274 @@ async def list_organizations_map(
     lat_max: Optional[float] = Query(None, description="Максимальная широта"),
     lon_min: Optional[float] = Query(None, description="Минимальная долгота"),
     lon_max: Optional[float] = Query(None, description="Максимальная долгота"),
+) -> OrganizationFilters:
+    """Фильтры списка организаций из query-параметров; заданные фильтры объединяются через AND"""
+    filters = OrganizationFilters(
+        building_id=building_id, activity_id=activity_id, root_activity_id=root_activity_id, name=name,
+        lat=lat, lon=lon, radius_km=radius_km,
+        lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max,
+    )
+    if filters.geo_incomplete:
+        logger.warning("Некорректный запрос: гео-параметры заданы частично %s", filters)
+        raise HTTPException(
+            status_code=400,
+            detail="Параметры радиуса (lat, lon, radius_km) и прямоугольника (lat_min, lat_max, lon_min, lon_max) задаются целиком",
+        )
+    return filters
 
-    db: AsyncSession = Depends(get_db),
+
+@router.get("/map", response_model=OrganizationPageSchema, dependencies=[Depends(conditional_get)])
+async def list_organizations_map(
+    response: Response,
+    filters: OrganizationFilters = Depends(organization_filters),
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    db: AsyncSession = Depends(get_read_db),
     _: None = Depends(api_key_auth),
-) -> List[OrganizationSchema]:
+) -> RawJSONResponse:
     """
     Список организаций по гео-фильтру:
     - По радиусу (lat, lon, radius_km)
     - По прямоугольной области (lat_min, lat_max, lon_min, lon_max)
+
+    Остальные фильтры списка (building_id, activity_id, root_activity_id, name) тоже допускаются.
     """
     try:
-        if lat is not None and lon is not None and radius_km is not None:
-            logger.info("Запрос организаций по радиусу: lat=%s, lon=%s, radius=%s", lat, lon, radius_km)
-            return await organization_service.get_organizations_in_radius(db, lat, lon, radius_km)
-
-        if all(v is not None for v in [lat_min, lat_max, lon_min, lon_max]):
-            logger.info(
-                "Запрос организаций по прямоугольнику: [%s,%s]x[%s,%s]",
-                lat_min, lat_max, lon_min, lon_max
+        if not filters.has_geo:
+            logger.warning("Некорректный запрос: не заданы параметры гео-фильтрации")
+            raise HTTPException(
+                status_code=400,
+                detail="Нужно указать либо параметры радиуса (lat, lon, radius_km), либо прямоугольника (lat_min, lat_max, lon_min, lon_max)",
             )
-            return await organization_service.get_organizations_in_rectangle(db, lat_min, lat_max, lon_min, lon_max)
 
-        logger.warning("Некорректный запрос: не заданы параметры фильтрации")
-        raise HTTPException(
-            status_code=400,
-            detail="Нужно указать либо параметры радиуса (lat, lon, radius_km), либо прямоугольника (lat_min, lat_max, lon_min, lon_max)",
-        )
-    except HTTPException:
+        body = await organization_service.search_organizations_json(db, filters, limit, cursor)
+        logger.info("Гео-запрос организаций %s", filters)
+        return raw_json(body, response)
+    except (HTTPException, AppException):
         raise
     except Exception as e:
         logger.error("Внутренняя ошибка при обработке geo-запроса: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.get("/", response_model=List[OrganizationSchema])
+@router.get("/tiles/{z}/{x}/{y}", response_model=TileSchema, dependencies=[Depends(conditional_get)])
+async def get_organizations_tile(
+    response: Response,
+    z: int = Path(..., ge=0, le=MAX_TILE_ZOOM, description="Зум"),
+    x: int = Path(..., ge=0, description="Столбец тайла"),
+    y: int = Path(..., ge=0, description="Строка тайла (сверху вниз)"),
+    filters: OrganizationFilters = Depends(organization_filters),
+    db: AsyncSession = Depends(get_read_db),
+    _: None = Depends(api_key_auth),
+) -> RawJSONResponse:
+    """
+    Тайл карты z/x/y (Web Mercator, схема XYZ) с организациями:
+    - clusters — ячейки сетки тайла: число организаций и центроид их зданий
+    - points — отдельные организации; только на крупных зумах и если их немного
+
+    Остальные фильтры списка (building_id, activity_id, root_activity_id, name) допускаются,
+    гео-фильтры — нет: область задаёт сам тайл.
+    """
+    try:
+        if x >= 2 ** z or y >= 2 ** z:
+            raise HTTPException(status_code=404, detail=f"Тайла {z}/{x}/{y} не существует")
+        if filters.has_geo:
+            logger.warning("Некорректный запрос тайла: заданы гео-фильтры %s", filters)
+            raise HTTPException(status_code=400, detail="Область тайла задаётся z/x/y, гео-фильтры не допускаются")
+
+        body = await organization_service.get_tile_json(db, z, x, y, filters)
+        logger.info("Тайл %s/%s/%s по фильтрам %s", z, x, y, filters)
+        if settings.TILE_MAX_AGE_SECONDS > 0:
+            response.headers["Cache-Control"] = f"private, max-age={settings.TILE_MAX_AGE_SECONDS}"
+        return raw_json(body, response)
+    except (HTTPException, AppException):
+        raise
+    except Exception as e:
+        logger.error("Ошибка при построении тайла %s/%s/%s: %s", z, x, y, e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/suggest", response_model=List[OrganizationSuggestionSchema])
+async def suggest_organizations(
+    q: str = Query(..., min_length=1, description="Начало названия организации"),
+    limit: int = Query(10, ge=1, le=50, description="Сколько подсказок вернуть"),
+    _: None = Depends(api_key_auth),
+) -> List[OrganizationSuggestionSchema]:
+    """Автодополнение названий организаций по префиксу (из памяти, без запроса в БД)"""
+    return [
+        OrganizationSuggestionSchema(id=org_id, name=name)
+        for org_id, name in organization_service.suggest_organizations(q, limit)
+    ]
+
+
+@router.get("/nearest", response_model=List[NearestOrganizationSchema])
+async def list_nearest_organizations(
+    lat: float = Query(..., ge=-90, le=90, description="Широта точки"),
+    lon: float = Query(..., ge=-180, le=180, description="Долгота точки"),
+    k: int = Query(10, ge=1, le=100, description="Сколько ближайших организаций вернуть"),
+    db: AsyncSession = Depends(get_read_db),
+    _: None = Depends(api_key_auth),
+) -> RawJSONResponse:
+    """k ближайших к точке организаций, отсортированных по расстоянию (км)"""
+    try:
+        rows = await organization_service.get_nearest_organizations(db, lat, lon, k)
+        logger.info("Найдено %s ближайших организаций к точке (%s, %s)", len(rows), lat, lon)
+        with serialization_timer():
+            nearest = nearest_list_adapter.validate_python(
+                [{"organization": org, "distance_km": distance} for org, distance in rows]
+            )
+            body = nearest_list_adapter.dump_json(nearest)
+        return RawJSONResponse(body)
+    except Exception as e:
+        logger.error("Ошибка при поиске ближайших организаций: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/", response_model=OrganizationPageSchema, dependencies=[Depends(conditional_get)])
 async def list_organizations(
-    building_id: Optional[int] = Query(None, description="Фильтр по зданию"),
-    activity_id: Optional[int] = Query(None, description="Фильтр по виду деятельности"),
-    root_activity_id: Optional[int] = Query(None, description="Фильтр по дереву деятельности"),
-    name: Optional[str] = Query(None, min_length=1, description="Поиск по имени (частичное совпадение, регистронезависимое)"),
+    response: Response,
+    filters: OrganizationFilters = Depends(organization_filters),
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    db: AsyncSession = Depends(get_read_db),
+    _: None = Depends(api_key_auth),
+) -> RawJSONResponse:
+    """
+    Список организаций с поддержкой фильтров. Любые фильтры можно комбинировать —
+    они объединяются через AND в одном запросе.
+    """
+    try:
+        body = await organization_service.search_organizations_json(db, filters, limit, cursor)
+        logger.info("Получен список организаций по фильтрам %s", filters)
+        return raw_json(body, response)
+    except (HTTPException, AppException):
+        raise
+    except Exception as e:
+        logger.error("Ошибка при получении списка организаций: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_organizations(
+    filters: OrganizationFilters = Depends(organization_filters),
+    _: None = Depends(api_key_auth),
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка организаций в формате NDJSON (одна организация на строку).
+    Фильтры комбинируются через AND. Память не растёт с размером результата:
+    строки читаются серверным курсором порциями и отдаются клиенту по мере сериализации.
+    """
+    async def ndjson_rows():
+        # Сессия живёт столько же, сколько поток, поэтому открывается здесь, а не через get_db
+        async with ReadSessionLocal() as db:
+            try:
+                async for partition in organization_service.stream_organizations(db, filters):
+                    # Порция валидируется одним вызовом; дамп — по строке на организацию (NDJSON)
+                    with serialization_timer():
+                        orgs = organization_list_adapter.validate_python(partition)
+                        chunk = b"".join(org.model_dump_json().encode() + b"\n" for org in orgs)
+                    yield chunk
+            except Exception as e:
+                logger.error("Ошибка при потоковой выгрузке организаций: %s", e)
+                raise
+
+    return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson")
+
+
+@router.post("/batch", response_model=BatchResultSchema)
+async def create_organizations_batch(
+    payload: BatchRequestSchema,
     db: AsyncSession = Depends(get_db),
     _: None = Depends(api_key_auth),
-) -> List[OrganizationSchema]:
+) -> BatchResultSchema:
     """
-    Список организаций с поддержкой фильтров (разрешён только один одновременно).
+    Создание организаций пачкой одной транзакцией. Элемент: {"name", "building_id"}.
+    Некорректные элементы не мешают остальным — ошибка возвращается по каждому индексу.
     """
     try:
-        filters = [building_id, activity_id, root_activity_id, name]
-        filters_set = [f for f in filters if f is not None]
-
-        if len(filters_set) > 1:
-            logger.warning(
-                "Некорректный запрос: передано несколько фильтров одновременно %s",
-                [("building_id", building_id), ("activity_id", activity_id),
-                 ("root_activity_id", root_activity_id), ("name", name)]
-            )
-            raise HTTPException(
-                status_code=400,
-                detail="Можно указывать только один фильтр одновременно"
-            )
+        result = await organization_service.create_organizations(db, payload.items)
+        logger.info("Пакетное создание организаций: успешно=%s, ошибок=%s", result.succeeded, result.failed)
+        return result
+    except (HTTPException, AppException):
+        raise
+    except Exception as e:
+        logger.error("Ошибка при пакетном создании организаций: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        if building_id is not None:
-            organizations = await organization_service.get_organizations_in_buildings(db, building_id)
-            logger.info("Получены организации для здания id=%s, count=%s", building_id, len(organizations))
-            return organizations
 
-        if activity_id is not None:
-            organizations = await organization_service.get_organizations_by_activity(db, activity_id)
-            logger.info("Получены организации для деятельности id=%s, count=%s", activity_id, len(organizations))
-            return organizations
+@router.patch("/batch", response_model=BatchResultSchema)
+async def update_organizations_batch(
+    payload: BatchRequestSchema,
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(api_key_auth),
+) -> BatchResultSchema:
+    """Обновление организаций пачкой. Элемент: {"id", "name"?, "building_id"?}; ошибки — по каждому индексу"""
+    try:
+        result = await organization_service.update_organizations(db, payload.items)
+        logger.info("Пакетное обновление организаций: успешно=%s, ошибок=%s", result.succeeded, result.failed)
+        return result
+    except (HTTPException, AppException):
+        raise
+    except Exception as e:
+        logger.error("Ошибка при пакетном обновлении организаций: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        if root_activity_id is not None:
-            organizations = await organization_service.search_organizations_by_activity_tree(db, root_activity_id)
-            logger.info("Поиск организаций по дереву деятельности id=%s, найдено=%s", root_activity_id, len(organizations))
-            return organizations
 
-        if name is not None:
-            organizations = await organization_service.search_organizations_by_name(db, name)
-            logger.info("Поиск организаций по имени='%s', найдено=%s", name, len(organizations))
-            return organizations
+@router.post("/batch-delete", response_model=BatchResultSchema)
+async def delete_organizations_batch(
+    payload: BatchIdsSchema,
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(api_key_auth),
+) -> BatchResultSchema:
+    """Удаление организаций пачкой по списку id; ошибки — по каждому индексу"""
+    try:
+        result = await organization_service.delete_organizations(db, payload.ids)
+        logger.info("Пакетное удаление организаций: успешно=%s, ошибок=%s", result.succeeded, result.failed)
+        return result
+    except (HTTPException, AppException):
+        raise
+    except Exception as e:
+        logger.error("Ошибка при пакетном удалении организаций: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        organizations = await organization_service.get_all_organizations(db)
-        logger.info("Получен общий список организаций, count=%s", len(organizations))
-        return organizations
 
-    except HTTPException:
+@router.post("/batch-get", response_model=OrganizationBatchGetSchema)
+async def get_organizations_batch(
+    payload: BatchIdsSchema,
+    db: AsyncSession = Depends(get_read_db),
+    _: None = Depends(api_key_auth),
+) -> RawJSONResponse:
+    """
+    Карточки организаций по списку id (до 1000) одним запросом вместо GET /organizations/{id} на каждый.
+    items — в порядке запроса, missing — несуществующие id.
+    """
+    try:
+        body = await organization_service.get_organizations_batch_json(db, payload.ids)
+        logger.info("Получены организации по списку id, запрошено=%s", len(payload.ids))
+        return RawJSONResponse(body)
+    except (HTTPException, AppException):
         raise
     except Exception as e:
-        logger.error("Ошибка при получении списка организаций: %s", e)
+        logger.error("Ошибка при получении организаций по списку id: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.get("/{org_id}", response_model=OrganizationSchema)
+@router.get("/{org_id}", response_model=OrganizationSchema, dependencies=[Depends(conditional_get)])
 async def get_organization_by_id(
     org_id: int,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     _: None = Depends(api_key_auth),
-) -> OrganizationSchema:
+) -> RawJSONResponse:
     """Получение информации об организации по её идентификатору"""
     try:
-        organization: Optional[OrganizationSchema] = await organization_service.get_organization_by_id(db, org_id)
-        if not organization:
+        body: Optional[bytes] = await organization_service.get_organization_json(db, org_id)
+        if body is None:
             logger.warning("Организация не найдена id=%s", org_id)
             raise HTTPException(status_code=404, detail="Organization not found")
         logger.info("Получена организация id=%s", org_id)
-        return organization
-    except HTTPException:
+        return raw_json(body, response)
+    except (HTTPException, AppException):
         raise
     except Exception as e:
         logger.error("Ошибка при получении организации id=%s: %s", org_id, e)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+
+from api.organization import organization_service
+from cache.activity_tree import activity_tree_cache
+from cache.response import response_cache
+from core.auth import api_key_auth
+from db.database import replica_router
+from db.pool import pool_metrics
+
+router = APIRouter(prefix="/stats")
+
+
+def cache_snapshot() -> dict:
+    return {
+        "response_cache": response_cache.stats(),
+        "activity_tree": activity_tree_cache.stats(),
+        "organization_loader": organization_service.detail_loader.stats(),
+        "document_loader": organization_service.document_loader.stats(),
+    }
+
+
+def db_snapshot() -> dict:
+    return {**pool_metrics.snapshot(), "replicas": replica_router.stats()}
+
+
+@router.get("/cache")
+async def cache_stats(_: None = Depends(api_key_auth)) -> dict:
+    """Счётчики попаданий/промахов in-process кэшей"""
+    return cache_snapshot()
+
+
+@router.get("/db")
+async def db_pool_stats(_: None = Depends(api_key_auth)) -> dict:
+    """Состояние пула соединений основной БД и доступность реплик"""
+    return db_snapshot()
@@ -0,0 +1,158 @@
+"""
+Нагрузочный тест HTTP API с фиксированной конкурентностью.
+
+Для каждого сценария --concurrency воркеров шлют запросы без пауз в течение --duration
+секунд (после --warmup секунд прогрева, который не учитывается). Параметры запросов
+берутся случайно из выборки реальных организаций (первые страницы /organizations/),
+поэтому нужен заполненный справочник — см. cli.generate_data.
+
+list   — GET /organizations/?building_id=...
+map    — GET /organizations/map?lat=...&lon=...&radius_km=... (вокруг случайного здания)
+detail — GET /organizations/{org_id}
+
+Результат — JSON: по каждому сценарию число запросов, ошибок, RPS и задержки
+p50/p95/p99/max в мс. Нужен пакет httpx (pip install httpx).
+
+Запуск (из каталога app, сервер уже запущен):
+    python -m benchmarks.load_test --base-url http://localhost:8000 --concurrency 32 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from core.config import settings
+from core.pagination import MAX_PAGE_SIZE
+
+SCENARIOS = ("list", "map", "detail")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def sample_organizations(client, pages: int) -> List[dict]:
+    """Несколько страниц списка организаций — источник id, зданий и координат для запросов"""
+    sample, cursor = [], None
+    for _ in range(pages):
+        params = {"limit": MAX_PAGE_SIZE}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/organizations/", params=params)
+        response.raise_for_status()
+        page = response.json()
+        sample.extend(page["items"])
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    return sample
+
+
+def request_factories(sample: List[dict], radius_km: float, rnd: random.Random) -> Dict[str, Callable]:
+    def list_request():
+        return "/organizations/", {"building_id": rnd.choice(sample)["building"]["id"]}
+
+    def map_request():
+        building = rnd.choice(sample)["building"]
+        return "/organizations/map", {
+            "lat": building["latitude"], "lon": building["longitude"], "radius_km": radius_km,
+        }
+
+    def detail_request():
+        return f"/organizations/{rnd.choice(sample)['id']}", None
+
+    return {"list": list_request, "map": map_request, "detail": detail_request}
+
+
+async def run_scenario(client, make_request: Callable, concurrency: int, duration: float, warmup: float) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while True:
+            started = time.perf_counter()
+            if started >= stop_at:
+                return
+            path, params = make_request()
+            try:
+                response = await client.get(path, params=params)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            finished = time.perf_counter()
+            if started >= measure_from:
+                latencies.append((finished - started) * 1000)
+                errors += failed
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("Для нагрузочного теста нужен пакет httpx (pip install httpx)")
+
+    rnd = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers={"X-API-Key": args.api_key}, limits=limits, timeout=args.timeout,
+    ) as client:
+        sample = await sample_organizations(client, args.sample_pages)
+        if not sample:
+            raise SystemExit("Справочник пуст: сначала загрузите данные (python -m cli.generate_data)")
+        factories = request_factories(sample, args.radius, rnd)
+        report = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "sample_size": len(sample),
+            "scenarios": {},
+        }
+        for name in args.scenarios:
+            report["scenarios"][name] = await run_scenario(
+                client, factories[name], args.concurrency, args.duration, args.warmup
+            )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default=settings.API_KEY or "")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Секунд замера на сценарий")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Секунд прогрева перед замером")
+    parser.add_argument("--radius", type=float, default=1.0, help="Радиус для сценария map (км)")
+    parser.add_argument("--sample-pages", type=int, default=4, help="Страниц /organizations/ для выборки id")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
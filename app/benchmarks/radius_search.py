@@ -0,0 +1,82 @@
+"""
+Бенчмарк радиус-поиска: полный перебор по формуле vs префильтр по прямоугольнику.
+
+Генерирует N зданий во временной таблице (по умолчанию 100k и 1M), строит индекс
+(latitude, longitude) и сравнивает время запросов. Результат печатается в JSON.
+
+Запуск (из каталога app):
+    python -m benchmarks.radius_search --sizes 100000 1000000 --radius 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import Float, column, func, select, table, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.config import settings
+from core.geo import distance_km, radius_condition
+
+bench_buildings = table("bench_buildings", column("latitude", Float), column("longitude", Float))
+
+
+async def timed(conn, stmt, repeats: int) -> float:
+    """Медианное время выполнения запроса (мс)"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await conn.execute(stmt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+async def run(sizes, radius_km: float, repeats: int) -> list:
+    engine = create_async_engine(settings.DATABASE_URL)
+    report = []
+    async with engine.connect() as conn:
+        for size in sizes:
+            await conn.execute(text("DROP TABLE IF EXISTS bench_buildings"))
+            await conn.execute(text("CREATE TEMP TABLE bench_buildings (latitude float8, longitude float8)"))
+            # Здания в пределах европейской части России
+            await conn.execute(text(
+                "INSERT INTO bench_buildings "
+                "SELECT 43 + random() * 20, 30 + random() * 30 FROM generate_series(1, :n)"
+            ), {"n": size})
+            await conn.execute(text("CREATE INDEX ON bench_buildings (latitude, longitude)"))
+            await conn.execute(text("ANALYZE bench_buildings"))
+
+            lat, lon = random.uniform(45, 60), random.uniform(32, 58)
+            lat_col, lon_col = bench_buildings.c.latitude, bench_buildings.c.longitude
+            full_scan = select(func.count()).select_from(bench_buildings).where(
+                distance_km(lat_col, lon_col, lat, lon) <= radius_km
+            )
+            prefiltered = select(func.count()).select_from(bench_buildings).where(
+                radius_condition(lat_col, lon_col, lat, lon, radius_km)
+            )
+            full_ms = await timed(conn, full_scan, repeats)
+            bbox_ms = await timed(conn, prefiltered, repeats)
+            report.append({
+                "buildings": size,
+                "radius_km": radius_km,
+                "full_scan_ms": round(full_ms, 2),
+                "bbox_ms": round(bbox_ms, 2),
+                "speedup": round(full_ms / bbox_ms, 1) if bbox_ms else None,
+            })
+        await conn.rollback()
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--radius", type=float, default=5.0, help="Радиус поиска (км)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.sizes, args.radius, args.repeats)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
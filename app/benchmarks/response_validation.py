@@ -0,0 +1,109 @@
+"""
+Бенчмарк сериализации ответа со списком организаций (без БД): CPU на один ответ.
+
+response_model — как раньше: ORM -> OrganizationPageSchema, затем FastAPI повторно
+                 валидирует модель по response_model и кодирует через JSONResponse
+raw            — ORM -> OrganizationPageSchema -> model_dump_json, байты отдаются как есть
+cached_model   — как раньше из кэша: model_validate_json + повторная валидация FastAPI
+cached_raw     — из кэша: готовая строка только кодируется в байты
+
+Данные — N несохранённых ORM-объектов Organization (здание, 2 телефона, 2 вида деятельности).
+Результат (медиана CPU, мс на ответ) печатается в JSON.
+
+Запуск (из каталога app):
+    python -m benchmarks.response_validation --size 1000 --repeats 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from core.pagination import Page
+from models.activity import Activity
+from models.building import Building
+from models.organization import Organization, OrganizationPhone
+from schemas.organization import OrganizationPageSchema
+
+response_field = create_model_field("Response", OrganizationPageSchema, mode="serialization")
+
+
+def make_page(size: int) -> Page:
+    activities = [Activity(id=i, name=f"Деятельность {i}", parent_id=None) for i in range(1, 11)]
+    items = []
+    for i in range(1, size + 1):
+        building = Building(id=i, address=f"г. Москва, ул. Ленина, {i}", latitude=55.75, longitude=37.61)
+        items.append(Organization(
+            id=i,
+            name=f"ООО Организация {i}",
+            building=building,
+            phones=[
+                OrganizationPhone(id=2 * i, phone="8-800-555-35-35", position=0, is_primary=True),
+                OrganizationPhone(id=2 * i + 1, phone="2-222-222", position=1, is_primary=False),
+            ],
+            activities=[activities[i % 10], activities[(i + 1) % 10]],
+        ))
+    return Page(items, "cursor")
+
+
+async def fastapi_render(schema: OrganizationPageSchema) -> bytes:
+    """То, что делает FastAPI с возвращённой моделью при заданном response_model"""
+    content = await serialize_response(field=response_field, response_content=schema)
+    return JSONResponse(content).body
+
+
+async def response_model_path(page: Page, cached: str) -> bytes:
+    return await fastapi_render(OrganizationPageSchema.model_validate(page))
+
+
+async def raw_path(page: Page, cached: str) -> bytes:
+    return OrganizationPageSchema.model_validate(page).model_dump_json().encode()
+
+
+async def cached_model_path(page: Page, cached: str) -> bytes:
+    return await fastapi_render(OrganizationPageSchema.model_validate_json(cached))
+
+
+async def cached_raw_path(page: Page, cached: str) -> bytes:
+    return cached.encode()
+
+
+async def measure(path, page: Page, cached: str, repeats: int) -> float:
+    await path(page, cached)
+    timings = []
+    for _ in range(repeats):
+        started = time.process_time()
+        await path(page, cached)
+        timings.append((time.process_time() - started) * 1000)
+    return round(sorted(timings)[len(timings) // 2], 3)
+
+
+async def run(size: int, repeats: int) -> dict:
+    page = make_page(size)
+    cached = OrganizationPageSchema.model_validate(page).model_dump_json()
+    report = {"organizations": size}
+    for name, path in (
+        ("response_model", response_model_path),
+        ("raw", raw_path),
+        ("cached_model", cached_model_path),
+        ("cached_raw", cached_raw_path),
+    ):
+        report[f"{name}_cpu_ms"] = await measure(path, page, cached, repeats)
+    report["saved_cpu_ms"] = round(report["response_model_cpu_ms"] - report["raw_cpu_ms"], 3)
+    report["saved_cached_cpu_ms"] = round(report["cached_model_cpu_ms"] - report["cached_raw_cpu_ms"], 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="Организаций в ответе")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.size, args.repeats)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк сериализации списка организаций: ORM + Pydantic vs лёгкий путь (Core-строки + orjson).
+
+orm  — OrganizationRepository.search -> OrganizationPageSchema.model_validate -> model_dump_json
+lean — OrganizationRepository.search(lean=True) -> orjson.dumps
+
+Каждый прогон идёт в новой сессии (пустая identity map). Замеряется полное время
+"запрос + сериализация" и отдельно CPU процесса. Работает на данных из DATABASE_URL.
+Результат печатается в JSON.
+
+Запуск (из каталога app):
+    python -m benchmarks.serialization --limit 500 --repeats 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import orjson
+
+from db.database import AsyncSessionLocal, engine
+from repositories.organization import OrganizationRepository
+from schemas.organization import OrganizationFilters, OrganizationPageSchema
+
+repository = OrganizationRepository()
+
+
+async def orm_path(filters: OrganizationFilters, limit: int) -> bytes:
+    async with AsyncSessionLocal() as db:
+        page = await repository.search(db, filters, limit)
+        return OrganizationPageSchema.model_validate(page).model_dump_json().encode()
+
+
+async def lean_path(filters: OrganizationFilters, limit: int) -> bytes:
+    async with AsyncSessionLocal() as db:
+        page = await repository.search(db, filters, limit, lean=True)
+        return orjson.dumps({"items": page.items, "next_cursor": page.next_cursor})
+
+
+async def measure(path, filters: OrganizationFilters, limit: int, repeats: int) -> dict:
+    await path(filters, limit)  # прогрев: соединение, кэш планов и подготовленных запросов
+    wall, cpu = [], []
+    body = b""
+    for _ in range(repeats):
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        body = await path(filters, limit)
+        wall.append((time.perf_counter() - wall_started) * 1000)
+        cpu.append((time.process_time() - cpu_started) * 1000)
+    return {
+        "wall_ms": round(sorted(wall)[len(wall) // 2], 2),
+        "cpu_ms": round(sorted(cpu)[len(cpu) // 2], 2),
+        "items": len(orjson.loads(body)["items"]),
+        "bytes": len(body),
+    }
+
+
+async def run(limit: int, repeats: int, building_id) -> dict:
+    filters = OrganizationFilters(building_id=building_id)
+    orm = await measure(orm_path, filters, limit, repeats)
+    lean = await measure(lean_path, filters, limit, repeats)
+    await engine.dispose()
+    return {
+        "limit": limit,
+        "orm": orm,
+        "lean": lean,
+        "wall_speedup": round(orm["wall_ms"] / lean["wall_ms"], 2) if lean["wall_ms"] else None,
+        "cpu_speedup": round(orm["cpu_ms"] / lean["cpu_ms"], 2) if lean["cpu_ms"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=500, help="Размер страницы (не больше MAX_PAGE_SIZE)")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--building-id", type=int, default=None, help="Ограничить выборку одним зданием")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.limit, args.repeats, args.building_id)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
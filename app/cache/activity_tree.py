@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Dict, FrozenSet, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.activity import Activity, MAX_ACTIVITY_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTreeCache:
+    """
+    In-process кэш дерева видов деятельности.
+
+    Таблица activities маленькая и почти не меняется, поэтому она целиком
+    загружается в память: смежность parent -> children, множества потомков
+    и глубина каждого узла. Любая запись в activities вызывает invalidate(),
+    следующее обращение перечитывает дерево из БД.
+    """
+
+    def __init__(self, max_depth: int = MAX_ACTIVITY_DEPTH):
+        self.max_depth = max_depth
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._children: Dict[Optional[int], List[int]] = {}
+        self._depth: Dict[int, int] = {}
+        self._descendants: Dict[int, FrozenSet[int]] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить дерево из БД и пересчитать производные структуры"""
+        version = self.version
+        result = await db.execute(select(Activity.id, Activity.parent_id))
+        rows = result.all()
+
+        children: Dict[Optional[int], List[int]] = {}
+        for activity_id, parent_id in rows:
+            children.setdefault(parent_id, []).append(activity_id)
+
+        depth: Dict[int, int] = {}
+        stack = [(activity_id, 1) for activity_id in children.get(None, [])]
+        while stack:
+            activity_id, level = stack.pop()
+            depth[activity_id] = level
+            stack.extend((child_id, level + 1) for child_id in children.get(activity_id, []))
+
+        descendants: Dict[int, FrozenSet[int]] = {}
+        for activity_id, _ in rows:
+            ids = {activity_id}
+            frontier = [activity_id]
+            for _level in range(self.max_depth):
+                frontier = [c for node in frontier for c in children.get(node, [])]
+                ids.update(frontier)
+            descendants[activity_id] = frozenset(ids)
+
+        self._children = children
+        self._depth = depth
+        self._descendants = descendants
+        # Если во время загрузки случилась запись — данные уже устарели
+        self._loaded = version == self.version
+        logger.info("Загружено дерево видов деятельности: %s узлов", len(rows))
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._loaded = False
+
+    async def _ensure_loaded(self, db: AsyncSession) -> None:
+        if self._loaded:
+            self.hits += 1
+            return
+        self.misses += 1
+        async with self._lock:
+            if not self._loaded:
+                await self.load(db)
+
+    async def get_subtree_ids(self, db: AsyncSession, root_activity_id: int) -> Optional[FrozenSet[int]]:
+        """Id вида деятельности и всех вложенных в него (не глубже max_depth), None если узла нет в кэше"""
+        await self._ensure_loaded(db)
+        return self._descendants.get(root_activity_id)
+
+    async def get_children_ids(self, db: AsyncSession, activity_id: Optional[int]) -> List[int]:
+        await self._ensure_loaded(db)
+        return list(self._children.get(activity_id, []))
+
+    async def get_depth(self, db: AsyncSession, activity_id: int) -> Optional[int]:
+        """Уровень вложенности (1 — корень), None если вид деятельности не найден"""
+        await self._ensure_loaded(db)
+        return self._depth.get(activity_id)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded": self._loaded,
+            "size": len(self._descendants),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+activity_tree_cache = ActivityTreeCache()
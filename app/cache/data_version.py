@@ -0,0 +1,103 @@
+import logging
+import zlib
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, func, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import BigInteger
+
+from models.activity import Activity
+from models.building import Building
+from models.organization import Organization, OrganizationPhone
+from models.tracking import DeletedRow, TableVersion
+
+logger = logging.getLogger(__name__)
+
+# Строка-сигнал data_versions: её увеличивает импорт (services/importer.py),
+# чтобы все серверы перестроили производные данные (cache/invalidation.py)
+IMPORTS_SIGNAL = "imports"
+
+# Таблицы, чьи версии составляют версию данных справочника (организации с их связями)
+VERSIONED_MODELS = (Organization, Building, OrganizationPhone, Activity, DeletedRow)
+
+
+class DataVersion:
+    """
+    Версия данных справочника из row_version строк (миграция 3b7e5a9c1d64): без счётчиков
+    и блокировок — её читают из самих данных, поэтому она общая для всех воркеров и процессов
+    (импорт из CLI, psql) и относится к тому же серверу, с которого читаются данные.
+
+    row_version — id пишущей транзакции, а транзакции фиксируются не по порядку id:
+    коммит более старой транзакции не увеличивает max(row_version). Поэтому к максимуму
+    добавляются ещё не завершённые в снимке транзакции с меньшими версиями — их коммит
+    меняет набор, а значит, и версию.
+    """
+
+    async def get(self, db: AsyncSession) -> Optional[str]:
+        """Текущая версия данных; None, если прочитать её не удалось"""
+        versions = union_all(
+            *(select(func.max(model.row_version).label("version")) for model in VERSIONED_MODELS)
+        ).subquery()
+        stmt = select(
+            select(func.coalesce(func.max(versions.c.version), 0)).scalar_subquery(),
+            func.pending_row_versions(type_=ARRAY(BigInteger)),
+        )
+        try:
+            latest, pending = (await db.execute(stmt)).one()
+        except SQLAlchemyError as e:
+            logger.warning("Не удалось прочитать версию данных: %s", e)
+            # Упавший запрос прерывает транзакцию — без rollback сессию нельзя использовать дальше
+            await db.rollback()
+            return None
+        return self.token(latest, pending or [])
+
+    @staticmethod
+    def token(latest: int, pending: List[int]) -> str:
+        # Транзакции новее latest в версию не входят: их коммит и так увеличит максимум
+        older = [version for version in pending if version < latest]
+        if not older:
+            return str(latest)
+        return f"{latest}-{zlib.crc32(','.join(map(str, older)).encode()):08x}"
+
+    async def committed(self, db: AsyncSession) -> int:
+        """Граница: все строки с row_version не больше неё уже зафиксированы, новых таких не будет"""
+        return (await db.execute(select(func.committed_row_version(type_=BigInteger)))).scalar_one()
+
+    async def changed_since(self, db: AsyncSession, model, version: int) -> bool:
+        """Есть ли в таблице модели строки или надгробия с версией больше version"""
+        stmt = select(or_(
+            exists().where(model.row_version > version),
+            exists().where(DeletedRow.table_name == model.__tablename__, DeletedRow.row_version > version),
+        ))
+        return bool((await db.execute(stmt)).scalar())
+
+    async def signals(self, db: AsyncSession) -> Dict[str, int]:
+        """Счётчики-сигналы data_versions"""
+        result = await db.execute(select(TableVersion.table_name, TableVersion.version))
+        return dict(result.all())
+
+    async def bump(self, db: AsyncSession, name: str) -> Optional[int]:
+        """Увеличить счётчик-сигнал и зафиксировать; новое значение или None, если не удалось"""
+        try:
+            result = await db.execute(
+                update(TableVersion)
+                .where(TableVersion.table_name == name)
+                .values(version=TableVersion.version + 1, changed_at=func.current_timestamp())
+                .returning(TableVersion.version)
+            )
+            version = result.scalar()
+            await db.commit()
+            return version
+        except SQLAlchemyError as e:
+            logger.warning("Не удалось увеличить счётчик %s: %s", name, e)
+            await db.rollback()
+            return None
+
+    @staticmethod
+    def etag(version: str) -> str:
+        return f'W/"{version}"'
+
+
+data_version = DataVersion()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.activity_tree import activity_tree_cache
+from cache.data_version import IMPORTS_SIGNAL, data_version
+from cache.name_index import organization_name_index
+from cache.response import response_cache
+from core.config import settings
+from db.database import AsyncSessionLocal
+from models.activity import Activity
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersionWatcher:
+    """
+    Сверка in-process кэшей с основной БД.
+
+    Записи других воркеров и процессов (импорт из CLI, генератор данных) не проходят
+    через кэши этого процесса — о них сообщают только версии строк и сигналы в БД.
+    Раз в интервал проверяется, что изменилось после прошлой сверки:
+    - строки или надгробия activities с версией выше прошлой границы — сбрасывается
+      дерево видов деятельности (перечитается лениво);
+    - строки и надгробия organizations с версией выше прошлой границы — дочитываются
+      в индекс имён (без полного прохода по таблице);
+    - изменился сигнал imports — дерево, индекс имён и кэш ответов перестраиваются целиком.
+    Граница — committed_row_version(): транзакции с версиями не выше неё завершены,
+    поэтому изменение, зафиксированное позже, не окажется ниже уже проверенной границы.
+    Строки выше новой границы могут прийти повторно при следующей сверке — их
+    применение идемпотентно.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.refreshes = 0
+        self._known: Dict[str, int] = {}
+        self._horizon = 0
+
+    async def start(self, db: AsyncSession) -> None:
+        """Запомнить границу версий и сигналы, на которых построены кэши при старте"""
+        self._horizon = await data_version.committed(db)
+        self._known = await data_version.signals(db)
+
+    def seen(self, name: str, version: int) -> None:
+        """Изменение уже учтено этим процессом (импорт здесь же) — повторно не перестраивать"""
+        self._known[name] = version
+
+    async def poll(self) -> None:
+        async with self.session_factory() as db:
+            # Граница — до чтения изменений: всё, что зафиксируется после, будет выше неё
+            horizon = await data_version.committed(db)
+            signals = await data_version.signals(db)
+            if self._known.get(IMPORTS_SIGNAL) != signals.get(IMPORTS_SIGNAL):
+                logger.info("Обнаружен импорт в другом процессе — перестраиваем кэши")
+                activity_tree_cache.invalidate()
+                await organization_name_index.load(db)
+                await response_cache.clear()
+                self.refreshes += 1
+            else:
+                if await data_version.changed_since(db, Activity, self._horizon):
+                    activity_tree_cache.invalidate()
+                    self.refreshes += 1
+                await organization_name_index.load_changes(db, self._horizon)
+        self._horizon = horizon
+        self._known = signals
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning("Не удалось сверить кэши с БД: %s", e)
+
+
+# Версии читаются с основной БД: на реплике изменения появились бы только после лага репликации
+data_version_watcher = DataVersionWatcher(AsyncSessionLocal, settings.DATA_VERSION_POLL_SECONDS)
@@ -0,0 +1,108 @@
+import logging
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.organization import Organization
+from models.tracking import DeletedRow
+
+logger = logging.getLogger(__name__)
+
+# Доля изменившихся записей, начиная с которой массив пересортировывается целиком,
+# а не правится вставками (каждая insort — сдвиг массива, O(n))
+REBUILD_RATIO = 0.05
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+class OrganizationNameIndex:
+    """
+    In-process префиксный индекс имён организаций для автодополнения.
+
+    Отсортированный массив (нормализованное имя, id) + bisect: поиск по префиксу —
+    O(log n + k), без обращения к Postgres. Строится при старте приложения
+    и обновляется инкрементально из OrganizationRepository при записи; записи других
+    процессов дочитываются по row_version (load_changes, см. cache/invalidation.py).
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, int]] = []
+        self._names: Dict[int, str] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        result = await db.execute(select(Organization.id, Organization.name))
+        names = {org_id: name for org_id, name in result.all()}
+        self._entries = sorted((normalize(name), org_id) for org_id, name in names.items())
+        self._names = names
+        logger.info("Построен индекс имён организаций: %s записей", len(names))
+
+    async def load_changes(self, db: AsyncSession, since_version: int) -> int:
+        """
+        Дочитать организации, изменённые и удалённые после версии since_version;
+        число применённых изменений. Читаются только края индексов ix_*_row_version.
+        """
+        removed = await db.execute(
+            select(DeletedRow.row_id)
+            .where(DeletedRow.table_name == Organization.__tablename__, DeletedRow.row_version > since_version)
+        )
+        changed = await db.execute(
+            select(Organization.id, Organization.name).where(Organization.row_version > since_version)
+        )
+        removed_ids = removed.scalars().all()
+        changed_rows = changed.all()
+        # Сначала удаления: id, удалённый и вставленный заново, есть среди изменённых строк
+        self.apply(changed_rows, removed_ids)
+        return len(removed_ids) + len(changed_rows)
+
+    def apply(self, changed: Iterable[Tuple[int, str]], removed: Iterable[int]) -> None:
+        """Применить пачку изменений: удаления, затем вставки и переименования"""
+        changed, removed = list(changed), list(removed)
+        if len(changed) + len(removed) < max(len(self._entries) * REBUILD_RATIO, 1):
+            for org_id in removed:
+                self.remove(org_id)
+            for org_id, name in changed:
+                self.upsert(org_id, name)
+            return
+        names = dict(self._names)
+        for org_id in removed:
+            names.pop(org_id, None)
+        names.update(changed)
+        self._entries = sorted((normalize(name), org_id) for org_id, name in names.items())
+        self._names = names
+
+    def upsert(self, org_id: int, name: str) -> None:
+        self.remove(org_id)
+        insort(self._entries, (normalize(name), org_id))
+        self._names[org_id] = name
+
+    def remove(self, org_id: int) -> None:
+        name = self._names.pop(org_id, None)
+        if name is None:
+            return
+        entry = (normalize(name), org_id)
+        pos = bisect_left(self._entries, entry)
+        if pos < len(self._entries) and self._entries[pos] == entry:
+            del self._entries[pos]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """До limit пар (id, name), имя которых начинается с prefix (без учёта регистра)"""
+        key = normalize(prefix)
+        suggestions = []
+        pos = bisect_left(self._entries, (key, -1))
+        while pos < len(self._entries) and len(suggestions) < limit:
+            normalized, org_id = self._entries[pos]
+            if not normalized.startswith(key):
+                break
+            suggestions.append((org_id, self._names[org_id]))
+            pos += 1
+        return suggestions
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+organization_name_index = OrganizationNameIndex()
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Тег, которым помечаются все списочные ответы: любая запись может изменить любой список
+LIST_TAG = "lists"
+
+
+def entity_tag(table: str, obj_id: int) -> str:
+    return f"{table}:{obj_id}"
+
+
+class CacheBackend:
+    """Интерфейс бэкенда кэша ответов: значения — готовый JSON, инвалидация по тегам"""
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: int, tags: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    async def evict_tags(self, tags: Iterable[str]) -> int:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU с TTL и индексом тег -> ключи"""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int, tags: Iterable[str]) -> None:
+        self._drop(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    async def evict_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= self._tags.pop(tag, set())
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Бэкенд поверх Redis-совместимого асинхронного клиента (redis.asyncio.Redis
+    или fakeredis.aioredis.FakeRedis для локального запуска).
+    Теги хранятся множествами tag:<имя> с ключами, которые ими помечены.
+    """
+
+    def __init__(self, client, prefix: str = "company_directory:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    async def set(self, key: str, value: str, ttl: int, tags: Iterable[str]) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), self.prefix + key)
+            pipe.expire(self._tag_key(tag), ttl)
+        await pipe.execute()
+
+    async def evict_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        for tag_key in tag_keys:
+            keys |= set(await self.client.smembers(tag_key))
+        if keys or tag_keys:
+            await self.client.delete(*keys, *tag_keys)
+        return len(keys)
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class ResponseCache:
+    """
+    Кэш ответов read-эндпоинтов перед OrganizationService.
+    Ключ строится из нормализованных параметров запроса, ошибки бэкенда
+    не ломают запрос — он просто идёт в БД.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: int = 60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def make_key(namespace: str, params: dict) -> str:
+        normalized = {k: v for k, v in params.items() if v is not None}
+        digest = hashlib.sha1(
+            json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str).encode()
+        ).hexdigest()
+        return f"{namespace}:{digest}"
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Кэш ответов недоступен (get %s): %s", key, e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str, tags: Iterable[str]) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(key, value, self.ttl, tags)
+        except Exception as e:
+            logger.warning("Кэш ответов недоступен (set %s): %s", key, e)
+
+    async def evict_tags(self, tags: Iterable[str]) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.evictions += await self.backend.evict_tags(tags)
+        except Exception as e:
+            logger.warning("Не удалось инвалидировать кэш ответов по тегам %s: %s", list(tags), e)
+
+    async def clear(self) -> None:
+        """Сбросить весь кэш — после массовых изменений (импорт), когда теги перечислять дорого"""
+        if not self.enabled:
+            return
+        try:
+            await self.backend.clear()
+        except Exception as e:
+            logger.warning("Не удалось очистить кэш ответов: %s", e)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def create_backend(name: str) -> Optional[CacheBackend]:
+    if name == "memory":
+        return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+    if name == "redis":
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("Для CACHE_BACKEND=redis нужен пакет redis (pip install redis)")
+        return RedisCacheBackend(aioredis.from_url(settings.REDIS_URL))
+    if name in ("none", ""):
+        return None
+    raise ValueError(f"Неизвестный CACHE_BACKEND: {name}")
+
+
+response_cache = ResponseCache(create_backend(settings.CACHE_BACKEND), settings.CACHE_TTL_SECONDS)
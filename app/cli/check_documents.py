@@ -0,0 +1,61 @@
+"""
+Сверка read-модели organization_documents с нормализованными таблицами.
+
+Для каждой организации документ сравнивается с organization_document(id) — тем,
+что собрал бы триггер сейчас. Отчёт (число организаций и документов, отсутствующие
+и устаревшие документы, первые id) печатается в JSON; код выхода 1 при расхождениях.
+С --fix расхождения сразу пересобираются.
+
+Запуск (из каталога app):
+    python -m cli.check_documents
+    python -m cli.check_documents --fix
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from core.log import setup_logging
+from db.database import AsyncSessionLocal, engine
+from repositories.document import OrganizationDocumentRepository
+
+# Сколько id расхождений попадает в отчёт
+MAX_REPORTED_IDS = 100
+
+
+async def run(fix: bool) -> dict:
+    repository = OrganizationDocumentRepository()
+    report = {"organizations": 0, "documents": 0, "missing": 0, "stale": 0, "fixed": 0, "ids": []}
+    try:
+        async with AsyncSessionLocal() as db:
+            report["organizations"], report["documents"] = await repository.count(db)
+            mismatched = []
+            async for partition in repository.stream_mismatches(db):
+                for org_id, missing in partition:
+                    report["missing" if missing else "stale"] += 1
+                    if len(report["ids"]) < MAX_REPORTED_IDS:
+                        report["ids"].append(org_id)
+                mismatched.extend(org_id for org_id, _ in partition)
+        if fix and mismatched:
+            # Пересборка в отдельной транзакции, когда серверный курсор сверки уже закрыт
+            async with AsyncSessionLocal() as db:
+                await repository.refresh(db, mismatched)
+                await db.commit()
+            report["fixed"] = len(mismatched)
+    finally:
+        await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="Пересобрать отсутствующие и устаревшие документы")
+    args = parser.parse_args()
+    setup_logging()
+    report = asyncio.run(run(args.fix))
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["missing"] + report["stale"] > report["fixed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Генератор синтетических данных для нагрузочных тестов и бенчмарков.
+
+Создаёт здания в крупных городах (число зданий пропорционально населению, точки
+разбросаны вокруг центра), полное трёхуровневое дерево видов деятельности и организации
+с 1–3 телефонами и 1–3 видами деятельности. При одном и том же --seed на пустой базе
+данные получаются одинаковыми.
+
+Данные грузятся тем же конвейером, что и cli.import_data (валидация, COPY, порции),
+id продолжают уже существующие. С --output вместо загрузки пишутся NDJSON-файлы
+buildings/activities/organizations.ndjson для повторного импорта.
+
+Запуск (из каталога app):
+    python -m cli.generate_data --buildings 100000 --organizations 1000000
+    python -m cli.generate_data --buildings 1000 --organizations 10000 --output data/small
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+from typing import AsyncIterator, Iterator, List
+
+from cli.import_data import print_progress
+from core.log import setup_logging
+from db.database import engine, raw_connection
+from repositories.bulk import BulkImportRepository
+from services.importer import DEFAULT_BATCH_SIZE, ImportService
+
+# Город, широта и долгота центра, население (млн) — вес при выборе, радиус застройки (км)
+CITIES = (
+    ("Москва", 55.7558, 37.6173, 13.1, 25),
+    ("Санкт-Петербург", 59.9343, 30.3351, 5.6, 18),
+    ("Новосибирск", 55.0084, 82.9357, 1.6, 12),
+    ("Екатеринбург", 56.8389, 60.6057, 1.5, 12),
+    ("Казань", 55.7887, 49.1221, 1.3, 10),
+    ("Нижний Новгород", 56.2965, 43.9361, 1.2, 10),
+    ("Красноярск", 56.0153, 92.8932, 1.2, 10),
+    ("Челябинск", 55.1644, 61.4368, 1.2, 10),
+    ("Самара", 53.1959, 50.1002, 1.2, 10),
+    ("Ростов-на-Дону", 47.2357, 39.7015, 1.1, 9),
+)
+STREETS = (
+    "Ленина", "Мира", "Советская", "Гагарина", "Пушкина", "Садовая", "Лесная", "Школьная",
+    "Молодёжная", "Набережная", "Центральная", "Кирова", "Победы", "Строителей", "Заводская",
+)
+ACTIVITY_ROOTS = (
+    "Еда", "Автомобили", "Строительство", "Медицина", "Образование",
+    "Торговля", "Транспорт", "Финансы", "Связь", "Услуги",
+)
+ORGANIZATION_FORMS = ("ООО", "АО", "ИП", "ПАО")
+KM_PER_DEGREE = 111.32
+
+
+def generate_buildings(rnd: random.Random, count: int, start_id: int) -> Iterator[dict]:
+    weights = [population for _, _, _, population, _ in CITIES]
+    for building_id in range(start_id, start_id + count):
+        city, lat, lon, _, spread_km = rnd.choices(CITIES, weights)[0]
+        # Плотность застройки убывает от центра: нормальное распределение, обрезанное по радиусу
+        distance = min(abs(rnd.gauss(0, spread_km / 2)), spread_km)
+        bearing = rnd.uniform(0, 2 * math.pi)
+        d_lat = distance * math.cos(bearing) / KM_PER_DEGREE
+        d_lon = distance * math.sin(bearing) / (KM_PER_DEGREE * math.cos(math.radians(lat)))
+        yield {
+            "id": building_id,
+            "address": f"г. {city}, ул. {rnd.choice(STREETS)}, {rnd.randint(1, 250)}",
+            "latitude": round(lat + d_lat, 6),
+            "longitude": round(lon + d_lon, 6),
+        }
+
+
+def generate_activities(roots: int, children: int, start_id: int) -> List[dict]:
+    """Полное дерево: roots корней, у каждого узла первых двух уровней — children потомков"""
+    activities = []
+    next_id = start_id
+    for root_index in range(roots):
+        root_name = ACTIVITY_ROOTS[root_index % len(ACTIVITY_ROOTS)]
+        if root_index >= len(ACTIVITY_ROOTS):
+            root_name = f"{root_name} {root_index // len(ACTIVITY_ROOTS) + 1}"
+        root_id = next_id
+        activities.append({"id": root_id, "name": root_name, "parent_id": None})
+        next_id += 1
+        for child_index in range(1, children + 1):
+            child_id = next_id
+            activities.append({"id": child_id, "name": f"{root_name} / {child_index}", "parent_id": root_id})
+            next_id += 1
+            for leaf_index in range(1, children + 1):
+                activities.append({
+                    "id": next_id, "name": f"{root_name} / {child_index}.{leaf_index}", "parent_id": child_id,
+                })
+                next_id += 1
+    return activities
+
+
+def generate_organizations(
+    rnd: random.Random, count: int, start_id: int, building_ids: range, activity_ids: List[int]
+) -> Iterator[dict]:
+    for organization_id in range(start_id, start_id + count):
+        phones = {
+            f"8-9{rnd.randint(0, 99):02d}-{rnd.randint(0, 999):03d}-{rnd.randint(0, 99):02d}-{rnd.randint(0, 99):02d}"
+            for _ in range(rnd.randint(1, 3))
+        }
+        yield {
+            "id": organization_id,
+            "name": f"{rnd.choice(ORGANIZATION_FORMS)} «Организация {organization_id}»",
+            "building_id": rnd.choice(building_ids),
+            "phones": sorted(phones),
+            "activity_ids": rnd.sample(activity_ids, rnd.randint(1, min(3, len(activity_ids)))),
+        }
+
+
+async def as_lines(records: Iterator[dict]) -> AsyncIterator[str]:
+    for i, record in enumerate(records):
+        yield json.dumps(record, ensure_ascii=False)
+        if i % 1000 == 0:
+            # Отдаём управление циклу, чтобы генерация не держала его целиком
+            await asyncio.sleep(0)
+
+
+async def start_ids() -> dict:
+    repository = BulkImportRepository()
+    async with raw_connection() as conn:
+        return {
+            kind: await repository.max_id(conn, kind) + 1
+            for kind in ("buildings", "activities", "organizations")
+        }
+
+
+async def run(args) -> dict:
+    rnd = random.Random(args.seed)
+    ids = {"buildings": 1, "activities": 1, "organizations": 1} if args.output else await start_ids()
+    activities = generate_activities(args.activity_roots, args.activity_children, ids["activities"])
+    datasets = (
+        ("buildings", lambda: generate_buildings(rnd, args.buildings, ids["buildings"])),
+        ("activities", lambda: iter(activities)),
+        ("organizations", lambda: generate_organizations(
+            rnd, args.organizations, ids["organizations"],
+            range(ids["buildings"], ids["buildings"] + args.buildings),
+            [activity["id"] for activity in activities],
+        )),
+    )
+
+    summary = {"seed": args.seed}
+    try:
+        for kind, records in datasets:
+            if args.output:
+                os.makedirs(args.output, exist_ok=True)
+                path = os.path.join(args.output, f"{kind}.ndjson")
+                with open(path, "w", encoding="utf-8") as f:
+                    rows = 0
+                    for record in records():
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        rows += 1
+                summary[kind] = {"path": path, "rows": rows}
+            else:
+                report = await ImportService().run(
+                    kind, as_lines(records()), "ndjson", args.batch_size, print_progress
+                )
+                summary[kind] = report.model_dump(exclude={"errors"})
+    finally:
+        await engine.dispose()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, default=10_000)
+    parser.add_argument("--organizations", type=int, default=100_000)
+    parser.add_argument("--activity-roots", type=int, default=10, help="Корней дерева деятельности")
+    parser.add_argument("--activity-children", type=int, default=5, help="Потомков у узлов 1 и 2 уровня")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--output", help="Каталог для NDJSON-файлов вместо загрузки в БД")
+    args = parser.parse_args()
+    setup_logging()
+    if args.buildings < 1 or args.activity_roots < 1 or args.activity_children < 1:
+        parser.error("Нужно хотя бы одно здание и один вид деятельности на каждом уровне")
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    sys.exit(1 if any(isinstance(item, dict) and item.get("failed") for item in summary.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Массовый импорт зданий, видов деятельности и организаций из CSV/NDJSON.
+
+Файлы грузятся по одному виду данных; порядок: buildings, activities, organizations.
+Прогресс печатается в stderr после каждой порции, итоговый отчёт — JSON в stdout.
+
+Запуск (из каталога app):
+    python -m cli.import_data buildings data/buildings.csv
+    python -m cli.import_data organizations data/organizations.ndjson --batch-size 20000
+"""
+import argparse
+import asyncio
+import sys
+
+from core.log import setup_logging
+from db.database import engine
+from schemas.imports import ImportReportSchema
+from services.importer import IMPORT_FORMATS, IMPORT_SCHEMAS, DEFAULT_BATCH_SIZE, ImportService, iter_lines
+
+READ_CHUNK_SIZE = 1 << 20
+
+
+async def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+def print_progress(report: ImportReportSchema) -> None:
+    print(
+        f"{report.kind}: обработано {report.processed}, загружено {report.imported}, "
+        f"ошибок {report.failed}, {report.rows_per_second:.0f} строк/с",
+        file=sys.stderr,
+    )
+
+
+async def run(kind: str, path: str, fmt: str, batch_size: int) -> ImportReportSchema:
+    try:
+        return await ImportService().run(kind, iter_lines(read_chunks(path)), fmt, batch_size, print_progress)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=list(IMPORT_SCHEMAS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="По умолчанию — по расширению файла")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    setup_logging()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    report = asyncio.run(run(args.kind, args.path, fmt, args.batch_size))
+    print(report.model_dump_json(indent=2))
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
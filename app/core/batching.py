@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Склейка одновременных запросов по ключу в один (в духе DataLoader).
+
+    Ключи, запрошенные через load() в одном проходе event loop, копятся и отдаются
+    одним вызовом batch_fn(keys) -> {key: value}; отсутствующий в ответе ключ даёт None.
+    Одинаковые ключи запрашиваются один раз. Значения не кэшируются между пачками.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]], max_batch_size: int = 1000):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.keys_loaded = 0
+        self._pending: Dict[K, asyncio.Future] = {}
+        # Ссылки на запущенные пачки: event loop держит задачи слабо, без них пачку может собрать GC
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        # shield: отмена одного ожидающего (клиент отключился) не отменяет ключ для остальных
+        return await asyncio.shield(self._future(key))
+
+    def _future(self, key: K) -> asyncio.Future:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: Dict[K, asyncio.Future]) -> None:
+        self.batches += 1
+        self.keys_loaded += len(pending)
+        values: Optional[Dict[K, V]] = None
+        error: Optional[BaseException] = None
+        try:
+            values = await self.batch_fn(list(pending))
+        except Exception as e:
+            logger.error("Ошибка пакетной загрузки %s ключей: %s", len(pending), e)
+            error = e
+        except BaseException as e:
+            # Отмена пачки (CancelledError) и прочие BaseException пробрасываются дальше
+            error = e
+            raise
+        finally:
+            # Ни один ожидающий не должен зависнуть на future, который никто не разрешит
+            for key, future in pending.items():
+                if future.done():
+                    continue
+                if values is not None:
+                    future.set_result(values.get(key))
+                elif error is None or isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "keys": self.keys_loaded,
+            "avg_batch_size": round(self.keys_loaded / self.batches, 2) if self.batches else 0.0,
+        }
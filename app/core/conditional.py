@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.data_version import data_version
+from core.auth import api_key_auth
+from db.database import get_read_db
+from db.features import db_features
+
+
+async def conditional_get(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    _: None = Depends(api_key_auth),
+) -> None:
+    """
+    Условный GET по версии данных: если ETag клиента совпадает с текущим,
+    сразу отвечаем 304 — без запроса данных и без сериализации.
+
+    Версия читается в той же сессии, что и данные эндпоинта (get_read_db кэшируется
+    на запрос), — значит, с того же сервера, — и до них: с реплики, которая только
+    догоняет основную БД, ETag не может оказаться новее отданных данных.
+    Если версию прочитать нельзя (нет миграции 3b7e5a9c1d64, ошибка БД) —
+    ответ отдаётся без ETag и без условной обработки.
+    """
+    if not db_features.row_versions:
+        return
+    version = await data_version.get(db)
+    if version is None:
+        return
+    # Ключи кэша ответов включают версию — см. OrganizationService._cache_key
+    db.info["data_version"] = version
+    etag = data_version.etag(version)
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -4,9 +4,68 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Settings:
     DATABASE_URL = os.getenv("DATABASE_URL")
     API_KEY = os.getenv("API_KEY")
 
+    # Пул соединений. Суммарно на все воркеры (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers
+    # должно оставаться меньше max_connections в Postgres.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+    # Логирование SQL: false | true | debug (debug — ещё и строки результатов).
+    # echo пишет в stdout синхронно; через очередь логов — LOG_LEVELS=sqlalchemy.engine=INFO
+    DB_ECHO = os.getenv("DB_ECHO", "false").strip().lower()
+
+    # Реплики для чтения: URL через запятую. После записи чтения этого клиента (cookie last_write)
+    # READ_YOUR_WRITES_SECONDS секунд идут в основную БД, чтобы он видел свои изменения
+    # несмотря на лаг репликации. Время в cookie — часы серверов, их стоит синхронизировать (NTP).
+    READ_DATABASE_URLS = [url.strip() for url in os.getenv("READ_DATABASE_URLS", "").split(",") if url.strip()]
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "10"))
+
+    # Логирование (core/log.py): формат text | json, уровень корневого логгера,
+    # уровни отдельных логгеров ("repositories=WARNING,sqlalchemy.engine=INFO") и предел
+    # INFO/DEBUG-записей в секунду с одного места вызова (0 — без ограничения)
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "10"))
+
+    # Запросы дольше порога пишутся в лог медленных запросов (WARNING) с разбивкой по БД/сериализации
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+    # Режим гео-поиска: bbox | earthdistance (см. core/geo.py); earthdistance без расширения
+    # в БД при старте заменяется на bbox (db_features.geo_mode)
+    GEO_SEARCH_MODE = os.getenv("GEO_SEARCH_MODE", "bbox")
+
+    # Тайлы карты (/organizations/tiles/{z}/{x}/{y}): сетка кластеров grid x grid на тайл;
+    # с зума TILE_POINTS_MIN_ZOOM — отдельные точки, если их не больше TILE_MAX_POINTS.
+    # TILE_MAX_AGE_SECONDS > 0 разрешает клиенту держать тайл без перепроверки ETag
+    TILE_GRID_SIZE = int(os.getenv("TILE_GRID_SIZE", "8"))
+    TILE_POINTS_MIN_ZOOM = int(os.getenv("TILE_POINTS_MIN_ZOOM", "16"))
+    TILE_MAX_POINTS = int(os.getenv("TILE_MAX_POINTS", "500"))
+    TILE_MAX_AGE_SECONDS = int(os.getenv("TILE_MAX_AGE_SECONDS", "0"))
+
+    # Кэш ответов: memory | redis | none (см. cache/response.py)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Как часто сверять in-process кэши (дерево видов деятельности, индекс имён, кэш ответов)
+    # с версиями строк и сигналами data_versions — чтобы видеть импорт из CLI и записи других воркеров; 0 — не сверять
+    DATA_VERSION_POLL_SECONDS = float(os.getenv("DATA_VERSION_POLL_SECONDS", "5"))
+
 
 settings = Settings()
@@ -0,0 +1,122 @@
+import math
+from typing import List, Tuple
+
+from sqlalchemy import and_, or_, func, literal
+
+EARTH_RADIUS_KM = 6371.0
+# Половина длины экватора — максимальное расстояние между точками на сфере
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+# Длина одного градуса меридиана (км)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Режимы гео-поиска: "bbox" — прямоугольник по индексу (lat, lon) + точная формула,
+# "earthdistance" — GiST-индекс по ll_to_earth (нужны расширения cube и earthdistance)
+GEO_MODES = ("bbox", "earthdistance")
+
+
+def bounding_box(
+    lat: float, lon: float, radius_km: float
+) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Описанный вокруг круга прямоугольник: (lat_min, lat_max, [(lon_min, lon_max), ...]).
+    Диапазонов долготы два, если прямоугольник пересекает антимеридиан.
+    """
+    d_lat = radius_km / KM_PER_DEGREE
+    lat_min, lat_max = lat - d_lat, lat + d_lat
+    if lat_min <= -90 or lat_max >= 90:
+        # Круг накрывает полюс — по долготе ограничения нет
+        return max(lat_min, -90.0), min(lat_max, 90.0), [(-180.0, 180.0)]
+
+    d_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+    lon_min, lon_max = lon - d_lon, lon + d_lon
+    if lon_min < -180:
+        return lat_min, lat_max, [(lon_min + 360, 180.0), (-180.0, lon_max)]
+    if lon_max > 180:
+        return lat_min, lat_max, [(lon_min, 180.0), (-180.0, lon_max - 360)]
+    return lat_min, lat_max, [(lon_min, lon_max)]
+
+
+def distance_km(lat_col, lon_col, lat: float, lon: float):
+    """SQL-выражение расстояния по сферической теореме косинусов (км)"""
+    return EARTH_RADIUS_KM * func.acos(
+        # greatest/least держат аргумент acos в [-1, 1]: из-за погрешности float он может
+        # выйти за границы для совпадающих и почти диаметрально противоположных точек
+        func.greatest(
+            literal(-1.0),
+            func.least(
+                literal(1.0),
+                func.cos(func.radians(lat))
+                * func.cos(func.radians(lat_col))
+                * func.cos(func.radians(lon_col) - func.radians(lon))
+                + func.sin(func.radians(lat))
+                * func.sin(func.radians(lat_col)),
+            ),
+        )
+    )
+
+
+def bbox_condition(lat_col, lon_col, lat: float, lon: float, radius_km: float):
+    """Условие попадания в описанный прямоугольник — индексируемый префильтр"""
+    lat_min, lat_max, lon_ranges = bounding_box(lat, lon, radius_km)
+    return and_(
+        lat_col.between(lat_min, lat_max),
+        or_(*(lon_col.between(lo, hi) for lo, hi in lon_ranges)),
+    )
+
+
+def radius_condition(lat_col, lon_col, lat: float, lon: float, radius_km: float, mode: str = "bbox"):
+    """Условие «точка в радиусе radius_km от (lat, lon)» с индексируемым префильтром"""
+    if mode == "earthdistance":
+        center = func.ll_to_earth(lat, lon)
+        point = func.ll_to_earth(lat_col, lon_col)
+        radius_m = radius_km * 1000
+        return and_(
+            func.earth_box(center, radius_m).op("@>")(point),
+            func.earth_distance(center, point) <= radius_m,
+        )
+    return and_(
+        bbox_condition(lat_col, lon_col, lat, lon, radius_km),
+        distance_km(lat_col, lon_col, lat, lon) <= radius_km,
+    )
+
+
+def earth_point(lat_col, lon_col):
+    return func.ll_to_earth(lat_col, lon_col)
+
+
+def earth_distance_km(lat_col, lon_col, lat: float, lon: float):
+    """Расстояние через earthdistance (км) — для режима earthdistance"""
+    return func.earth_distance(earth_point(lat, lon), earth_point(lat_col, lon_col)) / 1000
+
+
+# Крайняя широта тайлов Web Mercator (EPSG:3857): квадратная карта мира
+MAX_TILE_LAT = math.degrees(math.atan(math.sinh(math.pi)))
+MAX_TILE_ZOOM = 22
+
+
+def tile_lat(y: float, n: int) -> float:
+    """Широта верхней границы ряда y тайлов при n = 2**z тайлов по стороне"""
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Границы тайла z/x/y (схема XYZ, y — сверху вниз): (lat_min, lat_max, lon_min, lon_max)"""
+    n = 2 ** z
+    return tile_lat(y + 1, n), tile_lat(y, n), x / n * 360 - 180, (x + 1) / n * 360 - 180
+
+
+def tile_cell(lat_col, lon_col, z: int, x: int, y: int, grid: int):
+    """
+    SQL-выражения (cx, cy) — ячейка сетки grid x grid внутри тайла z/x/y, в которую попадает точка.
+    Сетка равномерна в проекции Меркатора (как пиксели карты), поэтому по широте —
+    через ln(tan(pi/4 + lat/2)). Точки на правой/нижней границе тайла прижимаются к крайней ячейке.
+    """
+    cells = 2 ** z * grid
+    world_x = (lon_col + 180) / 360 * cells
+    mercator_y = func.ln(func.tan(func.pi() / 4 + func.radians(lat_col) / 2))
+    world_y = (1 - mercator_y / math.pi) / 2 * cells
+
+    def local(world, offset):
+        return func.least(grid - 1, func.greatest(0, func.floor(world) - offset))
+
+    return local(world_x, x * grid), local(world_y, y * grid)
@@ -0,0 +1,187 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Границы гистограмм в секундах
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Длина SQL-текста самого медленного запроса в логе медленных запросов
+MAX_STATEMENT_LENGTH = 300
+
+
+class RequestMetrics:
+    """
+    Метрики одного HTTP-запроса: SQL-запросы (число, суммарное время, самый медленный,
+    строки результата) и время сериализации ответа.
+    Запросы батч-загрузчика (core/batching.py) учитываются в запросе, запустившем порцию.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.rows = 0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.serialize_ms = 0.0
+
+    @property
+    def elapsed_ms(self) -> float:
+        return ((self.finished or time.perf_counter()) - self.started) * 1000
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    def observe_query(self, statement: str, elapsed_ms: float, rows: int) -> None:
+        self.queries += 1
+        self.db_ms += elapsed_ms
+        self.rows += rows
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing (длительности в мс)"""
+        return ", ".join((
+            f'db;dur={self.db_ms:.2f};desc="{self.queries} queries, {self.rows} rows"',
+            f"db-slowest;dur={self.slowest_ms:.2f}",
+            f"serialize;dur={self.serialize_ms:.2f}",
+            f"total;dur={self.elapsed_ms:.2f}",
+        ))
+
+    def slowest_statement_text(self) -> str:
+        statement = " ".join((self.slowest_statement or "").split())
+        if len(statement) > MAX_STATEMENT_LENGTH:
+            statement = statement[:MAX_STATEMENT_LENGTH] + "..."
+        return statement
+
+
+# Метрики текущего запроса; вне HTTP-запроса (lifespan, фоновые задачи) — None
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+@contextmanager
+def serialization_timer():
+    """Учесть время блока (валидация схемой + дамп в JSON) как сериализацию ответа"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request = current_request.get()
+        if request is not None:
+            request.serialize_ms += (time.perf_counter() - started) * 1000
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def lines(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = [
+            f"{name}_bucket{format_labels({**labels, 'le': str(bound)})} {count}"
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {self.count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{format_labels(labels)} {self.count}")
+        return lines
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def gauge_lines(name: str, stats: dict, **labels) -> List[str]:
+    """Числовые поля словаря статистики (stats() кэшей, пула и т.п.) как gauge name_<поле>"""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE {name}_{key} gauge")
+            lines.append(f"{name}_{key}{format_labels(labels)} {value}")
+    return lines
+
+
+class MetricsRegistry:
+    """
+    Счётчики процесса в формате Prometheus (text exposition 0.0.4).
+    Метка route — шаблон пути FastAPI (/organizations/{org_id}), а не сам путь,
+    чтобы число рядов не росло с числом id.
+    """
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.db_queries: Dict[str, int] = {}
+        self.db_seconds: Dict[str, float] = {}
+        self.db_rows: Dict[str, int] = {}
+        self.serialize_seconds: Dict[str, float] = {}
+        self.slow_requests: Dict[str, int] = {}
+        self.query_latency = Histogram()
+
+    def observe_query(self, elapsed_ms: float) -> None:
+        self.query_latency.observe(elapsed_ms / 1000)
+
+    def observe_request(self, method: str, route: str, status: int, request: RequestMetrics, slow: bool) -> None:
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.latency.setdefault(route, Histogram()).observe(request.elapsed_ms / 1000)
+        self.db_queries[route] = self.db_queries.get(route, 0) + request.queries
+        self.db_seconds[route] = self.db_seconds.get(route, 0.0) + request.db_ms / 1000
+        self.db_rows[route] = self.db_rows.get(route, 0) + request.rows
+        self.serialize_seconds[route] = self.serialize_seconds.get(route, 0.0) + request.serialize_ms / 1000
+        if slow:
+            self.slow_requests[route] = self.slow_requests.get(route, 0) + 1
+
+    def _counter(self, name: str, help_text: str, values: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in values)
+        return lines
+
+    def render(self) -> List[str]:
+        lines = self._counter(
+            "http_requests_total", "HTTP-запросы",
+            [({"method": method, "route": route, "status": status}, count)
+             for (method, route, status), count in sorted(self.requests.items())],
+        )
+        lines += ["# HELP http_request_duration_seconds Время обработки запроса",
+                  "# TYPE http_request_duration_seconds histogram"]
+        for route, histogram in sorted(self.latency.items()):
+            lines += histogram.lines("http_request_duration_seconds", {"route": route})
+        for name, help_text, values in (
+            ("http_request_db_queries_total", "SQL-запросы в HTTP-запросах", self.db_queries),
+            ("http_request_db_seconds_total", "Время SQL-запросов в HTTP-запросах", self.db_seconds),
+            ("http_request_db_rows_total", "Строки результатов SQL-запросов", self.db_rows),
+            ("http_request_serialize_seconds_total", "Время сериализации ответов", self.serialize_seconds),
+            ("http_slow_requests_total", "Запросы дольше SLOW_REQUEST_MS", self.slow_requests),
+        ):
+            lines += self._counter(
+                name, help_text,
+                [({"route": route}, round(value, 6)) for route, value in sorted(values.items())],
+            )
+        lines += ["# HELP db_query_duration_seconds Время выполнения SQL-запроса",
+                  "# TYPE db_query_duration_seconds histogram"]
+        lines += self.query_latency.lines("db_query_duration_seconds", {})
+        return lines
+
+
+metrics_registry = MetricsRegistry()
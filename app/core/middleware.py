@@ -0,0 +1,108 @@
+import logging
+import math
+import time
+
+from starlette.requests import cookie_parser
+
+from core.config import settings
+from core.metrics import RequestMetrics, current_request, metrics_registry
+from db.routing import LAST_WRITE_COOKIE, ClientWrites, current_client
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI-middleware метрик запроса: заводит RequestMetrics на время запроса,
+    добавляет заголовок Server-Timing, пишет счётчики для /metrics и лог медленных запросов.
+
+    Заголовок формируется в момент отправки статуса: для потоковых ответов (выгрузки)
+    в нём только то, что было до первого байта; счётчики учитывают запрос целиком.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        token = current_request.set(request)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", request.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            request.finish()
+            self._record(scope, status, request)
+
+    def _record(self, scope, status: int, request: RequestMetrics) -> None:
+        route = getattr(scope.get("route"), "path", "unmatched")
+        slow = request.elapsed_ms >= settings.SLOW_REQUEST_MS
+        metrics_registry.observe_request(scope["method"], route, status, request, slow)
+        if slow:
+            logger.warning(
+                "Медленный запрос %s %s: %.1f мс, статус %s, SQL-запросов %s (%.1f мс, строк %s), "
+                "сериализация %.1f мс, самый медленный SQL %.1f мс: %s",
+                scope["method"], scope["path"], request.elapsed_ms, status,
+                request.queries, request.db_ms, request.rows, request.serialize_ms,
+                request.slowest_ms, request.slowest_statement_text(),
+            )
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware окна read-your-writes: время последней записи клиента читается
+    из cookie в current_client, а если запрос что-то записал — возвращается в ответе.
+    Cookie живёт столько же, сколько окно, — дальше клиент снова читает с реплик.
+    """
+
+    def __init__(self, app, sticky_seconds: float):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.sticky_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        client = ClientWrites(self._last_write(scope))
+        token = current_client.set(client)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and client.written:
+                cookie = (
+                    f"{LAST_WRITE_COOKIE}={client.last_write:.3f}; "
+                    f"Max-Age={math.ceil(self.sticky_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_client.reset(token)
+
+    @staticmethod
+    def _last_write(scope) -> float:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                try:
+                    last_write = float(cookie_parser(value.decode("latin-1")).get(LAST_WRITE_COOKIE, 0))
+                except ValueError:
+                    return 0.0
+                # Время из будущего (чужие часы, подделка) не продлевает окно дальше текущего момента
+                return min(last_write, time.time()) if math.isfinite(last_write) else 0.0
+        return 0.0
@@ -0,0 +1,57 @@
+import base64
+import binascii
+import json
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from exceptions.exceptions import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+T = TypeVar("T")
+
+
+class Page(Generic[T]):
+    """Страница keyset-пагинации: элементы и курсор на следующую страницу"""
+
+    def __init__(self, items: Optional[List[T]] = None, next_cursor: Optional[str] = None):
+        self.items = items or []
+        self.next_cursor = next_cursor
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Непрозрачный курсор из значений ключа сортировки последней записи"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _matches(value: Any, expected: type) -> bool:
+    # bool — подкласс int, но в ключах сортировки не встречается; float-ключ принимает и целое
+    if isinstance(value, bool):
+        return False
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Значения ключа сортировки из курсора. types — ожидаемые типы значений по порядку:
+    курсор с другим числом или типами значений — InvalidCursor (400), а не ошибка БД.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor(cursor)
+    if not all(_matches(value, expected) for value, expected in zip(values, types)):
+        raise InvalidCursor(cursor)
+    return values
@@ -0,0 +1,16 @@
+from fastapi import Response
+
+
+class RawJSONResponse(Response):
+    """Ответ с уже сериализованным JSON: тело отдаётся как есть, без jsonable_encoder и response_model"""
+    media_type = "application/json"
+
+
+def raw_json(body: bytes, response: Response) -> RawJSONResponse:
+    """
+    Обернуть готовые JSON-байты в ответ. Заголовки, выставленные зависимостями
+    на response (ETag, Cache-Control), переносятся — FastAPI сам их не копирует,
+    если эндпоинт возвращает Response.
+    """
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return RawJSONResponse(body, headers=headers)
@@ -0,0 +1,8 @@
+from pydantic import ValidationError
+
+
+def validation_message(e: ValidationError) -> str:
+    """Ошибки валидации одной строкой: "поле: сообщение; ..." — для отчётов по элементам"""
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors()
+    )
@@ -1,10 +1,48 @@
+from contextlib import asynccontextmanager
+
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, class_mapper, declarative_base
 from core.config import settings
+from db.instrumentation import instrument
+from db.pool import InstrumentedQueuePool
+from db.routing import ReplicaRouter, RoutingSession
+
+
+def echo_level(value: str):
+    if value == "debug":
+        return "debug"
+    return value in ("1", "true", "yes", "on")
+
+
+def make_engine(url: str, **kwargs):
+    engine = create_async_engine(
+        url,
+        future=True,
+        echo=echo_level(settings.DB_ECHO),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+        json_deserializer=orjson.loads,
+        **kwargs,
+    )
+    instrument(engine)
+    return engine
 
 
 # Подключение к базе данных PostgreSQL
-engine = create_async_engine(settings.DATABASE_URL, future=True, echo=True)
+engine = make_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool)
+
+# Реплики для чтения (READ_DATABASE_URLS); без них все запросы идут в основную БД
+replica_router = ReplicaRouter(
+    engine,
+    [make_engine(url) for url in settings.READ_DATABASE_URLS],
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    health_check_seconds=settings.REPLICA_HEALTH_CHECK_SECONDS,
+)
 Base = declarative_base()
 
 # Асинхронная сессия
@@ -17,12 +55,43 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
+class ReadRoutingSession(RoutingSession):
+    router = replica_router
+
+
+# Асинхронная сессия для чтения: SELECT — в реплику, запись — в основную БД
+ReadSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=ReadRoutingSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
 # Асинхронная сессия
 async def get_db():
     async with AsyncSessionLocal() as db:
         yield db
 
 
+# Асинхронная сессия для read-only эндпоинтов
+async def get_read_db():
+    async with ReadSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def raw_connection():
+    """
+    asyncpg-соединение основной БД из пула engine — для COPY и прочих операций,
+    которых нет в SQLAlchemy. Транзакциями управляет вызывающий код.
+    """
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        yield raw.driver_connection
+
+
 class BaseModel(Base):
     __abstract__ = True
 
@@ -0,0 +1,55 @@
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.geo import GEO_MODES
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseFeatures:
+    """
+    Расширения PostgreSQL, установленные в базе, и объекты миграций, без которых
+    часть путей чтения недоступна (определяются при старте приложения)
+    """
+
+    def __init__(self):
+        self.trigram = False
+        self.earthdistance = False
+        self.documents = False
+        self.row_versions = False
+        # Фактический режим гео-поиска: GEO_SEARCH_MODE, если для него есть расширения
+        self.geo_mode = "bbox"
+
+    async def detect(self, db: AsyncSession) -> None:
+        if settings.GEO_SEARCH_MODE not in GEO_MODES:
+            raise ValueError(f"Неизвестный GEO_SEARCH_MODE: {settings.GEO_SEARCH_MODE}")
+        result = await db.execute(text("SELECT extname FROM pg_extension"))
+        extensions = set(result.scalars().all())
+        self.trigram = "pg_trgm" in extensions
+        self.earthdistance = "earthdistance" in extensions
+        logger.info("Расширения БД: pg_trgm=%s, earthdistance=%s", self.trigram, self.earthdistance)
+        self.geo_mode = settings.GEO_SEARCH_MODE
+        if self.geo_mode == "earthdistance" and not self.earthdistance:
+            logger.warning("GEO_SEARCH_MODE=earthdistance, но расширение earthdistance не установлено — режим bbox")
+            self.geo_mode = "bbox"
+        # Таблицу organization_documents создаёт и create_all, но наполняют её только
+        # триггеры миграции 8a4f2c6d9e13 — без них документы читать нельзя
+        result = await db.execute(text(
+            "SELECT count(*) FROM pg_trigger WHERE tgname = 'trg_organizations_document_insert'"
+        ))
+        self.documents = bool(result.scalar())
+        logger.info("Read-модель organization_documents: %s", self.documents)
+        # Версии строк по id транзакций (миграция 3b7e5a9c1d64): без них row_version — nextval,
+        # и коммит транзакции с меньшей версией не меняет max(row_version) — ETag давал бы 304
+        # на изменённые данные
+        result = await db.execute(text(
+            "SELECT count(*) FROM pg_proc WHERE proname = 'pending_row_versions'"
+        ))
+        self.row_versions = bool(result.scalar())
+        logger.info("Версии строк по id транзакций: %s", self.row_versions)
+
+
+db_features = DatabaseFeatures()
@@ -0,0 +1,39 @@
+import time
+
+from sqlalchemy import event
+
+from core.metrics import current_request, metrics_registry
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    metrics_registry.observe_query(elapsed_ms)
+    request = current_request.get()
+    if request is None:
+        return
+    # Для SELECT адаптер asyncpg отдаёт rowcount = -1, но к этому моменту все строки
+    # уже в буфере курсора; у серверного курсора (stream) буфера нет — строки не считаются
+    rows = cursor.rowcount
+    if rows < 0:
+        rows = len(getattr(cursor, "_rows", ()))
+    request.observe_query(statement, elapsed_ms, rows)
+
+
+def _handle_error(context):
+    # Упавший запрос не доходит до after_cursor_execute — снимаем его отметку времени.
+    # Отметка есть, только если before_cursor_execute успел выполниться; context.cursor
+    # для этого не годится — в части веток ошибок (сбой execute в aiosqlite) он не задан
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument(engine) -> None:
+    """Замер каждого SQL-запроса движка: в метрики процесса и текущего HTTP-запроса"""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
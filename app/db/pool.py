@@ -0,0 +1,61 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Метрики пула соединений: ожидание checkout, таймауты и заполненность"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.pool = None
+
+    def observe_wait(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        capacity = pool.size() + pool._max_overflow if pool is not None else 0
+        checked_out = pool.checkedout() if pool is not None else 0
+        return {
+            "pool_size": pool.size() if pool is not None else 0,
+            "max_overflow": pool._max_overflow if pool is not None else 0,
+            "checked_out": checked_out,
+            "saturation": round(checked_out / capacity, 4) if capacity > 0 else 0.0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, замеряющий время получения соединения из пула"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        pool_metrics.pool = self
+
+    def recreate(self):
+        pool = super().recreate()
+        pool_metrics.pool = pool
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.observe_wait((time.perf_counter() - started) * 1000)
@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import Delete, Insert, Update, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Cookie с временем последней записи клиента (unix time) — окно read-your-writes
+LAST_WRITE_COOKIE = "last_write"
+
+
+class ClientWrites:
+    """
+    Время последней записи клиента, текущего HTTP-запроса: приходит в cookie и
+    обновляется при записи (written — cookie нужно отдать в ответе).
+    """
+
+    def __init__(self, last_write: float = 0.0):
+        self.last_write = last_write
+        self.written = False
+
+
+# Клиент текущего запроса; вне HTTP-запроса (CLI, lifespan) — None
+current_client: ContextVar[Optional[ClientWrites]] = ContextVar("current_client", default=None)
+
+
+class ReplicaRouter:
+    """
+    Набор реплик для чтения: выбор по кругу среди живых, фоновая проверка здоровья
+    и окно read-your-writes после записи в основную БД. Окно — у каждого клиента своё
+    (cookie LAST_WRITE_COOKIE): запись одного клиента не уводит в основную БД чтения остальных.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: List[AsyncEngine],
+        sticky_seconds: float,
+        health_check_seconds: float,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.health_check_seconds = health_check_seconds
+        self.healthy = {id(replica): True for replica in replicas}
+        self._cycle = itertools.cycle(replicas) if replicas else None
+
+    def mark_write(self) -> None:
+        client = current_client.get()
+        if client is not None:
+            client.last_write = time.time()
+            client.written = True
+
+    def in_sticky_window(self) -> bool:
+        client = current_client.get()
+        return client is not None and time.time() - client.last_write < self.sticky_seconds
+
+    def choose(self) -> AsyncEngine:
+        """Следующая живая реплика; основная БД, если живых нет или идёт окно read-your-writes"""
+        if not self.replicas or self.in_sticky_window():
+            return self.primary
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if self.healthy[id(replica)]:
+                return replica
+        return self.primary
+
+    @staticmethod
+    async def _ping(replica: AsyncEngine) -> None:
+        async with replica.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                # Таймаут и на подключение: зависшая реплика часто не отвечает уже на connect
+                await asyncio.wait_for(self._ping(replica), self.health_check_seconds)
+                healthy = True
+            except Exception as e:
+                healthy = False
+                logger.warning("Реплика %s недоступна: %s", replica.url.host, e)
+            if healthy != self.healthy[id(replica)]:
+                logger.info("Реплика %s: %s", replica.url.host, "доступна" if healthy else "исключена")
+            self.healthy[id(replica)] = healthy
+
+    async def run_health_checks(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.health_check_seconds)
+
+    def stats(self) -> list:
+        return [
+            {"host": replica.url.host, "healthy": self.healthy[id(replica)]}
+            for replica in self.replicas
+        ]
+
+
+class RoutingSession(Session):
+    """
+    Sync-сессия для AsyncSession(sync_session_class=RoutingSession).
+    SELECT идут в реплику, выбранную один раз на сессию; flush и INSERT/UPDATE/DELETE —
+    в основную БД, после чего сессия до конца остаётся на основной.
+    """
+
+    router: Optional[ReplicaRouter] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["primary"] = True
+            self.router.mark_write()
+        return self.read_engine().sync_engine
+
+    def read_engine(self) -> AsyncEngine:
+        """Сервер, с которого читает сессия: реплика выбирается при первом обращении"""
+        if self.info.get("primary"):
+            return self.router.primary
+        if "replica" not in self.info:
+            self.info["replica"] = self.router.choose()
+        return self.info["replica"]
+
+
+def read_engine(db: AsyncSession) -> AsyncEngine:
+    """
+    Сервер, с которого читает сессия запроса, — чтобы вспомогательные сессии (например,
+    пачки BatchLoader) читали с него же, а не с другой реплики с другим отставанием
+    """
+    if isinstance(db.sync_session, RoutingSession):
+        return db.sync_session.read_engine()
+    return db.bind
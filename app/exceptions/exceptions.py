@@ -23,3 +23,13 @@ class ActivityNotFound(AppException):
 class DatabaseError(AppException):
     def __init__(self, message: str):
         super().__init__(f"Ошибка базы данных: {message}", status_code=500)
+
+
+class InvalidCursor(AppException):
+    def __init__(self, cursor: str):
+        super().__init__(f"Некорректный курсор пагинации: {cursor}", status_code=400)
+
+
+class ExportFormatUnavailable(AppException):
+    def __init__(self, fmt: str):
+        super().__init__(f"Формат выгрузки {fmt} недоступен: на сервере не установлен pyarrow", status_code=501)
@@ -1,12 +1,22 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from api import organization
-from db.database import engine
+from api import organization, stats, imports, export, metrics
+from core.log import setup_logging
+from core.config import settings
+from core.middleware import ReadYourWritesMiddleware, RequestMetricsMiddleware
+from db.database import engine, AsyncSessionLocal, replica_router
+from db.features import db_features
+from cache.activity_tree import activity_tree_cache
+from cache.invalidation import data_version_watcher
+from cache.name_index import organization_name_index
 from models import building
 from exceptions.exceptions import AppException
 
+setup_logging()
+
 
 async def init_db():
     async with engine.begin() as conn:
@@ -16,7 +26,22 @@ async def init_db():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    async with AsyncSessionLocal() as db:
+        await db_features.detect(db)
+        watch = db_features.row_versions and settings.DATA_VERSION_POLL_SECONDS > 0
+        # Граница версий — до загрузки кэшей: изменения, которых загрузка не увидела, будут выше неё
+        if watch:
+            await data_version_watcher.start(db)
+        await activity_tree_cache.load(db)
+        await organization_name_index.load(db)
+    background = []
+    if replica_router.replicas:
+        background.append(asyncio.create_task(replica_router.run_health_checks()))
+    if watch:
+        background.append(asyncio.create_task(data_version_watcher.run()))
     yield
+    for task in background:
+        task.cancel()
 
 
 app = FastAPI(
@@ -36,6 +61,13 @@ API для работы с организациями и зданиями.
 )
 
 app.include_router(organization.router)
+app.include_router(stats.router)
+app.include_router(imports.router)
+app.include_router(export.router)
+app.include_router(metrics.router)
+
+app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.READ_YOUR_WRITES_SECONDS)
+app.add_middleware(RequestMetricsMiddleware)
 
 
 @app.exception_handler(AppException)
@@ -2,9 +2,13 @@ from typing import List, Optional
 from sqlalchemy import String, Integer, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db.database import BaseModel
+from models.tracking import ChangeTracked
 
+# Максимальная вложенность дерева видов деятельности
+MAX_ACTIVITY_DEPTH = 3
 
-class Activity(BaseModel):
+
+class Activity(BaseModel, ChangeTracked):
     __tablename__ = "activities"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -24,10 +28,12 @@ class Activity(BaseModel):
         passive_deletes=True,
     )
 
+    # Обратная связь не грузится автоматически: иначе каждая загрузка
+    # Organization.activities тянет все организации этих видов деятельности
     organizations: Mapped[List["Organization"]] = relationship(
         secondary="organization_activity",
         back_populates="activities",
-        lazy="selectin",
+        lazy="raise",
     )
 
     __table_args__ = (
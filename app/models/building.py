@@ -2,11 +2,12 @@ from typing import List
 from sqlalchemy import Integer, Text, Float, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db.database import BaseModel
+from models.tracking import ChangeTracked
 
 from models.organization import Organization
 
 
-class Building(BaseModel):
+class Building(BaseModel, ChangeTracked):
     __tablename__ = "buildings"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -1,7 +1,10 @@
+from datetime import datetime
 from typing import List
-from sqlalchemy import String, Integer, ForeignKey, UniqueConstraint, Index, Boolean, Column, Table
+from sqlalchemy import String, Integer, ForeignKey, UniqueConstraint, Index, Boolean, Column, Table, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db.database import BaseModel
+from models.tracking import ChangeTracked
 
 from models.activity import Activity
 
@@ -14,7 +17,7 @@ organization_activity = Table(
 )
 
 
-class Organization(BaseModel):
+class Organization(BaseModel, ChangeTracked):
     __tablename__ = "organizations"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -23,15 +26,19 @@ class Organization(BaseModel):
     building_id: Mapped[int] = mapped_column(
         ForeignKey("buildings.id", ondelete="RESTRICT"), nullable=False
     )
+    # Стратегии загрузки связей — ровно то, что сериализует OrganizationSchema:
+    # здание одним JOIN, телефоны и виды деятельности — по одному selectin-запросу на пачку
     building: Mapped["Building"] = relationship(
         back_populates="organizations",
         lazy="joined",
     )
 
+    # Порядок телефонов и видов деятельности — тот же, что у лёгкого пути (LEAN_COLUMNS)
+    # и read-модели organization_documents: ответ не зависит от того, каким путём собран
     phones: Mapped[List["OrganizationPhone"]] = relationship(
         back_populates="organization",
         cascade="all, delete-orphan",
-        order_by="OrganizationPhone.position",
+        order_by="[OrganizationPhone.position, OrganizationPhone.id]",
         passive_deletes=True,
         lazy="selectin",
     )
@@ -39,19 +46,23 @@ class Organization(BaseModel):
     activities: Mapped[List["Activity"]] = relationship(
         secondary=organization_activity,
         back_populates="organizations",
+        order_by="Activity.id",
         lazy="selectin",
     )
 
     __table_args__ = (
         UniqueConstraint("name", "building_id", name="uq_organizations_name_building"),
         Index("ix_organizations_name", "name"),
+        # Ключи keyset-пагинации (name, id), в том числе внутри здания
+        Index("ix_organizations_name_id", "name", "id"),
+        Index("ix_organizations_building_name_id", "building_id", "name", "id"),
     )
 
     def __repr__(self) -> str:
         return f"Organization(id={self.id!r}, name={self.name!r})"
 
 
-class OrganizationPhone(BaseModel):
+class OrganizationPhone(BaseModel, ChangeTracked):
     __tablename__ = "organization_phones"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -71,3 +82,20 @@ class OrganizationPhone(BaseModel):
 
     def __repr__(self) -> str:
         return f"OrganizationPhone(id={self.id!r}, phone={self.phone!r})"
+
+
+class OrganizationDocument(BaseModel):
+    """
+    Read-модель: документ организации в форме OrganizationSchema (JSONB), одна строка на организацию.
+    Пишется только триггерами БД (миграция 8a4f2c6d9e13_organization_documents).
+    """
+    __tablename__ = "organization_documents"
+
+    organization_id: Mapped[int] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    document: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"OrganizationDocument(organization_id={self.organization_id!r})"
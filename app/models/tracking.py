@@ -0,0 +1,52 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, FetchedValue, Integer, Sequence, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from db.database import BaseModel
+
+# Общая для всех таблиц последовательность версий изменений
+data_change_seq = Sequence("data_change_seq", metadata=BaseModel.metadata)
+
+
+class ChangeTracked:
+    """
+    Колонки для инкрементального экспорта: версия и время последнего изменения строки.
+    Значения выставляет триггер БД при вставке и обновлении: версия — id пишущей транзакции
+    со сдвигом (миграция 3b7e5a9c1d64_commit_safe_row_versions), default из data_change_seq
+    остаётся только для таблиц, созданных create_all без миграций.
+    """
+    row_version: Mapped[int] = mapped_column(
+        BigInteger, server_default=data_change_seq.next_value(), server_onupdate=FetchedValue(),
+        nullable=False, index=True,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue(), nullable=False,
+    )
+
+
+class DeletedRow(BaseModel):
+    """Надгробия удалённых строк отслеживаемых таблиц (пишет триггер на DELETE)"""
+    __tablename__ = "deleted_rows"
+
+    id: Mapped[int] = mapped_column(BigInteger, server_default=data_change_seq.next_value(), primary_key=True)
+    row_version: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    table_name: Mapped[str] = mapped_column(Text, nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"DeletedRow(table_name={self.table_name!r}, row_id={self.row_id!r})"
+
+
+class TableVersion(BaseModel):
+    """
+    Счётчики-сигналы приложения (imports — завершённый массовый импорт); меняются редко,
+    поэтому блокировка строки при увеличении никого не задерживает.
+    """
+    __tablename__ = "data_versions"
+
+    table_name: Mapped[str] = mapped_column(Text, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"TableVersion(table_name={self.table_name!r}, version={self.version!r})"
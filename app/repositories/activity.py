@@ -1,34 +1,147 @@
 import logging
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import select, func, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from repositories.base import BaseRepository
-from app.models.activity import Activity
+from models.activity import Activity, MAX_ACTIVITY_DEPTH
+from cache.activity_tree import activity_tree_cache
 
 logger = logging.getLogger(__name__)
 
 
+def activity_subtree_cte(root_activity_id: int, max_depth: int = MAX_ACTIVITY_DEPTH):
+    """
+    Рекурсивный CTE (WITH RECURSIVE) с id вида деятельности и всех его потомков
+    не глубже max_depth уровней. Всё дерево разворачивается одним запросом.
+    """
+    tree = (
+        select(Activity.id, literal_column("0").label("depth"))
+        .where(Activity.id == root_activity_id)
+        .cte("activity_subtree", recursive=True)
+    )
+    return tree.union_all(
+        select(Activity.id, tree.c.depth + 1)
+        .join(tree, Activity.parent_id == tree.c.id)
+        .where(tree.c.depth < max_depth)
+    )
+
+
+def activity_ancestors_cte(activity_id: int, max_depth: int = MAX_ACTIVITY_DEPTH):
+    """
+    Рекурсивный CTE с цепочкой предков вида деятельности (включая его самого).
+    Глубина ограничена max_depth + 1, чтобы зацикленные данные не повесили запрос.
+    """
+    chain = (
+        select(Activity.id, Activity.parent_id, literal_column("1").label("level"))
+        .where(Activity.id == activity_id)
+        .cte("activity_ancestors", recursive=True)
+    )
+    return chain.union_all(
+        select(Activity.id, Activity.parent_id, chain.c.level + 1)
+        .join(chain, Activity.id == chain.c.parent_id)
+        .where(chain.c.level <= max_depth)
+    )
+
+
 class ActivityRepository(BaseRepository[Activity]):
     def __init__(self):
         super().__init__(Activity)
 
+    async def _on_write_many(self, written: List[Tuple[int, Optional[Activity]]]) -> None:
+        if written:
+            activity_tree_cache.invalidate()
+        await super()._on_write_many(written)
+
+    async def create_many(
+        self, db: AsyncSession, rows: List[Dict[str, Any]]
+    ) -> List[Tuple[Optional[Activity], Optional[str]]]:
+        """create_many с проверкой вложенности: родитель должен уже существовать, глубина — не больше 3"""
+        results: List[Tuple[Optional[Activity], Optional[str]]] = [(None, None)] * len(rows)
+        valid = []
+        for index, row in enumerate(rows):
+            parent_id = row.get("parent_id")
+            level = 1
+            if parent_id is not None:
+                parent_level = await self.get_depth(db, parent_id)
+                if parent_level is None:
+                    results[index] = (None, f"Родительский вид деятельности id={parent_id} не найден")
+                    continue
+                level = parent_level + 1
+            if level > MAX_ACTIVITY_DEPTH:
+                results[index] = (None, "Максимальная вложенность видов деятельности — 3 уровня")
+                continue
+            valid.append(index)
+        created = await super().create_many(db, [rows[index] for index in valid])
+        for index, result in zip(valid, created):
+            results[index] = result
+        return results
+
+    async def get_subtree_ids(self, db: AsyncSession, root_activity_id: int) -> FrozenSet[int]:
+        """
+        Id вида деятельности и всех вложенных в него: из кэша дерева, а для узла,
+        которого в кэше ещё нет (создан другим процессом), — рекурсивным CTE.
+        """
+        ids = await activity_tree_cache.get_subtree_ids(db, root_activity_id)
+        if ids is not None:
+            return ids
+        result = await db.execute(select(activity_subtree_cte(root_activity_id).c.id))
+        ids = frozenset(result.scalars().all())
+        if ids:
+            activity_tree_cache.invalidate()
+        return ids or frozenset((root_activity_id,))
+
+    async def get_depth(self, db: AsyncSession, activity_id: int) -> Optional[int]:
+        """Уровень вложенности вида деятельности (1 — корень), None если не найден"""
+        depth = await activity_tree_cache.get_depth(db, activity_id)
+        if depth is not None:
+            return depth
+        # Кэш мог отстать от БД: проверяем по цепочке предков
+        chain = activity_ancestors_cte(activity_id)
+        result = await db.execute(select(func.max(chain.c.level)))
+        depth = result.scalar()
+        if depth is not None:
+            activity_tree_cache.invalidate()
+        return depth
+
+    async def _level_of(self, db: AsyncSession, activity: Activity) -> int:
+        """
+        Уровень новой Activity. Несохранённые предки (id ещё нет) проходятся по цепочке
+        parent в памяти, уровень первого сохранённого — по кэшу дерева.
+        """
+        level = 1
+        node = activity
+        while level <= MAX_ACTIVITY_DEPTH:
+            parent_id = node.parent_id
+            if parent_id is None and node.parent is not None:
+                if node.parent.id is None:
+                    node = node.parent
+                    level += 1
+                    continue
+                parent_id = node.parent.id
+            if parent_id is None:
+                return level
+            parent_level = await self.get_depth(db, parent_id)
+            if parent_level is None:
+                raise ValueError(f"Родительский вид деятельности id={parent_id} не найден")
+            return level + parent_level
+        return level
+
     async def create_with_level_check(self, db: AsyncSession, activity: Activity) -> Activity:
         """
         Создать Activity с проверкой уровня вложенности (максимум 3).
         """
         try:
-            # Проверяем глубину вложенности
-            level = 1
-            parent = activity.parent
-            while parent:
-                level += 1
-                if level > 3:
-                    raise ValueError("Максимальная вложенность видов деятельности — 3 уровня")
-                parent = parent.parent
+            level = await self._level_of(db, activity)
+            if level > MAX_ACTIVITY_DEPTH:
+                raise ValueError("Максимальная вложенность видов деятельности — 3 уровня")
 
             db.add(activity)
             await db.commit()
             await db.refresh(activity)
+            await self._on_write(activity.id, activity)
 
             logger.info("Создана Activity id=%s name='%s'", activity.id, activity.name)
             return activity
@@ -1,18 +1,26 @@
 import logging
-from typing import List, Optional, Type, TypeVar, Generic
-from sqlalchemy import select, update, delete
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, Generic
+from sqlalchemy import select, insert, update, delete, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+
+from core.pagination import Page, DEFAULT_PAGE_SIZE, clamp_limit, encode_cursor, decode_cursor
+from cache.response import response_cache, entity_tag, LIST_TAG
+from db.database import replica_router
 
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 # Универсальный generic для моделей
 T = TypeVar("T")
 
+NOT_FOUND = "Объект не найден"
+
+
+def db_error_message(e: SQLAlchemyError) -> str:
+    """Короткое описание ошибки БД для ответа клиенту — без SQL и параметров"""
+    return str(getattr(e, "orig", None) or e).splitlines()[0]
+
 
 class BaseRepository(Generic[T]):
     """Базовый класс с CRUD методами"""
@@ -20,18 +28,66 @@ class BaseRepository(Generic[T]):
     def __init__(self, model: Type[T]):
         self.model = model
 
-    async def get_all(self, db: AsyncSession) -> List[T]:
+    def _select(self):
+        """Базовый SELECT модели; наследники добавляют свои опции загрузки связей"""
+        return select(self.model)
+
+    async def _on_write(self, obj_id: int, obj: Optional[T] = None) -> None:
+        await self._on_write_many([(obj_id, obj)])
+
+    async def _on_write_many(self, written: List[Tuple[int, Optional[T]]]) -> None:
+        """
+        Хук после успешной записи — для сброса и обновления кэшей; наследники переопределяют его.
+        written — пары (id, объект), объект — созданный/обновлённый, None при удалении.
+        Из кэша ответов вытесняются все записи с этими объектами и все списки,
+        чтения на время окна read-your-writes уходят в основную БД. Для пачки всё это
+        делается один раз. Версию данных (ETag) меняют триггеры БД (row_version).
+        """
+        if not written:
+            return
+        replica_router.mark_write()
+        tags = [entity_tag(self.model.__tablename__, obj_id) for obj_id, _ in written]
+        await response_cache.evict_tags(tags + [LIST_TAG])
+
+    def _keyset(self) -> tuple:
+        """Колонки ключа сортировки (sort_key, id) для keyset-пагинации; последняя — уникальная"""
+        return (self.model.id,)
+
+    def _paginate(self, stmt, limit: int, cursor: Optional[str]):
+        """
+        Добавить к запросу keyset-условие, сортировку и LIMIT.
+        Берётся limit + 1 строк, чтобы понять, есть ли следующая страница.
+        """
+        keys = self._keyset()
+        if cursor is not None:
+            values = decode_cursor(cursor, [key.type.python_type for key in keys])
+            stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+        return stmt.order_by(*keys).limit(limit + 1)
+
+    def _to_page(self, rows: Sequence[T], limit: int) -> Page[T]:
+        items = list(rows[:limit])
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor([getattr(last, key.key) for key in self._keyset()])
+        return Page(items, next_cursor)
+
+    async def get_all(
+        self, db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> Page[T]:
+        limit = clamp_limit(limit)
         try:
-            result = await db.execute(select(self.model))
-            return result.scalars().all()
+            result = await db.execute(self._paginate(self._select(), limit, cursor))
+            return self._to_page(result.scalars().all(), limit)
         except SQLAlchemyError as e:
+            # Не пустая страница: клиент не должен принять сбой БД за конец списка
             logger.error("Ошибка при получении всех объектов %s: %s", self.model.__name__, e)
-            return []
+            raise
 
     async def get_by_id(self, db: AsyncSession, obj_id: int) -> Optional[T]:
         try:
             result = await db.execute(
-                select(self.model).where(self.model.id == obj_id)
+                self._select().where(self.model.id == obj_id)
             )
             return result.scalars().first()
         except SQLAlchemyError as e:
@@ -44,6 +100,7 @@ class BaseRepository(Generic[T]):
             db.add(obj)
             await db.commit()
             await db.refresh(obj)
+            await self._on_write(obj.id, obj)
             logger.info("Создан объект %s id=%s", self.model.__name__, obj.id)
             return obj
         except SQLAlchemyError as e:
@@ -62,6 +119,7 @@ class BaseRepository(Generic[T]):
             await db.commit()
             obj = result.scalars().first()
             if obj:
+                await self._on_write(obj_id, obj)
                 logger.info("Обновлён объект %s id=%s", self.model.__name__, obj_id)
             return obj
         except SQLAlchemyError as e:
@@ -78,6 +136,7 @@ class BaseRepository(Generic[T]):
             await db.commit()
             deleted_id = result.scalar()
             if deleted_id:
+                await self._on_write(deleted_id)
                 logger.info("Удалён объект %s id=%s", self.model.__name__, deleted_id)
                 return True
             return False
@@ -86,3 +145,135 @@ class BaseRepository(Generic[T]):
             logger.error("Ошибка при удалении объекта %s id=%s: %s",
                          self.model.__name__, obj_id, e)
             return False
+
+    async def _one_by_one(self, db: AsyncSession, statements: list) -> List[Tuple[Any, Optional[str]]]:
+        """
+        Выполнить операторы по одному, каждый в своём SAVEPOINT: ошибка одного
+        не откатывает остальные. Медленный путь — только когда пачка целиком не прошла.
+        """
+        results = []
+        for stmt in statements:
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(stmt)
+                    results.append((result.scalars().first(), None))
+            except DBAPIError as e:
+                results.append((None, db_error_message(e)))
+        return results
+
+    async def create_many(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Tuple[Optional[T], Optional[str]]]:
+        """
+        Создать объекты одной транзакцией: один INSERT ... RETURNING на всю пачку.
+        Если он падает (например, нарушена уникальность в одной строке), пачка повторяется
+        построчно в SAVEPOINT-ах — остальные строки всё равно создаются.
+        Результат — (объект, ошибка) в порядке rows.
+        """
+        if not rows:
+            return []
+        try:
+            try:
+                result = await db.execute(
+                    insert(self.model).returning(self.model, sort_by_parameter_order=True), rows
+                )
+                results = [(obj, None) for obj in result.scalars().all()]
+            except DBAPIError:
+                await db.rollback()
+                results = await self._one_by_one(
+                    db, [insert(self.model).values(**row).returning(self.model) for row in rows]
+                )
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Ошибка при создании пачки объектов %s: %s", self.model.__name__, e)
+            return [(None, db_error_message(e))] * len(rows)
+        await self._on_write_many([(obj.id, obj) for obj, _ in results if obj is not None])
+        logger.info("Создано объектов %s: %s из %s", self.model.__name__,
+                    sum(obj is not None for obj, _ in results), len(rows))
+        return results
+
+    async def update_many(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Tuple[Optional[T], Optional[str]]]:
+        """
+        Обновить объекты одной транзакцией: каждая строка — {"id": ..., поля...}.
+        Существующие id выбираются одним запросом, UPDATE по первичному ключу
+        уходит одним executemany, обновлённые объекты читаются ещё одним запросом.
+        При ошибке пачки — построчный повтор в SAVEPOINT-ах, как в create_many.
+        """
+        if not rows:
+            return []
+        ids = [row["id"] for row in rows]
+        errors: Dict[int, str] = {}
+        try:
+            result = await db.execute(select(self.model.id).where(self.model.id.in_(ids)))
+            existing = set(result.scalars().all())
+            found = [row for row in rows if row["id"] in existing]
+            try:
+                if found:
+                    await db.execute(update(self.model), found)
+            except DBAPIError:
+                await db.rollback()
+                for row, (_, error) in zip(found, await self._one_by_one(db, [
+                    update(self.model).where(self.model.id == row["id"])
+                    .values(**{k: v for k, v in row.items() if k != "id"}).returning(self.model.id)
+                    for row in found
+                ])):
+                    if error is not None:
+                        errors[row["id"]] = error
+            result = await db.execute(
+                self._select().where(self.model.id.in_(existing)).execution_options(populate_existing=True)
+            )
+            objects = {obj.id: obj for obj in result.scalars().all()}
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Ошибка при обновлении пачки объектов %s: %s", self.model.__name__, e)
+            return [(None, db_error_message(e))] * len(rows)
+
+        results = []
+        for obj_id in ids:
+            if obj_id not in existing:
+                results.append((None, NOT_FOUND))
+            elif obj_id in errors:
+                results.append((None, errors[obj_id]))
+            else:
+                results.append((objects.get(obj_id), None))
+        await self._on_write_many([(obj.id, obj) for obj, _ in results if obj is not None])
+        logger.info("Обновлено объектов %s: %s из %s", self.model.__name__,
+                    sum(obj is not None for obj, _ in results), len(rows))
+        return results
+
+    async def delete_many(self, db: AsyncSession, ids: List[int]) -> List[Optional[str]]:
+        """
+        Удалить объекты одной транзакцией: DELETE ... WHERE id IN (...) RETURNING id.
+        Если пачка не проходит (например, на объект ссылаются), удаление повторяется
+        по одному в SAVEPOINT-ах. Результат — ошибка или None для каждого id.
+        """
+        if not ids:
+            return []
+        errors: Dict[int, str] = {}
+        try:
+            try:
+                result = await db.execute(
+                    delete(self.model).where(self.model.id.in_(ids)).returning(self.model.id)
+                )
+                deleted = set(result.scalars().all())
+            except DBAPIError:
+                await db.rollback()
+                unique_ids = list(dict.fromkeys(ids))
+                deleted = set()
+                for obj_id, (deleted_id, error) in zip(unique_ids, await self._one_by_one(db, [
+                    delete(self.model).where(self.model.id == obj_id).returning(self.model.id)
+                    for obj_id in unique_ids
+                ])):
+                    if error is not None:
+                        errors[obj_id] = error
+                    elif deleted_id is not None:
+                        deleted.add(deleted_id)
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Ошибка при удалении пачки объектов %s: %s", self.model.__name__, e)
+            return [db_error_message(e)] * len(ids)
+
+        await self._on_write_many([(obj_id, None) for obj_id in deleted])
+        logger.info("Удалено объектов %s: %s из %s", self.model.__name__, len(deleted), len(ids))
+        return [None if obj_id in deleted else errors.get(obj_id, NOT_FOUND) for obj_id in ids]
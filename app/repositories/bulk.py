@@ -0,0 +1,103 @@
+import logging
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from schemas.imports import ActivityImportSchema, BuildingImportSchema, OrganizationImportSchema
+
+logger = logging.getLogger(__name__)
+
+
+class BulkImportRepository:
+    """
+    Массовая загрузка через asyncpg: COPY во временную таблицу и
+    INSERT ... SELECT ... ON CONFLICT (id) DO UPDATE в целевую.
+
+    Методы принимают asyncpg-соединение (db.database.raw_connection) внутри
+    открытой вызывающим кодом транзакции. Имена таблиц и колонок — константы кода.
+    """
+
+    async def _copy_upsert(
+        self, conn, table: str, columns: Sequence[str], records: List[tuple]
+    ) -> int:
+        stage = f"import_{table}"
+        await conn.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        # Порция может грузиться частями в одной транзакции (точки сохранения) —
+        # строки прошлой части ещё лежат в staging-таблице
+        await conn.execute(f"TRUNCATE {stage}")
+        await conn.copy_records_to_table(stage, records=records, columns=columns)
+        column_list = ", ".join(columns)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "id")
+        await conn.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        )
+        return len(records)
+
+    async def existing_ids(self, conn, table: str, ids: Iterable[int]) -> Set[int]:
+        rows = await conn.fetch(f"SELECT id FROM {table} WHERE id = ANY($1::int[])", list(ids))
+        return {row["id"] for row in rows}
+
+    async def activity_parents(self, conn) -> Dict[int, int]:
+        """Всё дерево видов деятельности: id -> parent_id (таблица маленькая)"""
+        rows = await conn.fetch("SELECT id, parent_id FROM activities")
+        return {row["id"]: row["parent_id"] for row in rows}
+
+    async def organization_ids_by_key(
+        self, conn, keys: Iterable[Tuple[str, int]]
+    ) -> Dict[Tuple[str, int], int]:
+        """Существующие организации по уникальному ключу (name, building_id)"""
+        keys = list(keys)
+        rows = await conn.fetch(
+            "SELECT o.id, o.name, o.building_id FROM organizations o "
+            "JOIN unnest($1::text[], $2::int[]) AS k(name, building_id) USING (name, building_id)",
+            [name for name, _ in keys], [building_id for _, building_id in keys],
+        )
+        return {(row["name"], row["building_id"]): row["id"] for row in rows}
+
+    async def upsert_buildings(self, conn, rows: List[BuildingImportSchema]) -> int:
+        return await self._copy_upsert(
+            conn, "buildings", ("id", "address", "latitude", "longitude"),
+            [(row.id, row.address, row.latitude, row.longitude) for row in rows],
+        )
+
+    async def upsert_activities(self, conn, rows: List[ActivityImportSchema]) -> int:
+        # Ссылки на родителей внутри одного INSERT проверяются в конце оператора,
+        # поэтому родитель и потомок могут прийти в одной порции
+        return await self._copy_upsert(
+            conn, "activities", ("id", "name", "parent_id"),
+            [(row.id, row.name, row.parent_id) for row in rows],
+        )
+
+    async def upsert_organizations(self, conn, rows: List[OrganizationImportSchema]) -> int:
+        """Организации целиком: телефоны и виды деятельности заменяются на переданные"""
+        await self._copy_upsert(
+            conn, "organizations", ("id", "name", "building_id"),
+            [(row.id, row.name, row.building_id) for row in rows],
+        )
+        ids = [row.id for row in rows]
+        await conn.execute("DELETE FROM organization_phones WHERE organization_id = ANY($1::int[])", ids)
+        await conn.execute("DELETE FROM organization_activity WHERE organization_id = ANY($1::int[])", ids)
+        await conn.copy_records_to_table(
+            "organization_phones",
+            records=[
+                (row.id, phone, position, position == 0)
+                for row in rows for position, phone in enumerate(row.phones)
+            ],
+            columns=("organization_id", "phone", "position", "is_primary"),
+        )
+        await conn.copy_records_to_table(
+            "organization_activity",
+            records=[(row.id, activity_id) for row in rows for activity_id in row.activity_ids],
+            columns=("organization_id", "activity_id"),
+        )
+        return len(rows)
+
+    async def max_id(self, conn, table: str) -> int:
+        return await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+
+    async def sync_sequence(self, conn, table: str) -> None:
+        """После загрузки с явными id сдвинуть serial-последовательность за максимальный id"""
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        )
@@ -0,0 +1,45 @@
+import logging
+from typing import AsyncIterator, List, Tuple
+
+from sqlalchemy import Integer, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.organization import Organization, OrganizationDocument
+
+logger = logging.getLogger(__name__)
+
+CHECK_PARTITION_SIZE = 10_000
+
+
+class OrganizationDocumentRepository:
+    """
+    Сверка read-модели organization_documents с нормализованными таблицами.
+    Эталон — SQL-функция organization_document(id), которой пользуются и триггеры.
+    """
+
+    async def stream_mismatches(
+        self, db: AsyncSession, partition_size: int = CHECK_PARTITION_SIZE
+    ) -> AsyncIterator[List[Tuple[int, bool]]]:
+        """(id, документа нет) для организаций, чей документ отсутствует или устарел"""
+        stmt = (
+            select(Organization.id, OrganizationDocument.organization_id.is_(None).label("missing"))
+            .outerjoin(OrganizationDocument, OrganizationDocument.organization_id == Organization.id)
+            .where(OrganizationDocument.document.is_distinct_from(func.organization_document(Organization.id)))
+            .order_by(Organization.id)
+            .execution_options(yield_per=partition_size)
+        )
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield [(row.id, row.missing) for row in partition]
+
+    async def count(self, db: AsyncSession) -> Tuple[int, int]:
+        """(организаций, документов)"""
+        organizations = (await db.execute(select(func.count()).select_from(Organization))).scalar_one()
+        documents = (await db.execute(select(func.count()).select_from(OrganizationDocument))).scalar_one()
+        return organizations, documents
+
+    async def refresh(self, db: AsyncSession, ids: List[int]) -> None:
+        """Пересобрать документы организаций тем же путём, что и триггеры"""
+        await db.execute(select(func.refresh_organization_documents(literal(list(ids), ARRAY(Integer)))))
+        logger.info("Пересобрано %s документов организаций", len(ids))
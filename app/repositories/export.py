@@ -0,0 +1,146 @@
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import Integer, func, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.data_version import VERSIONED_MODELS, data_version
+from db.features import db_features
+from models.activity import Activity
+from models.building import Building
+from models.organization import Organization, OrganizationPhone, organization_activity
+from models.tracking import DeletedRow
+from repositories.organization import OrganizationRepository
+from schemas.organization import OrganizationFilters
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 10_000
+
+# Виды деятельности организации списком id — тот же порядок, что и в выгрузке связей
+ACTIVITY_IDS = func.array(
+    select(organization_activity.c.activity_id)
+    .where(organization_activity.c.organization_id == Organization.id)
+    .order_by(organization_activity.c.activity_id)
+    .scalar_subquery(),
+    type_=ARRAY(Integer),
+)
+
+# Колонки наборов данных; из их типов строится схема Arrow/Parquet
+EXPORT_COLUMNS = {
+    "organizations": (
+        Organization.id, Organization.name, Organization.building_id,
+        ACTIVITY_IDS.label("activity_ids"), Organization.row_version, Organization.updated_at,
+    ),
+    "buildings": (
+        Building.id, Building.address, Building.latitude, Building.longitude,
+        Building.row_version, Building.updated_at,
+    ),
+    "phones": (
+        OrganizationPhone.id, OrganizationPhone.organization_id, OrganizationPhone.phone,
+        OrganizationPhone.position, OrganizationPhone.is_primary,
+        OrganizationPhone.row_version, OrganizationPhone.updated_at,
+    ),
+    "activities": (
+        Activity.id, Activity.name, Activity.parent_id, Activity.row_version, Activity.updated_at,
+    ),
+    # Надгробия удалённых строк — для инкрементальной выгрузки
+    "deletions": (
+        DeletedRow.table_name, DeletedRow.row_id, DeletedRow.row_version, DeletedRow.deleted_at,
+    ),
+}
+EXPORT_DATASETS = tuple(EXPORT_COLUMNS)
+
+
+def export_columns(dataset: str):
+    """Колонки набора данных (имя, тип, nullable) в порядке выгрузки"""
+    return list(select(*EXPORT_COLUMNS[dataset]).selected_columns)
+
+
+class ExportRepository:
+    """
+    Чтение наборов данных для выгрузки: Core-запросы без ORM-объектов, серверный курсор,
+    порции по batch_size строк. Порядок — по row_version, чтобы инкрементальная
+    выгрузка (since_version) читалась по индексу ix_<table>_row_version.
+    Выгрузка ограничена сверху версией until_version (X-Export-Version): строки новее
+    попадут в следующую выгрузку, а не в обе.
+    """
+
+    def __init__(self):
+        self.organizations = OrganizationRepository()
+
+    async def _filtered(self, db: AsyncSession, filters: OrganizationFilters, column):
+        """Подзапрос: колонка организаций, прошедших фильтры"""
+        return await self.organizations._apply_filters(db, select(column), filters)
+
+    async def _select(
+        self,
+        db: AsyncSession,
+        dataset: str,
+        filters: OrganizationFilters,
+        since_version: Optional[int],
+        until_version: Optional[int],
+        since: Optional[datetime],
+    ):
+        columns = EXPORT_COLUMNS[dataset]
+        table = columns[0].table
+        stmt = select(*columns)
+        # Фильтры списка организаций сужают организации, их телефоны и здания;
+        # дерево видов деятельности и надгробия выгружаются целиком
+        if filters.model_dump(exclude_none=True):
+            if dataset == "organizations":
+                stmt = await self.organizations._apply_filters(db, stmt, filters)
+            elif dataset == "phones":
+                organization_ids = await self._filtered(db, filters, Organization.id)
+                stmt = stmt.where(OrganizationPhone.organization_id.in_(organization_ids))
+            elif dataset == "buildings":
+                building_ids = await self._filtered(db, filters, Organization.building_id)
+                stmt = stmt.where(Building.id.in_(building_ids))
+        changed_at = table.c.deleted_at if dataset == "deletions" else table.c.updated_at
+        if since_version is not None:
+            stmt = stmt.where(table.c.row_version > since_version)
+        if until_version is not None:
+            stmt = stmt.where(table.c.row_version <= until_version)
+        if since is not None:
+            stmt = stmt.where(changed_at > since)
+        return stmt.order_by(table.c.row_version)
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        dataset: str,
+        filters: OrganizationFilters,
+        since_version: Optional[int] = None,
+        until_version: Optional[int] = None,
+        since: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[List[tuple]]:
+        """Строки набора данных порциями через серверный курсор; в памяти — одна порция"""
+        stmt = await self._select(db, dataset, filters, since_version, until_version, since)
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        total = 0
+        async for partition in result.partitions():
+            total += len(partition)
+            yield partition
+        logger.info("Выгружено %s строк набора %s", total, dataset)
+
+    async def current_version(self, db: AsyncSession) -> int:
+        """
+        Граница выгрузки — значение since_version для следующей инкрементальной выгрузки.
+
+        Не max(row_version): транзакция с меньшей версией может зафиксироваться позже,
+        и её строки оказались бы ниже уже выданной границы — следующая выгрузка их
+        пропустила бы. committed_row_version() (миграция 3b7e5a9c1d64) — версия, до которой
+        все транзакции завершены: строк с версией не больше неё уже не появится.
+        Без миграции безопасной границы нет — граница, как и раньше, наибольшая версия.
+        """
+        if db_features.row_versions:
+            return await data_version.committed(db)
+        # max() по каждому индексу ix_<table>_row_version — пять чтений края индекса
+        versions = union_all(
+            *(select(func.max(model.row_version).label("version")) for model in VERSIONED_MODELS)
+        ).subquery()
+        stmt = select(func.coalesce(func.max(versions.c.version), 0))
+        return (await db.execute(stmt)).scalar_one()
@@ -1,58 +1,204 @@
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Integer, any_, literal, select, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, JSON, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from repositories.base import BaseRepository
+from repositories.activity import activity_subtree_cte
+from core.pagination import Page, DEFAULT_PAGE_SIZE, clamp_limit, encode_cursor, decode_cursor
+from core.geo import (
+    MAX_DISTANCE_KM, distance_km, earth_distance_km, earth_point, radius_condition, tile_cell
+)
+from cache.activity_tree import activity_tree_cache
+from db.features import db_features
+from cache.name_index import organization_name_index
 
 from models.activity import Activity
 from models.building import Building
-from models.organization import Organization
+from models.organization import Organization, OrganizationDocument, OrganizationPhone, organization_activity
+from schemas.organization import OrganizationFilters
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
+# Колонки "лёгкого" пути: документ организации в форме OrganizationSchema собирается
+# в SQL (json_build_object/json_agg) и приходит Core-строкой, без ORM-объектов.
+# Подзапросы коррелируют только с organizations, поэтому не конфликтуют с join зданий в фильтрах.
+EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+
+
+def json_object(**fields):
+    """json_build_object с ключами-литералами (не bind-параметрами) — SQL не меняется от запроса к запросу"""
+    args = []
+    for key, value in fields.items():
+        args += [literal_column(f"'{key}'"), value]
+    return func.json_build_object(*args, type_=JSON)
+
+
+def json_list(item, *order_by):
+    """json_agg(item ORDER BY ...) с пустым массивом вместо NULL"""
+    return func.coalesce(func.json_agg(aggregate_order_by(item, *order_by)), EMPTY_JSON_ARRAY, type_=JSON)
+
+
+LEAN_COLUMNS = (
+    Organization.id,
+    Organization.name,
+    select(json_object(
+        id=Building.id, address=Building.address, latitude=Building.latitude, longitude=Building.longitude,
+    ))
+    .where(Building.id == Organization.building_id)
+    .correlate(Organization)
+    .scalar_subquery()
+    .label("building"),
+    select(json_list(
+        json_object(
+            id=OrganizationPhone.id, phone=OrganizationPhone.phone,
+            position=OrganizationPhone.position, is_primary=OrganizationPhone.is_primary,
+        ),
+        OrganizationPhone.position, OrganizationPhone.id,
+    ))
+    .where(OrganizationPhone.organization_id == Organization.id)
+    .correlate(Organization)
+    .scalar_subquery()
+    .label("phones"),
+    select(json_list(
+        json_object(id=Activity.id, name=Activity.name, parent_id=Activity.parent_id),
+        Activity.id,
+    ))
+    .select_from(organization_activity.join(Activity, Activity.id == organization_activity.c.activity_id))
+    .where(organization_activity.c.organization_id == Organization.id)
+    .correlate(Organization)
+    .scalar_subquery()
+    .label("activities"),
+)
+LEAN_KEYS = tuple(column.key for column in LEAN_COLUMNS)
+
+# То же из read-модели: готовый документ вместо трёх подзапросов (если есть триггеры, см. db_features)
+DOCUMENT_COLUMNS = (Organization.id, Organization.name, OrganizationDocument.document)
+
+
+def lean_item(row) -> dict:
+    if "document" in row._fields:
+        return row.document
+    return {key: getattr(row, key) for key in LEAN_KEYS}
+
+
+# Размер порции при потоковом чтении через серверный курсор
+STREAM_PARTITION_SIZE = 500
+
+# Начальный радиус (км) и множитель расширения при поиске ближайших организаций
+NEAREST_START_RADIUS_KM = 1.0
+NEAREST_RADIUS_GROWTH = 4
+
+
 class OrganizationRepository(BaseRepository[Organization]):
     def __init__(self):
         super().__init__(Organization)
 
-    async def get_by_building(
-        self, db: AsyncSession, building_id: int
-    ) -> List[Organization]:
-        try:
-            result = await db.execute(
-                select(Organization)
-                .where(Organization.building_id == building_id)
-                .options(selectinload(Organization.activities), selectinload(Organization.phones))
+    def _keyset(self) -> tuple:
+        return (Organization.name, Organization.id)
+
+    def _lean_select(self):
+        """Колонки лёгкого пути: документ из organization_documents или сборка в SQL"""
+        if db_features.documents:
+            return select(*DOCUMENT_COLUMNS).join(
+                OrganizationDocument, OrganizationDocument.organization_id == Organization.id
             )
-            orgs = result.scalars().all()
-            logger.info("Найдено %s организаций в здании id=%s", len(orgs), building_id)
-            return orgs
-        except SQLAlchemyError as e:
-            logger.error("Ошибка при получении организаций по building_id=%s: %s", building_id, e)
-            return []
+        return select(*LEAN_COLUMNS)
 
-    async def get_by_activity(
-        self, db: AsyncSession, activity_id: int
-    ) -> List[Organization]:
+    async def _on_write_many(self, written: List[Tuple[int, Optional[Organization]]]) -> None:
+        for obj_id, obj in written:
+            if obj is None:
+                organization_name_index.remove(obj_id)
+            else:
+                organization_name_index.upsert(obj_id, obj.name)
+        await super()._on_write_many(written)
+
+    def suggest_by_name(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Автодополнение по префиксу имени из in-memory индекса (без запроса в БД)"""
+        return organization_name_index.suggest(prefix, limit)
+
+    async def _apply_filters(self, db: AsyncSession, stmt, filters: OrganizationFilters):
+        """
+        Добавить к запросу условия всех заданных фильтров (AND) — один SQL-запрос,
+        планировщик сам выбирает самый селективный индекс.
+        """
+        if filters.building_id is not None:
+            stmt = stmt.where(Organization.building_id == filters.building_id)
+        if filters.activity_id is not None:
+            stmt = stmt.where(Organization.activities.any(Activity.id == filters.activity_id))
+        if filters.root_activity_id is not None:
+            activity_ids = await activity_tree_cache.get_subtree_ids(db, filters.root_activity_id)
+            if activity_ids is None:
+                # Узла нет в кэше (создан другим процессом) — поддерево рекурсивным CTE в том же запросе
+                activity_ids = select(activity_subtree_cte(filters.root_activity_id).c.id)
+            stmt = stmt.where(Organization.activities.any(Activity.id.in_(activity_ids)))
+        if filters.name is not None:
+            stmt = stmt.where(Organization.name.ilike(f"%{filters.name}%"))
+        if filters.has_geo:
+            stmt = stmt.join(Organization.building)
+        if filters.has_radius:
+            stmt = stmt.where(
+                radius_condition(
+                    Building.latitude, Building.longitude,
+                    filters.lat, filters.lon, filters.radius_km, db_features.geo_mode,
+                )
+            )
+        if filters.has_rectangle:
+            stmt = stmt.where(
+                Building.latitude.between(filters.lat_min, filters.lat_max),
+                Building.longitude.between(filters.lon_min, filters.lon_max),
+            )
+        return stmt
+
+    async def search(
+        self, db: AsyncSession, filters: OrganizationFilters,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, lean: bool = False,
+    ) -> Page:
+        """
+        Список организаций по любой комбинации фильтров.
+        При поиске по имени и наличии pg_trgm результаты сортируются по релевантности
+        (GIN-индекс ix_organizations_name_trgm), иначе — по (name, id).
+
+        lean=True — вместо ORM-объектов словари в форме OrganizationSchema (LEAN_COLUMNS):
+        без identity map, догрузки связей и последующей валидации схемой.
+        """
+        limit = clamp_limit(limit)
         try:
-            result = await db.execute(
-                select(Organization)
-                .join(Organization.activities)
-                .where(Activity.id == activity_id)
+            stmt = self._lean_select() if lean else self._select()
+            stmt = await self._apply_filters(db, stmt, filters)
+            if filters.name is not None and db_features.trigram:
+                page = await self._search_by_name_ranked(db, stmt, filters.name, limit, cursor)
+                page.items = [lean_item(row) if lean else row[0] for row in page.items]
+            else:
+                result = await db.execute(self._paginate(stmt, limit, cursor))
+                page = self._to_page(result.all() if lean else result.scalars().all(), limit)
+                if lean:
+                    page.items = [lean_item(row) for row in page.items]
+            logger.info(
+                "Найдено %s организаций по фильтрам %s",
+                len(page.items), filters
             )
-            orgs = result.scalars().all()
-            logger.info("Найдено %s организаций по activity_id=%s", len(orgs), activity_id)
-            return orgs
+            return page
         except SQLAlchemyError as e:
-            logger.error("Ошибка при получении организаций по activity_id=%s: %s", activity_id, e)
-            return []
+            logger.error("Ошибка при поиске организаций по фильтрам %s: %s",
+                         filters, e)
+            raise
+
+    async def get_by_building(
+        self, db: AsyncSession, building_id: int,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> Page[Organization]:
+        return await self.search(db, OrganizationFilters(building_id=building_id), limit, cursor)
+
+    async def get_by_activity(
+        self, db: AsyncSession, activity_id: int,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> Page[Organization]:
+        return await self.search(db, OrganizationFilters(activity_id=activity_id), limit, cursor)
 
     async def get_in_rectangle(
         self,
@@ -61,69 +207,116 @@ class OrganizationRepository(BaseRepository[Organization]):
         lat_max: float,
         lon_min: float,
         lon_max: float,
-    ) -> List[Organization]:
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Page[Organization]:
+        filters = OrganizationFilters(lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max)
+        return await self.search(db, filters, limit, cursor)
+
+    async def get_in_radius(
+        self, db: AsyncSession, lat: float, lon: float, radius_km: float,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> Page[Organization]:
+        filters = OrganizationFilters(lat=lat, lon=lon, radius_km=radius_km)
+        return await self.search(db, filters, limit, cursor)
+
+    async def get_nearest(
+        self, db: AsyncSession, lat: float, lon: float, k: int
+    ) -> List[Tuple[Organization, float]]:
+        """
+        k ближайших к точке организаций с расстояниями (км), по возрастанию расстояния.
+
+        В режиме earthdistance сортировка идёт оператором <-> по GiST-индексу (KNN).
+        Иначе радиус поиска расширяется, пока внутри круга не наберётся k организаций:
+        каждая попытка использует префильтр по индексу (latitude, longitude),
+        а полная сортировка по расстоянию ни разу не выполняется по всей таблице.
+        Попытки выбирают только id и расстояние — телефоны и виды деятельности
+        загружаются один раз, для итоговых k организаций (не на каждой попытке).
+        """
         try:
-            result = await db.execute(
-                select(Organization)
-                .join(Organization.building)
-                .where(
-                    (Building.latitude >= lat_min)
-                    & (Building.latitude <= lat_max)
-                    & (Building.longitude >= lon_min)
-                    & (Building.longitude <= lon_max)
+            if db_features.geo_mode == "earthdistance":
+                distance = earth_distance_km(Building.latitude, Building.longitude, lat, lon)
+                result = await db.execute(
+                    self._select()
+                    .join(Organization.building)
+                    .add_columns(distance.label("distance_km"))
+                    .order_by(earth_point(Building.latitude, Building.longitude).op("<->")(earth_point(lat, lon)))
+                    .limit(k)
                 )
-            )
-            orgs = result.scalars().all()
-            logger.info(
-                "Найдено %s организаций в прямоугольнике [%s,%s]x[%s,%s]",
-                len(orgs), lat_min, lat_max, lon_min, lon_max
-            )
-            return orgs
+                rows = [(org, dist) for org, dist in result.all()]
+            else:
+                distance = distance_km(Building.latitude, Building.longitude, lat, lon)
+                radius_km = NEAREST_START_RADIUS_KM
+                while True:
+                    stmt = (
+                        select(Organization.id, distance.label("distance_km"))
+                        .join(Organization.building)
+                        .order_by(distance, Organization.id)
+                        .limit(k)
+                    )
+                    if radius_km < MAX_DISTANCE_KM:
+                        stmt = stmt.where(
+                            radius_condition(Building.latitude, Building.longitude, lat, lon, radius_km)
+                        )
+                    found = (await db.execute(stmt)).all()
+                    if len(found) >= k or radius_km >= MAX_DISTANCE_KM:
+                        break
+                    radius_km *= NEAREST_RADIUS_GROWTH
+                orgs = {org.id: org for org in await self.get_many_by_ids(db, [org_id for org_id, _ in found])}
+                rows = [(orgs[org_id], dist) for org_id, dist in found if org_id in orgs]
+            logger.info("Найдено %s ближайших организаций к точке (%s, %s)", len(rows), lat, lon)
+            return rows
         except SQLAlchemyError as e:
-            logger.error("Ошибка при поиске организаций в прямоугольнике: %s", e)
-            return []
+            logger.error("Ошибка при поиске ближайших организаций к точке (%s, %s): %s", lat, lon, e)
+            raise
 
-    async def get_in_radius(
-        self, db: AsyncSession, lat: float, lon: float, radius_km: float
-    ) -> List[Organization]:
+    async def get_tile_clusters(
+        self, db: AsyncSession, filters: OrganizationFilters, z: int, x: int, y: int, grid: int
+    ) -> List[dict]:
+        """
+        Кластеры тайла z/x/y: GROUP BY по ячейке сетки grid x grid (core.geo.tile_cell),
+        по каждой — число организаций и средние координаты их зданий. filters должны
+        содержать прямоугольник тайла: он отбирает здания по индексу (latitude, longitude).
+        """
         try:
-            earth_radius = 6371  # км
-            result = await db.execute(
-                select(Organization)
-                .join(Organization.building)
-                .where(
-                    earth_radius
-                    * func.acos(
-                        func.cos(func.radians(lat))
-                        * func.cos(func.radians(Building.latitude))
-                        * func.cos(func.radians(Building.longitude) - func.radians(lon))
-                        + func.sin(func.radians(lat))
-                        * func.sin(func.radians(Building.latitude))
-                    )
-                    <= radius_km
-                )
-            )
-            orgs = result.scalars().all()
-            logger.info(
-                "Найдено %s организаций в радиусе %s км от точки (%s, %s)",
-                len(orgs), radius_km, lat, lon
+            cx, cy = tile_cell(Building.latitude, Building.longitude, z, x, y, grid)
+            stmt = select(
+                func.count(Organization.id), func.avg(Building.latitude), func.avg(Building.longitude)
+            ).select_from(Organization)
+            stmt = await self._apply_filters(db, stmt, filters)
+            result = await db.execute(stmt.group_by(cx, cy))
+            clusters = [
+                {"count": count, "latitude": round(lat, 6), "longitude": round(lon, 6)}
+                for count, lat, lon in result.all()
+            ]
+            logger.info("Тайл %s/%s/%s: %s кластеров по фильтрам %s", z, x, y, len(clusters), filters)
+            return clusters
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при кластеризации тайла %s/%s/%s: %s", z, x, y, e)
+            raise
+
+    async def get_tile_points(
+        self, db: AsyncSession, filters: OrganizationFilters, limit: int
+    ) -> List[dict]:
+        """Организации тайла отдельными точками, не больше limit (по id)"""
+        try:
+            stmt = select(
+                Organization.id, Organization.name, Organization.building_id,
+                Building.latitude, Building.longitude,
             )
-            return orgs
+            stmt = await self._apply_filters(db, stmt, filters)
+            result = await db.execute(stmt.order_by(Organization.id).limit(limit))
+            return [dict(row._mapping) for row in result.all()]
         except SQLAlchemyError as e:
-            logger.error("Ошибка при поиске организаций в радиусе: %s", e)
-            return []
+            logger.error("Ошибка при получении точек тайла по фильтрам %s: %s", filters, e)
+            raise
 
     async def get_detailed_by_id(
         self, db: AsyncSession, org_id: int
     ) -> Optional[Organization]:
         try:
             result = await db.execute(
-                select(Organization)
-                .options(
-                    selectinload(Organization.building),
-                    selectinload(Organization.phones),
-                    selectinload(Organization.activities),
-                )
+                self._select()
                 .where(Organization.id == org_id)
             )
             org = result.scalars().first()
@@ -136,49 +329,93 @@ class OrganizationRepository(BaseRepository[Organization]):
             logger.error("Ошибка при получении организации id=%s: %s", org_id, e)
             return None
 
-    async def search_by_name(self, db: AsyncSession, name: str) -> List[Organization]:
+    async def get_many_by_ids(self, db: AsyncSession, ids: List[int]) -> List[Organization]:
+        """
+        Организации по списку id одним запросом WHERE id = ANY($1): один параметр-массив,
+        поэтому текст запроса не зависит от числа id. Порядок не гарантируется.
+        """
+        if not ids:
+            return []
         try:
             result = await db.execute(
-                select(Organization).where(Organization.name.ilike(f"%{name}%"))
+                self._select().where(Organization.id == any_(literal(list(ids), ARRAY(Integer))))
             )
             orgs = result.scalars().all()
-            logger.info("Найдено %s организаций по имени '%s'", len(orgs), name)
-            return orgs
+            logger.info("Получено %s организаций по %s id", len(orgs), len(ids))
+            return list(orgs)
         except SQLAlchemyError as e:
-            logger.error("Ошибка при поиске организаций по имени '%s': %s", name, e)
-            return []
+            logger.error("Ошибка при получении организаций по списку id: %s", e)
+            raise
 
-    async def search_by_activity_tree(
-        self, db: AsyncSession, root_activity_id: int
-    ) -> List[Organization]:
+    async def get_documents_by_ids(self, db: AsyncSession, ids: List[int]) -> Dict[int, dict]:
+        """
+        Документы организаций (форма OrganizationSchema) из read-модели по первичному ключу,
+        без join нормализованных таблиц. Только при db_features.documents.
+        """
+        if not ids:
+            return {}
         try:
-            async def get_children_ids(act_id: int, level: int = 1) -> List[int]:
-                if level > 3:
-                    return []
-                result = await db.execute(
-                    select(Activity).where(Activity.parent_id == act_id)
-                )
-                children = result.scalars().all()
-                ids = [c.id for c in children]
-                for child in children:
-                    ids.extend(await get_children_ids(child.id, level + 1))
-                return ids
-
-            activity_ids = [root_activity_id] + await get_children_ids(root_activity_id)
-
             result = await db.execute(
-                select(Organization)
-                .join(Organization.activities)
-                .where(Activity.id.in_(activity_ids))
-                .distinct()
+                select(OrganizationDocument.organization_id, OrganizationDocument.document)
+                .where(OrganizationDocument.organization_id == any_(literal(list(ids), ARRAY(Integer))))
             )
-            orgs = result.scalars().all()
-            logger.info(
-                "Найдено %s организаций по дереву activity_id=%s (вкл. вложенные)",
-                len(orgs), root_activity_id
-            )
-            return orgs
+            documents = dict(result.all())
+            logger.info("Получено %s документов организаций по %s id", len(documents), len(ids))
+            return documents
         except SQLAlchemyError as e:
-            logger.error("Ошибка при поиске организаций по дереву activity_id=%s: %s",
-                         root_activity_id, e)
-            return []
+            logger.error("Ошибка при получении документов организаций по списку id: %s", e)
+            raise
+
+    async def search_by_name(
+        self, db: AsyncSession, name: str,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> Page[Organization]:
+        return await self.search(db, OrganizationFilters(name=name), limit, cursor)
+
+    async def _search_by_name_ranked(
+        self, db: AsyncSession, stmt, name: str, limit: int, cursor: Optional[str]
+    ) -> Page:
+        """
+        Страница строк по убыванию similarity; курсор — (rank, id) последней строки.
+        К колонкам stmt добавляются rank и rank_id.
+        """
+        rank = 1 - func.similarity(Organization.name, name)
+        keys = (rank, Organization.id)
+        if cursor is not None:
+            stmt = stmt.where(tuple_(*keys) > tuple_(*decode_cursor(cursor, (float, int))))
+        result = await db.execute(
+            stmt.add_columns(rank.label("rank"), Organization.id.label("rank_id"))
+            .order_by(*keys).limit(limit + 1)
+        )
+        rows = result.all()
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor([last.rank, last.rank_id])
+        return Page(rows[:limit], next_cursor)
+
+    async def search_by_activity_tree(
+        self, db: AsyncSession, root_activity_id: int,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> Page[Organization]:
+        return await self.search(db, OrganizationFilters(root_activity_id=root_activity_id), limit, cursor)
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        filters: OrganizationFilters,
+        partition_size: int = STREAM_PARTITION_SIZE,
+    ) -> AsyncIterator[List[Organization]]:
+        """
+        Потоковое чтение организаций порциями по partition_size через серверный курсор.
+        В памяти одновременно держится только одна порция.
+        """
+        stmt = await self._apply_filters(db, self._select(), filters)
+        stmt = stmt.order_by(*self._keyset()).execution_options(yield_per=partition_size)
+
+        result = await db.stream(stmt)
+        total = 0
+        async for partition in result.scalars().partitions():
+            total += len(partition)
+            yield partition
+        logger.info("Выгружено потоком %s организаций", total)
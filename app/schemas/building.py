@@ -1,11 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class BuildingSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     address: str
     latitude: float
     longitude: float
-
-    class Config:
-        orm_mode = True
\ No newline at end of file
@@ -0,0 +1,66 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+
+
+def split_list(value):
+    """В CSV списки передаются одной ячейкой через ';' (например, "2-222-222;3-333-333")"""
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(";") if item.strip()]
+    return value
+
+
+def empty_to_none(value):
+    return None if value == "" else value
+
+
+class BuildingImportSchema(BaseModel):
+    id: int
+    address: str = Field(min_length=1)
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+
+
+class ActivityImportSchema(BaseModel):
+    id: int
+    name: str = Field(min_length=1, max_length=255)
+    parent_id: Optional[int] = None
+
+    _parent_id = field_validator("parent_id", mode="before")(empty_to_none)
+
+
+class OrganizationImportSchema(BaseModel):
+    id: int
+    name: str = Field(min_length=1, max_length=255)
+    building_id: int
+    phones: List[str] = []
+    activity_ids: List[int] = []
+
+    _lists = field_validator("phones", "activity_ids", mode="before")(split_list)
+
+    @field_validator("phones")
+    @classmethod
+    def unique_phones(cls, phones: List[str]) -> List[str]:
+        if any(len(phone) > 64 for phone in phones):
+            raise ValueError("Телефон длиннее 64 символов")
+        return list(dict.fromkeys(phones))
+
+    @field_validator("activity_ids")
+    @classmethod
+    def unique_activities(cls, activity_ids: List[int]) -> List[int]:
+        return list(dict.fromkeys(activity_ids))
+
+
+class ImportErrorSchema(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReportSchema(BaseModel):
+    """Итог импорта: processed — прочитано строк, imported — загружено, failed — отклонено"""
+    kind: str
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportErrorSchema] = []
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
@@ -1,26 +1,162 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
 
 from schemas.building import BuildingSchema
 from schemas.activity import ActivitySchema
 
 
 class OrganizationPhoneSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     phone: str
     position: int
     is_primary: bool
 
-    class Config:
-        orm_mode = True
-
 
 class OrganizationSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     building: BuildingSchema
     phones: List[OrganizationPhoneSchema] = []
     activities: List[ActivitySchema] = []
 
-    class Config:
-        orm_mode = True
+
+class OrganizationPageSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    items: List[OrganizationSchema] = []
+    next_cursor: Optional[str] = None
+
+
+class NearestOrganizationSchema(BaseModel):
+    organization: OrganizationSchema
+    distance_km: float
+
+
+class OrganizationSuggestionSchema(BaseModel):
+    id: int
+    name: str
+
+
+class TileClusterSchema(BaseModel):
+    """Ячейка сетки тайла: число организаций и центроид их зданий"""
+    count: int
+    latitude: float
+    longitude: float
+
+
+class TilePointSchema(BaseModel):
+    id: int
+    name: str
+    building_id: int
+    latitude: float
+    longitude: float
+
+
+class TileSchema(BaseModel):
+    """Тайл карты z/x/y: либо кластеры, либо (на крупных зумах) отдельные точки"""
+    z: int
+    x: int
+    y: int
+    clusters: List[TileClusterSchema] = []
+    points: List[TilePointSchema] = []
+
+
+# Максимум элементов в одном batch-запросе
+MAX_BATCH_SIZE = 1000
+
+
+class OrganizationCreateSchema(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    building_id: int
+
+
+class OrganizationUpdateSchema(BaseModel):
+    id: int
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    building_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def has_changes(self):
+        if self.name is None and self.building_id is None:
+            raise ValueError("Нужно передать хотя бы одно поле: name или building_id")
+        return self
+
+
+class BatchRequestSchema(BaseModel):
+    """Элементы валидируются по одному в сервисе: ошибка в одном не отклоняет весь запрос"""
+    items: List[Dict[str, Any]] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchIdsSchema(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class OrganizationBatchGetSchema(BaseModel):
+    items: List[OrganizationSchema] = []
+    missing: List[int] = []
+
+
+class BatchItemResultSchema(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchResultSchema(BaseModel):
+    succeeded: int = 0
+    failed: int = 0
+    results: List[BatchItemResultSchema] = []
+
+
+# Валидация и сериализация списков одним вызовом pydantic-core, без модели-обёртки
+organization_list_adapter = TypeAdapter(List[OrganizationSchema])
+nearest_list_adapter = TypeAdapter(List[NearestOrganizationSchema])
+
+
+class OrganizationFilters(BaseModel):
+    """Фильтры списка организаций; все заданные фильтры объединяются через AND"""
+    building_id: Optional[int] = None
+    activity_id: Optional[int] = None
+    root_activity_id: Optional[int] = None
+    name: Optional[str] = None
+
+    # радиус
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius_km: Optional[float] = None
+
+    # прямоугольник
+    lat_min: Optional[float] = None
+    lat_max: Optional[float] = None
+    lon_min: Optional[float] = None
+    lon_max: Optional[float] = None
+
+    def __str__(self) -> str:
+        # Для логов: только заданные фильтры; форматируется, лишь если запись будет выведена
+        return str(self.model_dump(exclude_none=True))
+
+    @property
+    def has_radius(self) -> bool:
+        return None not in (self.lat, self.lon, self.radius_km)
+
+    @property
+    def has_rectangle(self) -> bool:
+        return None not in (self.lat_min, self.lat_max, self.lon_min, self.lon_max)
+
+    @property
+    def has_geo(self) -> bool:
+        return self.has_radius or self.has_rectangle
+
+    @property
+    def geo_incomplete(self) -> bool:
+        """Гео-параметры переданы частично (например, lat без lon и radius_km)"""
+        radius = (self.lat, self.lon, self.radius_km)
+        rectangle = (self.lat_min, self.lat_max, self.lon_min, self.lon_max)
+        return any(
+            any(v is not None for v in group) and not all(v is not None for v in group)
+            for group in (radius, rectangle)
+        )
@@ -0,0 +1,176 @@
+import csv
+import io
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from exceptions.exceptions import ExportFormatUnavailable
+from repositories.export import EXPORT_BATCH_SIZE, ExportRepository, export_columns
+from schemas.organization import OrganizationFilters
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+# Колоночные форматы требуют pyarrow — опциональная зависимость
+ARROW_FORMATS = ("parquet", "arrow")
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def arrow_type(pa, sql_type):
+    """Тип Arrow по типу колонки SQLAlchemy"""
+    if isinstance(sql_type, ARRAY):
+        return pa.list_(arrow_type(pa, sql_type.item_type))
+    if isinstance(sql_type, BigInteger):
+        return pa.int64()
+    if isinstance(sql_type, Integer):
+        return pa.int32()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def arrow_schema(pa, dataset: str):
+    return pa.schema([
+        pa.field(column.name, arrow_type(pa, column.type), nullable=getattr(column, "nullable", True))
+        for column in export_columns(dataset)
+    ])
+
+
+def csv_value(value):
+    """Компактный CSV: списки через ';' (как в импорте), даты в ISO 8601, NULL — пустая ячейка"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ChunkSink:
+    """Файлоподобный приёмник для писателей pyarrow: накопленные байты забираются после каждой порции"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ExportService:
+    """
+    Выгрузка наборов данных (организации, здания, телефоны, виды деятельности, надгробия удалений)
+    в CSV, Arrow IPC (stream) или Parquet.
+
+    Строки читаются серверным курсором порциями по batch_size; каждая порция сразу
+    превращается в байты формата (одна порция — один record batch / row group)
+    и отдаётся вызывающему коду, поэтому память не зависит от объёма выгрузки.
+    """
+
+    def __init__(self):
+        self.repository = ExportRepository()
+
+    def check_format(self, fmt: str) -> None:
+        """Проверить доступность формата до начала потока (после первого байта статус уже не изменить)"""
+        if fmt in ARROW_FORMATS and load_pyarrow() is None:
+            raise ExportFormatUnavailable(fmt)
+
+    async def current_version(self, db: AsyncSession) -> int:
+        return await self.repository.current_version(db)
+
+    async def export(
+        self,
+        db: AsyncSession,
+        dataset: str,
+        fmt: str,
+        filters: OrganizationFilters,
+        since_version: Optional[int] = None,
+        until_version: Optional[int] = None,
+        since: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[bytes]:
+        partitions = self.repository.stream(db, dataset, filters, since_version, until_version, since, batch_size)
+        if fmt == "csv":
+            writer = self._csv(dataset, partitions)
+        else:
+            writer = self._arrow(dataset, fmt, partitions)
+        async for chunk in writer:
+            if chunk:
+                yield chunk
+
+    async def _csv(self, dataset: str, partitions: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(column.name for column in export_columns(dataset))
+        async for partition in partitions:
+            writer.writerows([csv_value(value) for value in row] for row in partition)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    async def _arrow(self, dataset: str, fmt: str, partitions: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+        pa = load_pyarrow()
+        schema = arrow_schema(pa, dataset)
+        sink = ChunkSink()
+        if fmt == "parquet":
+            writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+        try:
+            async for partition in partitions:
+                writer.write_batch(self._record_batch(pa, schema, partition))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def _record_batch(self, pa, schema, rows: Iterable[tuple]):
+        columns = list(zip(*rows))
+        return pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
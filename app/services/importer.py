@@ -0,0 +1,313 @@
+import csv
+import json
+import logging
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from asyncpg.exceptions import DataError, IntegrityConstraintViolationError
+from pydantic import BaseModel, ValidationError
+
+from cache.activity_tree import activity_tree_cache
+from cache.data_version import IMPORTS_SIGNAL, data_version
+from cache.invalidation import data_version_watcher
+from cache.name_index import organization_name_index
+from cache.response import response_cache
+from core.validation import validation_message
+from db.database import AsyncSessionLocal, raw_connection, replica_router
+from models.activity import MAX_ACTIVITY_DEPTH
+from repositories.bulk import BulkImportRepository
+from schemas.imports import (
+    ActivityImportSchema, BuildingImportSchema, OrganizationImportSchema,
+    ImportErrorSchema, ImportReportSchema,
+)
+
+logger = logging.getLogger(__name__)
+
+IMPORT_SCHEMAS = {
+    "buildings": BuildingImportSchema,
+    "activities": ActivityImportSchema,
+    "organizations": OrganizationImportSchema,
+}
+IMPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = 10_000
+# Сколько ошибок по строкам попадает в отчёт (счётчик failed учитывает все)
+MAX_REPORTED_ERRORS = 100
+# Ошибки, которые вызывают данные строк: порция делится, пока не найдутся виновные строки.
+# Остальные (обрыв соединения, таймаут) от строк не зависят — отменяется вся порция
+ROW_ERRORS = (DataError, IntegrityConstraintViolationError)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Разбить поток байт (тело запроса, файл) на строки UTF-8"""
+    tail = b""
+    async for chunk in chunks:
+        tail += chunk
+        *lines, tail = tail.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if tail:
+        yield tail.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_records(
+    lines: AsyncIterator[str], fmt: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    (номер строки, запись, ошибка разбора) для CSV с заголовком или NDJSON.
+    CSV читается построчно: значения с переводом строки внутри кавычек не поддерживаются.
+    """
+    header = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Некорректный JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Ожидается JSON-объект"
+                continue
+            yield line_no, record, None
+        else:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_no, None, f"Ожидалось {len(header)} колонок, получено {len(values)}"
+                continue
+            yield line_no, dict(zip(header, values)), None
+
+
+class ActivityTree:
+    """Дерево видов деятельности в памяти для проверки вложенности импортируемых строк"""
+
+    def __init__(self, parents: Dict[int, Optional[int]]):
+        self.reset(parents)
+
+    def reset(self, parents: Dict[int, Optional[int]]) -> None:
+        self.parents = dict(parents)
+        self.children: Dict[Optional[int], Set[int]] = {}
+        for activity_id, parent_id in self.parents.items():
+            self.children.setdefault(parent_id, set()).add(activity_id)
+
+    def _depth(self, activity_id: int) -> Optional[int]:
+        """Уровень узла (1 — корень); None при цикле"""
+        level, seen = 0, set()
+        node = activity_id
+        while node is not None:
+            if node in seen:
+                return None
+            seen.add(node)
+            level += 1
+            node = self.parents.get(node)
+        return level
+
+    def _height(self, activity_id: int) -> int:
+        """Число уровней в поддереве узла, включая его самого"""
+        height, frontier = 0, {activity_id}
+        while frontier and height <= MAX_ACTIVITY_DEPTH:
+            height += 1
+            frontier = {child for node in frontier for child in self.children.get(node, ())}
+        return height
+
+    def _move(self, activity_id: int, parent_id: Optional[int]) -> None:
+        if activity_id in self.parents:
+            self.children.get(self.parents[activity_id], set()).discard(activity_id)
+        self.parents[activity_id] = parent_id
+        self.children.setdefault(parent_id, set()).add(activity_id)
+
+    def place(self, activity_id: int, parent_id: Optional[int]) -> Optional[str]:
+        """Поставить узел под parent_id; вернуть текст ошибки, если дерево станет некорректным"""
+        if parent_id is not None and parent_id not in self.parents:
+            return f"Родительский вид деятельности id={parent_id} не найден"
+        existed = activity_id in self.parents
+        previous = self.parents.get(activity_id)
+        self._move(activity_id, parent_id)
+        depth = self._depth(activity_id)
+        error = None
+        if depth is None:
+            error = "Цикл в дереве видов деятельности"
+        elif depth + self._height(activity_id) - 1 > MAX_ACTIVITY_DEPTH:
+            error = f"Максимальная вложенность видов деятельности — {MAX_ACTIVITY_DEPTH} уровня"
+        if error is not None:
+            if existed:
+                self._move(activity_id, previous)
+            else:
+                self.children[parent_id].discard(activity_id)
+                del self.parents[activity_id]
+        return error
+
+
+class ImportService:
+    """
+    Массовый импорт зданий, видов деятельности и организаций из CSV/NDJSON.
+
+    Вход читается потоком и режется на порции по batch_size строк. Каждая строка
+    валидируется схемой, ссылки (здание, родитель, виды деятельности) проверяются
+    по БД; некорректные строки попадают в отчёт, остальные грузятся через COPY.
+    Одна порция — одна транзакция: строки, отвергнутые БД, находятся делением порции
+    в точках сохранения (см. _load_rows), прочие ошибки БД отменяют только эту порцию.
+    """
+
+    def __init__(self):
+        self.repository = BulkImportRepository()
+
+    async def run(
+        self,
+        kind: str,
+        lines: AsyncIterator[str],
+        fmt: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        progress: Optional[Callable[[ImportReportSchema], None]] = None,
+    ) -> ImportReportSchema:
+        schema = IMPORT_SCHEMAS[kind]
+        report = ImportReportSchema(kind=kind)
+        started = time.perf_counter()
+
+        async with raw_connection() as conn:
+            tree = ActivityTree(await self.repository.activity_parents(conn)) if kind != "buildings" else None
+            batch: Dict[int, Tuple[int, BaseModel]] = {}
+
+            async def flush() -> None:
+                await self._load_batch(conn, kind, list(batch.values()), tree, report)
+                batch.clear()
+                self._update_rate(report, started)
+                logger.info("Импорт %s: обработано %s, загружено %s, ошибок %s",
+                            kind, report.processed, report.imported, report.failed)
+                if progress is not None:
+                    progress(report)
+
+            async for line_no, record, error in iter_records(lines, fmt):
+                report.processed += 1
+                if error is None:
+                    try:
+                        row = schema.model_validate(record)
+                    except ValidationError as e:
+                        error = validation_message(e)
+                if error is not None:
+                    self._fail(report, line_no, error)
+                    continue
+                if kind == "activities":
+                    # Проверка вложенности идёт по порядку строк: родитель должен быть раньше потомка
+                    error = tree.place(row.id, row.parent_id)
+                    if error is not None:
+                        self._fail(report, line_no, error)
+                        continue
+                # Повтор id внутри порции: побеждает последняя строка
+                batch[row.id] = (line_no, row)
+                if len(batch) >= batch_size:
+                    await flush()
+            if batch:
+                await flush()
+
+            await self.repository.sync_sequence(conn, kind)
+
+        await self._after_import(kind)
+        self._update_rate(report, started)
+        logger.info("Импорт %s завершён: %s", kind, report.model_dump(exclude={"errors"}))
+        return report
+
+    def _update_rate(self, report: ImportReportSchema, started: float) -> None:
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        if report.elapsed_seconds:
+            report.rows_per_second = round(report.imported / report.elapsed_seconds, 1)
+
+    def _fail(self, report: ImportReportSchema, line_no: int, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(ImportErrorSchema(line=line_no, error=error))
+
+    async def _resolve_organizations(
+        self, conn, rows: List[Tuple[int, OrganizationImportSchema]], tree: ActivityTree, report: ImportReportSchema
+    ) -> List[Tuple[int, OrganizationImportSchema]]:
+        """Отсеять организации с несуществующими зданием/видами деятельности и дублями (name, building_id)"""
+        buildings = await self.repository.existing_ids(conn, "buildings", {row.building_id for _, row in rows})
+        owners = await self.repository.organization_ids_by_key(conn, {(row.name, row.building_id) for _, row in rows})
+        resolved = []
+        for line_no, row in rows:
+            missing = [activity_id for activity_id in row.activity_ids if activity_id not in tree.parents]
+            owner = owners.get((row.name, row.building_id), row.id)
+            if row.building_id not in buildings:
+                self._fail(report, line_no, f"Здание id={row.building_id} не найдено")
+            elif missing:
+                self._fail(report, line_no, f"Виды деятельности не найдены: {missing}")
+            elif owner != row.id:
+                self._fail(report, line_no, f"Организация '{row.name}' в здании id={row.building_id} уже есть (id={owner})")
+            else:
+                owners[(row.name, row.building_id)] = row.id
+                resolved.append((line_no, row))
+        return resolved
+
+    async def _load_batch(
+        self, conn, kind: str, rows: List[Tuple[int, BaseModel]], tree: Optional[ActivityTree], report: ImportReportSchema
+    ) -> None:
+        failures: List[Tuple[int, str]] = []
+        imported = 0
+        try:
+            async with conn.transaction():
+                if kind == "organizations":
+                    rows = await self._resolve_organizations(conn, rows, tree, report)
+                imported = await self._load_rows(conn, kind, rows, failures)
+            report.imported += imported
+            for line_no, error in failures:
+                self._fail(report, line_no, error)
+        except Exception as e:
+            logger.error("Ошибка при загрузке порции %s (%s строк): %s", kind, len(rows), e)
+            for line_no, _ in rows:
+                self._fail(report, line_no, f"Ошибка БД при загрузке порции: {e}")
+            imported = 0
+        if imported < len(rows) and tree is not None and kind == "activities":
+            # Строки порции уже учтены в дереве — перечитываем его из БД
+            tree.reset(await self.repository.activity_parents(conn))
+
+    async def _load_rows(
+        self, conn, kind: str, rows: List[Tuple[int, BaseModel]], failures: List[Tuple[int, str]]
+    ) -> int:
+        """
+        Загрузить строки в точке сохранения; число загруженных. Если БД отвергла данные
+        (ограничение, некорректное значение), строки делятся пополам и грузятся заново,
+        пока ошибка не сведётся к конкретным строкам: они попадают в failures, остальные
+        загружаются. Для k плохих строк из n это O(k log n) попыток вместо отката всей порции.
+        """
+        if not rows:
+            return 0
+        try:
+            async with conn.transaction():
+                if kind == "organizations":
+                    await self.repository.upsert_organizations(conn, [row for _, row in rows])
+                elif kind == "activities":
+                    await self.repository.upsert_activities(conn, [row for _, row in rows])
+                else:
+                    await self.repository.upsert_buildings(conn, [row for _, row in rows])
+            return len(rows)
+        except ROW_ERRORS as e:
+            if len(rows) == 1:
+                failures.append((rows[0][0], f"Ошибка БД при загрузке строки: {e}"))
+                return 0
+            middle = len(rows) // 2
+            return (
+                await self._load_rows(conn, kind, rows[:middle], failures)
+                + await self._load_rows(conn, kind, rows[middle:], failures)
+            )
+
+    async def _after_import(self, kind: str) -> None:
+        """
+        Сбросить производные данные: в этом процессе — сразу, в остальных (импорт из CLI
+        не доходит до серверов) — через сигнал imports в data_versions, который сверяет
+        DataVersionWatcher. Версию данных для ETag меняют триггеры БД (row_version).
+        """
+        if kind == "activities":
+            activity_tree_cache.invalidate()
+        async with AsyncSessionLocal() as db:
+            if kind == "organizations":
+                await organization_name_index.load(db)
+            version = await data_version.bump(db, IMPORTS_SIGNAL)
+        if version is not None:
+            data_version_watcher.seen(IMPORTS_SIGNAL, version)
+        replica_router.mark_write()
+        await response_cache.clear()
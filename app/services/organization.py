@@ -1,105 +1,321 @@
 import logging
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Type
 
-from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from repositories.organization import OrganizationRepository
 from models.organization import Organization
-
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from schemas.organization import (
+    OrganizationFilters, OrganizationSchema, OrganizationPageSchema,
+    OrganizationCreateSchema, OrganizationUpdateSchema, BatchItemResultSchema, BatchResultSchema,
+    OrganizationBatchGetSchema, MAX_BATCH_SIZE,
 )
+from core.batching import BatchLoader
+from core.config import settings
+from core.geo import tile_bounds
+from core.metrics import serialization_timer
+from core.pagination import DEFAULT_PAGE_SIZE
+from core.validation import validation_message
+from cache.response import response_cache, entity_tag, LIST_TAG
+from db.routing import read_engine
+from db.features import db_features
+
 logger = logging.getLogger(__name__)
 
+# Ключ пачечной загрузки: сервер БД, с которого читает запрос, и id организации
+NodeKey = Tuple[AsyncEngine, int]
+
+
+def organization_tags(org: OrganizationSchema) -> Set[str]:
+    """Теги кэша для организации: она сама, её здание, телефоны и виды деятельности"""
+    tags = {entity_tag("organizations", org.id), entity_tag("buildings", org.building.id)}
+    tags.update(entity_tag("organization_phones", phone.id) for phone in org.phones)
+    tags.update(entity_tag("activities", activity.id) for activity in org.activities)
+    return tags
+
+
+def organization_document_tags(doc: dict) -> Set[str]:
+    """То же для документа организации из лёгкого пути (словарь в форме OrganizationSchema)"""
+    tags = {entity_tag("organizations", doc["id"]), entity_tag("buildings", doc["building"]["id"])}
+    tags.update(entity_tag("organization_phones", phone["id"]) for phone in doc["phones"])
+    tags.update(entity_tag("activities", activity["id"]) for activity in doc["activities"])
+    return tags
+
+
+def group_by_node(keys: List[NodeKey]) -> Dict[AsyncEngine, List[int]]:
+    groups: Dict[AsyncEngine, List[int]] = {}
+    for engine, obj_id in keys:
+        groups.setdefault(engine, []).append(obj_id)
+    return groups
+
+
+def validate_batch(
+    items: List[Dict[str, Any]], schema: Type[BaseModel]
+) -> Tuple[List[Tuple[int, BaseModel]], Dict[int, str]]:
+    """Провалидировать элементы по одному: (индекс, модель) для корректных, индекс -> ошибка для остальных"""
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors[index] = validation_message(e)
+    return valid, errors
+
+
+def batch_result(size: int, ids: Dict[int, int], errors: Dict[int, str]) -> BatchResultSchema:
+    return BatchResultSchema(
+        succeeded=size - len(errors),
+        failed=len(errors),
+        results=[BatchItemResultSchema(index=i, id=ids.get(i), error=errors.get(i)) for i in range(size)],
+    )
+
 
 class OrganizationService:
+    """
+    Сервис организаций. Ответы read-методов кэшируются в response_cache
+    уже сериализованными; записи через репозитории вытесняют их по тегам.
+    """
+
     def __init__(self):
         self.repository = OrganizationRepository()
+        # Одновременные запросы карточек по id склеиваются в один WHERE id = ANY(...) на каждый сервер БД
+        self.detail_loader: BatchLoader[NodeKey, Organization] = BatchLoader(self._load_by_ids, MAX_BATCH_SIZE)
+        # То же для готовых документов read-модели (db_features.documents)
+        self.document_loader: BatchLoader[NodeKey, dict] = BatchLoader(self._load_documents, MAX_BATCH_SIZE)
 
-    async def get_organizations_in_buildings(
-        self, db: AsyncSession, building_id: int
-    ) -> List[Organization]:
-        """Список всех организаций находящихся в конкретном здании"""
-        try:
-            return await self.repository.get_by_building(db, building_id)
-        except Exception as e:
-            logger.error("Ошибка при получении организаций в здании %s: %s", building_id, e)
-            return []
-
-    async def get_organizations_by_activity(
-        self, db: AsyncSession, activity_id: int
-    ) -> List[Organization]:
-        """Список всех организаций по виду деятельности"""
-        try:
-            return await self.repository.get_by_activity(db, activity_id)
-        except Exception as e:
-            logger.error("Ошибка при получении организаций по виду деятельности %s: %s", activity_id, e)
-            return []
+    # Своя сессия: пачка обслуживает несколько HTTP-запросов и не должна зависеть от сессии одного из них.
+    # Но сервер — тот же, с которого запрос прочитал версию данных (conditional_get):
+    # иначе ETag и данные могли бы прийти с реплик с разным отставанием
+    async def _load_by_ids(self, keys: List[NodeKey]) -> Dict[NodeKey, Organization]:
+        found = {}
+        for engine, ids in group_by_node(keys).items():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for org in await self.repository.get_many_by_ids(db, ids):
+                    found[(engine, org.id)] = org
+        return found
+
+    async def _load_documents(self, keys: List[NodeKey]) -> Dict[NodeKey, dict]:
+        found = {}
+        for engine, ids in group_by_node(keys).items():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for org_id, doc in (await self.repository.get_documents_by_ids(db, ids)).items():
+                    found[(engine, org_id)] = doc
+        return found
+
+    @staticmethod
+    def _cache_key(db: AsyncSession, namespace: str, params: Dict[str, Any]) -> str:
+        """
+        Ключ кэша ответов с версией данных, прочитанной conditional_get: ответ, собранный
+        на старой версии, не уйдёт клиенту с ETag новой (None — версии нет, ключ без неё)
+        """
+        return response_cache.make_key(namespace, {**params, "version": db.info.get("data_version")})
+
+    def _search_params(self, filters: OrganizationFilters) -> Dict[str, Any]:
+        params = filters.model_dump(exclude_none=True)
+        if filters.name is not None:
+            # ILIKE и similarity не зависят от регистра — один ключ на все варианты написания.
+            # lower(), а не casefold(): casefold сводит "ß" к "ss", а ILIKE — нет
+            params["name"] = filters.name.lower()
+        return params
+
+    def _search_key(self, db: AsyncSession, filters: OrganizationFilters, limit: int, cursor: Optional[str]) -> str:
+        params = self._search_params(filters)
+        return self._cache_key(db, "organizations:search", {**params, "limit": limit, "cursor": cursor})
+
+    async def search_organizations(
+        self, db: AsyncSession, filters: OrganizationFilters,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> OrganizationPageSchema:
+        """
+        Список организаций по любой комбинации фильтров (здание, вид деятельности,
+        дерево деятельности, имя, радиус, прямоугольник) — одним SQL-запросом.
+        """
+        key = self._search_key(db, filters, limit, cursor)
+        cached = await response_cache.get(key)
+        if cached is not None:
+            with serialization_timer():
+                return OrganizationPageSchema.model_validate_json(cached)
+
+        # Ошибки БД не превращаются в пустую страницу — их обрабатывает маршрут (500)
+        page = await self.repository.search(db, filters, limit, cursor)
+        with serialization_timer():
+            schema = OrganizationPageSchema.model_validate(page)
+            body = schema.model_dump_json()
+        tags = {LIST_TAG}
+        for org in schema.items:
+            tags |= organization_tags(org)
+        await response_cache.set(key, body, tags)
+        return schema
+
+    async def search_organizations_json(
+        self, db: AsyncSession, filters: OrganizationFilters,
+        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    ) -> bytes:
+        """
+        То же, что search_organizations, но сразу JSON-байтами OrganizationPageSchema:
+        строки лёгкого пути репозитория сериализуются orjson без ORM и Pydantic.
+        Ключ кэша общий с search_organizations — форма ответа одна и та же.
+        """
+        key = self._search_key(db, filters, limit, cursor)
+        cached = await response_cache.get(key)
+        if cached is not None:
+            return cached.encode()
+
+        page = await self.repository.search(db, filters, limit, cursor, lean=True)
+        with serialization_timer():
+            body = orjson.dumps({"items": page.items, "next_cursor": page.next_cursor})
+        tags = {LIST_TAG}
+        for doc in page.items:
+            tags |= organization_document_tags(doc)
+        await response_cache.set(key, body.decode(), tags)
+        return body
 
     async def get_organization_by_id(
         self, db: AsyncSession, org_id: int
-    ) -> Optional[Organization]:
+    ) -> Optional[OrganizationSchema]:
         """Вывод информации об организации по её идентификатору"""
-        try:
-            return await self.repository.get_detailed_by_id(db, org_id)
-        except Exception as e:
-            logger.error("Ошибка при получении организации по id %s: %s", org_id, e)
+        body = await self.get_organization_json(db, org_id)
+        return OrganizationSchema.model_validate_json(body) if body is not None else None
+
+    async def get_organization_json(self, db: AsyncSession, org_id: int) -> Optional[bytes]:
+        """
+        Организация по идентификатору сразу JSON-байтами OrganizationSchema:
+        ORM-объект валидируется один раз, из кэша ответ отдаётся без разбора.
+        Промахи кэша идут через detail_loader (своя сессия на том же сервере, что и db).
+        С read-моделью — через document_loader: документ по первичному ключу, без ORM.
+        """
+        key = self._cache_key(db, "organizations:detail", {"id": org_id})
+        cached = await response_cache.get(key)
+        if cached is not None:
+            return cached.encode()
+        node = read_engine(db)
+        if db_features.documents:
+            return await self._get_document_json(key, node, org_id)
+
+        # Ошибка пачки приходит сюда же (BatchLoader передаёт её каждому ожидающему):
+        # сбой БД — 500 маршрута, а не «организация не найдена»
+        org = await self.detail_loader.load((node, org_id))
+        if org is None:
             return None
 
-    async def search_organizations_by_activity_tree(
-        self, db: AsyncSession, root_activity_id: int
-    ) -> List[Organization]:
+        with serialization_timer():
+            schema = OrganizationSchema.model_validate(org)
+            body = schema.model_dump_json()
+        await response_cache.set(key, body, organization_tags(schema))
+        return body.encode()
+
+    async def _get_document_json(self, key: str, node: AsyncEngine, org_id: int) -> Optional[bytes]:
+        doc = await self.document_loader.load((node, org_id))
+        if doc is None:
+            return None
+
+        with serialization_timer():
+            body = orjson.dumps(doc)
+        await response_cache.set(key, body.decode(), organization_document_tags(doc))
+        return body
+
+    async def get_organizations_batch_json(self, db: AsyncSession, ids: List[int]) -> bytes:
         """
-        Поиск организаций по виду деятельности, включая вложенные (до 3 уровней).
-        Например, для "Еда" вернутся также организации с деятельностью
-        "Мясная продукция" и "Молочная продукция".
+        Карточки организаций по списку id одним запросом — JSON-байты OrganizationBatchGetSchema:
+        items в порядке запроса (без повторов), missing — id, которых нет.
         """
-        try:
-            return await self.repository.search_by_activity_tree(db, root_activity_id)
-        except Exception as e:
-            logger.error("Ошибка при поиске организаций по дереву видов деятельности %s: %s", root_activity_id, e)
-            return []
-
-    async def search_organizations_by_name(
-        self, db: AsyncSession, name: str
-    ) -> List[Organization]:
-        """Поиск организаций по названию (частичное совпадение, регистронезависимое)"""
-        try:
-            return await self.repository.search_by_name(db, name)
-        except Exception as e:
-            logger.error("Ошибка при поиске организаций по имени '%s': %s", name, e)
-            return []
-
-    async def get_organizations_in_rectangle(
-            self, db: AsyncSession, lat_min: float, lat_max: float, lon_min: float, lon_max: float
-    ) -> List[Organization]:
-        try:
-            orgs = await self.repository.get_in_rectangle(db, lat_min, lat_max, lon_min, lon_max)
-            logger.info(
-                "Успешно получены %s организаций в прямоугольнике [%s,%s]x[%s,%s]",
-                len(orgs), lat_min, lat_max, lon_min, lon_max
-            )
-            return orgs
-        except Exception as e:
-            logger.error(
-                "Ошибка в сервисе при получении организаций в прямоугольнике [%s,%s]x[%s,%s]: %s",
-                lat_min, lat_max, lon_min, lon_max, e
-            )
-            return []
+        unique_ids = list(dict.fromkeys(ids))
+        if db_features.documents:
+            docs = await self.repository.get_documents_by_ids(db, unique_ids)
+            with serialization_timer():
+                return orjson.dumps({
+                    "items": [docs[org_id] for org_id in unique_ids if org_id in docs],
+                    "missing": [org_id for org_id in unique_ids if org_id not in docs],
+                })
+        # Сбой БД — 500 маршрута, а не все id в missing
+        orgs = {org.id: org for org in await self.repository.get_many_by_ids(db, unique_ids)}
+        with serialization_timer():
+            batch = OrganizationBatchGetSchema.model_validate({
+                "items": [orgs[org_id] for org_id in unique_ids if org_id in orgs],
+                "missing": [org_id for org_id in unique_ids if org_id not in orgs],
+            })
+            return batch.model_dump_json().encode()
 
-    async def get_organizations_in_radius(
-            self, db: AsyncSession, lat: float, lon: float, radius_km: float
-    ) -> List[Organization]:
-        try:
-            orgs = await self.repository.get_in_radius(db, lat, lon, radius_km)
-            logger.info(
-                "Успешно получены %s организаций в радиусе %s км от точки (%s, %s)",
-                len(orgs), radius_km, lat, lon
-            )
-            return orgs
-        except Exception as e:
-            logger.error(
-                "Ошибка в сервисе при получении организаций в радиусе (%s, %s), r=%s: %s",
-                lat, lon, radius_km, e
+    async def get_tile_json(
+        self, db: AsyncSession, z: int, x: int, y: int, filters: OrganizationFilters
+    ) -> bytes:
+        """
+        Тайл карты z/x/y JSON-байтами TileSchema. До зума settings.TILE_POINTS_MIN_ZOOM —
+        кластеры по сетке, дальше — отдельные точки; если точек больше TILE_MAX_POINTS,
+        тайл всё равно отдаётся кластерами. Кэшируется под тегом списков — любая запись
+        вытесняет все тайлы.
+        """
+        key = self._cache_key(db, "organizations:tiles", {**self._search_params(filters), "z": z, "x": x, "y": y})
+        cached = await response_cache.get(key)
+        if cached is not None:
+            return cached.encode()
+
+        lat_min, lat_max, lon_min, lon_max = tile_bounds(z, x, y)
+        tile_filters = filters.model_copy(
+            update={"lat_min": lat_min, "lat_max": lat_max, "lon_min": lon_min, "lon_max": lon_max}
+        )
+        tile = {"z": z, "x": x, "y": y, "clusters": [], "points": []}
+        # Ошибки БД не превращаются в пустой тайл — их обрабатывает маршрут (500), в кэш ничего не пишется
+        clustered = z < settings.TILE_POINTS_MIN_ZOOM
+        if not clustered:
+            # +1 — понять, что лимит превышен, не считая всех точек тайла
+            points = await self.repository.get_tile_points(db, tile_filters, settings.TILE_MAX_POINTS + 1)
+            clustered = len(points) > settings.TILE_MAX_POINTS
+            if not clustered:
+                tile["points"] = points
+        if clustered:
+            tile["clusters"] = await self.repository.get_tile_clusters(
+                db, tile_filters, z, x, y, settings.TILE_GRID_SIZE
             )
-            return []
+
+        with serialization_timer():
+            body = orjson.dumps(tile)
+        await response_cache.set(key, body.decode(), {LIST_TAG})
+        return body
+
+    def suggest_organizations(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Подсказки (id, name) по префиксу названия"""
+        return self.repository.suggest_by_name(prefix, limit)
+
+    async def get_nearest_organizations(
+            self, db: AsyncSession, lat: float, lon: float, k: int
+    ) -> List[Tuple[Organization, float]]:
+        """k ближайших к точке организаций с расстояниями (км); ошибки БД — маршруту (500)"""
+        return await self.repository.get_nearest(db, lat, lon, k)
+
+    async def stream_organizations(
+        self, db: AsyncSession, filters: OrganizationFilters
+    ) -> AsyncIterator[List[Organization]]:
+        """Потоковая выгрузка организаций порциями (для больших результатов)"""
+        async for partition in self.repository.stream(db, filters):
+            yield partition
+
+    async def create_organizations(self, db: AsyncSession, items: List[Dict[str, Any]]) -> BatchResultSchema:
+        """Создать организации пачкой (name, building_id); ошибки — по каждому элементу"""
+        valid, errors = validate_batch(items, OrganizationCreateSchema)
+        created = await self.repository.create_many(db, [row.model_dump() for _, row in valid])
+        ids = {}
+        for (index, _), (org, error) in zip(valid, created):
+            if org is None:
+                errors[index] = error
+            else:
+                ids[index] = org.id
+        return batch_result(len(items), ids, errors)
+
+    async def update_organizations(self, db: AsyncSession, items: List[Dict[str, Any]]) -> BatchResultSchema:
+        """Обновить организации пачкой: в каждом элементе id и изменяемые поля"""
+        valid, errors = validate_batch(items, OrganizationUpdateSchema)
+        updated = await self.repository.update_many(db, [row.model_dump(exclude_none=True) for _, row in valid])
+        ids = {index: row.id for index, row in valid}
+        for (index, _), (org, error) in zip(valid, updated):
+            if org is None:
+                errors[index] = error
+        return batch_result(len(items), ids, errors)
+
+    async def delete_organizations(self, db: AsyncSession, ids: List[int]) -> BatchResultSchema:
+        """Удалить организации пачкой"""
+        deleted = await self.repository.delete_many(db, ids)
+        errors = {index: error for index, error in enumerate(deleted) if error is not None}
+        return batch_result(len(ids), dict(enumerate(ids)), errors)
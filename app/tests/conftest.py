@@ -0,0 +1,169 @@
+"""
+Тесты гоняются на SQLite (aiosqlite) — без PostgreSQL. Здесь же трансляция
+PostgreSQL-конструкций, которые встречаются на проверяемых путях чтения,
+в эквиваленты SQLite: типы и DEFAULT для create_all, json_build_object / json_agg,
+col = ANY(массив).
+"""
+import asyncio
+import json
+import re
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.elements import BinaryExpression, CollectionAggregate, ColumnClause
+from sqlalchemy.sql.functions import Function, next_value
+
+from cache.response import response_cache
+from core.auth import api_key_auth
+from db.database import BaseModel, get_read_db
+from db.features import db_features
+from db.instrumentation import instrument
+from main import app
+from models.activity import Activity
+from models.building import Building
+from models.organization import Organization, OrganizationDocument, OrganizationPhone
+from repositories.organization import OrganizationRepository
+from schemas.organization import OrganizationSchema
+
+ORGANIZATIONS = 5
+
+SQLITE_FUNCTIONS = {
+    "json_build_object": "json_object", "json_agg": "json_group_array",
+    # Скалярные max/min SQLite с несколькими аргументами — аналоги greatest/least
+    "greatest": "max", "least": "min",
+}
+PG_CAST = re.compile(r"::\w+$")
+# Функции версий строк (миграция 3b7e5a9c1d64): в SQLite все записи тестов зафиксированы,
+# незавершённых транзакций нет — граница равна максимальной версии
+ROW_VERSION_TABLES = ("organizations", "buildings", "organization_phones", "activities", "deleted_rows")
+SQLITE_EXPRESSIONS = {
+    "pending_row_versions": "NULL",
+    "committed_row_version": "(SELECT coalesce(max(version), 0) FROM ({}))".format(
+        " UNION ALL ".join(f"SELECT max(row_version) AS version FROM {table}" for table in ROW_VERSION_TABLES)
+    ),
+}
+
+# Массивы для = ANY(...) передаются в SQLite JSON-строкой (см. _any_array)
+sqlite3.register_adapter(list, json.dumps)
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb(element, compiler, **kw):
+    return "JSON"
+
+
+@compiles(next_value, "sqlite")
+def _next_value(element, compiler, **kw):
+    # Версии строк (row_version) в тестах не нужны: у SQLite нет последовательностей
+    return "0"
+
+
+@compiles(Function, "sqlite")
+def _function(element, compiler, **kw):
+    if element.name in SQLITE_EXPRESSIONS:
+        return SQLITE_EXPRESSIONS[element.name]
+    name = SQLITE_FUNCTIONS.get(element.name)
+    if name is None:
+        return compiler.visit_function(element, **kw)
+    return f"{name}({compiler.process(element.clause_expr.element, **kw)})"
+
+
+@compiles(aggregate_order_by, "sqlite")
+def _aggregate_order_by(element, compiler, **kw):
+    # ORDER BY внутри агрегата в SQLite появился только в 3.44 — порядок задают данные тестов
+    return compiler.process(element.target, **kw)
+
+
+@compiles(ColumnClause, "sqlite")
+def _literal_column(element, compiler, **kw):
+    if element.is_literal and PG_CAST.search(element.name):
+        return PG_CAST.sub("", element.name)
+    return compiler.visit_column(element, **kw)
+
+
+@compiles(BinaryExpression, "sqlite")
+def _any_array(element, compiler, **kw):
+    if isinstance(element.right, CollectionAggregate):
+        return "{} IN (SELECT value FROM json_each({}))".format(
+            compiler.process(element.left, **kw), compiler.process(element.right.element, **kw)
+        )
+    return compiler.visit_binary(element, **kw)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+    instrument(engine)
+
+    async def create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(BaseModel.metadata.create_all)
+
+    asyncio.run(create_all())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def fill(session_factory) -> None:
+    async with session_factory() as db:
+        root = Activity(id=1, name="Еда")
+        children = [
+            Activity(id=2, name="Мясная продукция", parent=root),
+            Activity(id=3, name="Молочная продукция", parent=root),
+        ]
+        buildings = [
+            Building(id=i, address=f"г. Москва, ул. Ленина, {i}", latitude=55.75 + i / 100, longitude=37.61)
+            for i in (1, 2)
+        ]
+        db.add_all([root, *children, *buildings])
+        for i in range(1, ORGANIZATIONS + 1):
+            db.add(Organization(
+                id=i, name=f"ООО «Организация {i}»", building=buildings[i % 2],
+                phones=[OrganizationPhone(phone=f"8-900-000-00-{i}{p}", position=p) for p in range(2)],
+                activities=[root, children[i % 2]],
+            ))
+        await db.commit()
+
+        # Read-модель в PostgreSQL пишут триггеры; здесь документы собираются из ORM
+        for org in await OrganizationRepository().get_many_by_ids(db, list(range(1, ORGANIZATIONS + 1))):
+            document = OrganizationSchema.model_validate(org).model_dump(mode="json")
+            db.add(OrganizationDocument(organization_id=org.id, document=document))
+        await db.commit()
+
+
+@pytest.fixture
+def organization_count() -> int:
+    return ORGANIZATIONS
+
+
+@pytest.fixture
+def documents():
+    """Читать ли из read-модели organization_documents (db_features.documents)"""
+    return False
+
+
+@pytest.fixture
+def client(session_factory, documents, monkeypatch):
+    asyncio.run(fill(session_factory))
+
+    async def read_db():
+        async with session_factory() as db:
+            yield db
+
+    monkeypatch.setattr(response_cache, "backend", None)
+    monkeypatch.setattr(db_features, "documents", documents)
+    app.dependency_overrides[get_read_db] = read_db
+    app.dependency_overrides[api_key_auth] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from core.batching import BatchLoader
+
+
+def test_concurrent_loads_share_one_batch():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(keys)
+        return {key: key * 10 for key in keys if key != 3}
+
+    async def main():
+        loader = BatchLoader(batch_fn)
+        values = await loader.load_many([1, 2, 3, 1])
+        return values, loader
+
+    values, loader = asyncio.run(main())
+    assert values == [10, 20, None, 10]
+    assert calls == [[1, 2, 3]]
+    assert not loader._tasks
+
+
+@pytest.mark.parametrize("error", [RuntimeError("db down"), asyncio.CancelledError()])
+def test_failed_batch_resolves_every_waiter(error):
+    async def batch_fn(keys):
+        raise error
+
+    async def main():
+        loader = BatchLoader(batch_fn)
+        # Без разрешения future в finally ожидающие зависли бы — wait_for это поймает
+        return await asyncio.wait_for(asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True), 1)
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [type(error)] * 2
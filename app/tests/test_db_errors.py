@@ -0,0 +1,58 @@
+"""
+Сбой БД — ответ 500, а не пустой/«не найдено» результат: иначе клиент (и кэш ответов
+с ETag) принимает сбой за данные.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from api.organization import organization_service
+from cache.response import response_cache
+from db.features import db_features
+
+
+@pytest.fixture
+def broken_client(client, session_factory, monkeypatch):
+    """Клиент, у которого таблица зданий пропала: любой запрос с JOIN зданий падает"""
+    async def drop():
+        async with session_factory() as db:
+            await db.execute(text("DROP TABLE buildings"))
+            await db.commit()
+
+    asyncio.run(drop())
+    cached = []
+
+    async def cache_set(key, value, tags=()):
+        cached.append(key)
+
+    monkeypatch.setattr(response_cache, "set", cache_set)
+    client.cached = cached
+    return client
+
+
+def test_tile_db_error_is_not_an_empty_tile(broken_client):
+    response = broken_client.get("/organizations/tiles/17/79225/40959")
+    assert response.status_code == 500
+    assert broken_client.cached == []
+
+
+@pytest.mark.parametrize("loader", ["detail_loader", "document_loader"])
+def test_failed_batch_is_server_error_not_404(client, monkeypatch, loader):
+    async def batch_fn(keys):
+        raise OperationalError("SELECT ...", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(db_features, "documents", loader == "document_loader")
+    monkeypatch.setattr(getattr(organization_service, loader), "batch_fn", batch_fn)
+    assert client.get("/organizations/1").status_code == 500
+
+
+def test_batch_get_db_error_is_not_missing(broken_client):
+    response = broken_client.post("/organizations/batch-get", json={"ids": [1, 2]})
+    assert response.status_code == 500
+
+
+def test_nearest_db_error_is_not_an_empty_list(broken_client):
+    response = broken_client.get("/organizations/nearest", params={"lat": 55.76, "lon": 37.61})
+    assert response.status_code == 500
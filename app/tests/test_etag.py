@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from db.database import BaseModel, get_read_db
+from db.features import db_features
+from db.routing import ReplicaRouter, RoutingSession
+from cache.data_version import DataVersion
+from main import app
+from models.activity import Activity
+from models.organization import Organization
+
+
+@pytest.fixture
+def versioned_client(client, monkeypatch):
+    """Клиент с включёнными версиями строк; в SQLite row_version вместо триггеров выставляет тест"""
+    monkeypatch.setattr(db_features, "row_versions", True)
+    return client
+
+
+def run(session_factory, statement) -> None:
+    async def execute():
+        async with session_factory() as db:
+            await db.execute(statement)
+            await db.commit()
+
+    asyncio.run(execute())
+
+
+def test_matching_etag_is_not_modified(versioned_client):
+    response = versioned_client.get("/organizations/1")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = versioned_client.get("/organizations/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_etag_follows_row_versions(versioned_client, session_factory):
+    etag = versioned_client.get("/organizations/").headers["ETag"]
+    run(session_factory, update(Organization).where(Organization.id == 1).values(row_version=5))
+
+    response = versioned_client.get("/organizations/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_unreadable_version_skips_conditional_get(versioned_client, session_factory):
+    etag = versioned_client.get("/organizations/1").headers["ETag"]
+    run(session_factory, text("DROP TABLE deleted_rows"))
+
+    response = versioned_client.get("/organizations/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert response.json()["id"] == 1
+
+
+def test_detail_is_read_from_the_node_that_gave_the_etag(versioned_client, engine, tmp_path):
+    # Реплика «отстаёт»: версия другая, организаций ещё нет
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+
+    async def create_replica():
+        async with replica.begin() as conn:
+            await conn.run_sync(BaseModel.metadata.create_all)
+            await conn.execute(Activity.__table__.insert().values(id=1, name="Еда", row_version=7))
+
+    asyncio.run(create_replica())
+
+    class Session(RoutingSession):
+        router = ReplicaRouter(engine, [replica], sticky_seconds=0, health_check_seconds=1)
+
+    factory = sessionmaker(class_=AsyncSession, sync_session_class=Session, expire_on_commit=False)
+
+    async def read_db():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = read_db
+    try:
+        listing = versioned_client.get("/organizations/")
+        detail = versioned_client.get("/organizations/1")
+    finally:
+        asyncio.run(replica.dispose())
+    assert listing.headers["ETag"] == 'W/"7"'
+    assert listing.json()["items"] == []
+    # Карточка грузится пачкой в своей сессии — но с той же реплики, а не с основной БД
+    assert detail.status_code == 404
+
+
+def test_commit_of_an_older_transaction_changes_etag():
+    # Транзакция с версией 3 ещё не видна: её коммит не увеличит максимум 10, но изменит данные
+    assert DataVersion.token(10, [3]) != DataVersion.token(10, [])
+    # Более новые незавершённые транзакции на версию не влияют — их коммит увеличит максимум
+    assert DataVersion.token(10, [12]) == DataVersion.token(10, []) == "10"
@@ -0,0 +1,51 @@
+import asyncio
+
+from sqlalchemy import insert
+
+from cache.data_version import data_version
+from db.features import db_features
+from models.activity import Activity
+from schemas.organization import OrganizationFilters
+from services.export import ExportService
+
+
+def test_incremental_exports_split_at_committed_version(session_factory, monkeypatch):
+    """Строка транзакции, ещё не завершённой на момент выгрузки, приходит в следующую, а не теряется"""
+    horizon = {"version": 5}
+
+    async def committed(db):
+        return horizon["version"]
+
+    monkeypatch.setattr(db_features, "row_versions", True)
+    monkeypatch.setattr(data_version, "committed", committed)
+    service = ExportService()
+
+    async def export(since_version):
+        async with session_factory() as db:
+            version = await service.current_version(db)
+            chunks = [
+                chunk async for chunk in
+                service.export(db, "activities", "csv", OrganizationFilters(), since_version, version)
+            ]
+        ids = [line.split(",")[0] for line in b"".join(chunks).decode().splitlines()[1:]]
+        return version, ids
+
+    async def main():
+        async with session_factory() as db:
+            # Версия 8 видна раньше, чем зафиксировалась транзакция с версией 6
+            await db.execute(insert(Activity), [
+                {"id": 1, "name": "Еда", "row_version": 3},
+                {"id": 2, "name": "Автомобили", "row_version": 8},
+            ])
+            await db.commit()
+        first = await export(None)
+
+        async with session_factory() as db:
+            await db.execute(insert(Activity), [{"id": 3, "name": "Спорт", "row_version": 6}])
+            await db.commit()
+        horizon["version"] = 8
+        return first, await export(first[0])
+
+    first, second = asyncio.run(main())
+    assert first == (5, ["1"])
+    assert second == (8, ["3", "2"])
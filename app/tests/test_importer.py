@@ -0,0 +1,60 @@
+import asyncio
+from contextlib import nullcontext
+
+from asyncpg.exceptions import DataError, PostgresConnectionError
+
+from schemas.imports import BuildingImportSchema, ImportReportSchema
+from services.importer import ImportService
+
+
+class Connection:
+    """asyncpg-соединение без БД: транзакции и точки сохранения ничего не делают"""
+
+    def transaction(self):
+        return nullcontext()
+
+
+class Repository:
+    """Загрузка зданий, которую БД отвергает целиком, если в части есть плохая строка"""
+
+    def __init__(self, bad_ids, error=DataError):
+        self.bad_ids = set(bad_ids)
+        self.error = error
+        self.loaded = []
+        self.attempts = 0
+
+    async def upsert_buildings(self, conn, rows):
+        self.attempts += 1
+        if self.bad_ids.intersection(row.id for row in rows):
+            raise self.error("value out of range")
+        self.loaded.extend(row.id for row in rows)
+        return len(rows)
+
+
+def load(repository, count: int) -> ImportReportSchema:
+    service = ImportService()
+    service.repository = repository
+    rows = [
+        (line_no, BuildingImportSchema(id=line_no, address=f"ул. Ленина, {line_no}", latitude=55.7, longitude=37.6))
+        for line_no in range(1, count + 1)
+    ]
+    report = ImportReportSchema(kind="buildings")
+    asyncio.run(service._load_batch(Connection(), "buildings", rows, None, report))
+    return report
+
+
+def test_bad_rows_do_not_roll_back_the_batch():
+    repository = Repository(bad_ids={7, 300})
+    report = load(repository, 1000)
+    assert report.imported == 998
+    assert [error.line for error in report.errors] == [7, 300]
+    assert sorted(repository.loaded) == [i for i in range(1, 1001) if i not in (7, 300)]
+    # Деление пополам, а не построчный повтор
+    assert repository.attempts < 50
+
+
+def test_connection_error_fails_the_whole_batch_without_retries():
+    repository = Repository(bad_ids={7}, error=PostgresConnectionError)
+    report = load(repository, 1000)
+    assert (report.imported, report.failed) == (0, 1000)
+    assert repository.attempts == 1
@@ -0,0 +1,96 @@
+import asyncio
+
+from sqlalchemy import delete, insert, update
+
+from cache.data_version import IMPORTS_SIGNAL, data_version
+from cache.invalidation import DataVersionWatcher
+from cache.name_index import organization_name_index
+from models.activity import Activity
+from models.organization import Organization
+from models.tracking import DeletedRow, TableVersion
+
+
+def test_import_from_another_process_rebuilds_caches(session_factory):
+    watcher = DataVersionWatcher(session_factory, interval=1)
+
+    async def main():
+        async with session_factory() as db:
+            await db.execute(insert(TableVersion), [{"table_name": IMPORTS_SIGNAL}])
+            await db.commit()
+            await watcher.start(db)
+
+        await watcher.poll()
+        assert watcher.refreshes == 0
+
+        # «CLI»: строки загружены в обход этого процесса, затем сигнал imports
+        async with session_factory() as db:
+            await db.execute(insert(Organization), [{"id": 1, "name": "ООО «Импорт»", "building_id": 1}])
+            await db.commit()
+            await data_version.bump(db, IMPORTS_SIGNAL)
+        await watcher.poll()
+        assert watcher.refreshes == 1
+        assert organization_name_index.suggest("ооо «имп") == [(1, "ООО «Импорт»")]
+
+        # Импорт в этом же процессе уже учтён — повторной перестройки нет
+        async with session_factory() as db:
+            watcher.seen(IMPORTS_SIGNAL, await data_version.bump(db, IMPORTS_SIGNAL))
+        await watcher.poll()
+        assert watcher.refreshes == 1
+
+    asyncio.run(main())
+
+
+def test_activity_change_by_another_worker_resets_tree(session_factory):
+    watcher = DataVersionWatcher(session_factory, interval=1)
+
+    async def main():
+        async with session_factory() as db:
+            await db.execute(insert(Activity), [{"id": 1, "name": "Еда", "row_version": 10}])
+            await db.commit()
+            await watcher.start(db)
+
+        # Изменение другой таблицы дерево не трогает
+        async with session_factory() as db:
+            await db.execute(insert(Organization), [{"id": 1, "name": "ООО «Еда»", "building_id": 1, "row_version": 11}])
+            await db.commit()
+        await watcher.poll()
+        assert watcher.refreshes == 0
+
+        # Другой воркер переименовал вид деятельности: версия строки выше границы прошлой сверки
+        async with session_factory() as db:
+            await db.execute(update(Activity).where(Activity.id == 1).values(name="Продукты", row_version=12))
+            await db.commit()
+        await watcher.poll()
+        assert watcher.refreshes == 1
+
+        await watcher.poll()
+        assert watcher.refreshes == 1
+
+    asyncio.run(main())
+
+
+def test_organization_changes_by_another_worker_reach_name_index(session_factory):
+    watcher = DataVersionWatcher(session_factory, interval=1)
+
+    async def main():
+        async with session_factory() as db:
+            await db.execute(insert(Organization), [
+                {"id": 1, "name": "ООО «Старое»", "building_id": 1, "row_version": 10},
+                {"id": 2, "name": "ООО «Сад»", "building_id": 1, "row_version": 10},
+            ])
+            await db.commit()
+            await watcher.start(db)
+            await organization_name_index.load(db)
+
+        # Другой воркер переименовал одну организацию и удалил вторую
+        async with session_factory() as db:
+            await db.execute(update(Organization).where(Organization.id == 1).values(name="ООО «Новое»", row_version=11))
+            await db.execute(delete(Organization).where(Organization.id == 2))
+            await db.execute(insert(DeletedRow), [{"id": 1, "table_name": "organizations", "row_id": 2, "row_version": 11}])
+            await db.commit()
+        await watcher.poll()
+        assert organization_name_index.suggest("ооо «с") == []
+        assert organization_name_index.suggest("ооо «н") == [(1, "ООО «Новое»")]
+        assert watcher.refreshes == 0
+
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+import asyncio
+
+from sqlalchemy import select
+
+from models.activity import Activity
+from models.organization import Organization, OrganizationPhone
+
+
+def test_orm_path_orders_nested_lists_like_the_document_builder(client, session_factory):
+    # Связи добавлены не по порядку: ORM должна отдать их так же, как read-модель и лёгкий путь
+    async def create():
+        async with session_factory() as db:
+            activities = (await db.execute(select(Activity).order_by(Activity.id.desc()))).scalars().all()
+            db.add(Organization(
+                id=100, name="ООО «Порядок»", building_id=1, activities=list(activities),
+                phones=[OrganizationPhone(id=102, phone="8-900-100-00-02", position=0),
+                        OrganizationPhone(id=101, phone="8-900-100-00-01", position=0)],
+            ))
+            await db.commit()
+
+    asyncio.run(create())
+    org = client.get("/organizations/100").json()
+    assert [activity["id"] for activity in org["activities"]] == sorted(a["id"] for a in org["activities"])
+    assert [phone["id"] for phone in org["phones"]] == [101, 102]
+
+
+def test_relationship_order_matches_document_builder():
+    # SQLite и так отдаёт строки по rowid, поэтому порядок проверяется ещё и по самим связям
+    assert list(Organization.activities.property.order_by) == [Activity.__table__.c.id]
+    assert list(Organization.phones.property.order_by) == [
+        OrganizationPhone.__table__.c.position, OrganizationPhone.__table__.c.id,
+    ]
@@ -0,0 +1,20 @@
+import pytest
+
+from core.pagination import decode_cursor, encode_cursor
+from exceptions.exceptions import InvalidCursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(["ООО «Ромашка»", 42]), (str, int)) == ["ООО «Ромашка»", 42]
+    assert decode_cursor(encode_cursor([0, 7]), (float, int)) == [0, 7]
+
+
+@pytest.mark.parametrize("values", [["name", "42"], [1, 42], ["name", True], ["name"], ["name", 1, 2]])
+def test_cursor_with_wrong_values_is_rejected(values):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(values), (str, int))
+
+
+def test_invalid_cursor_is_bad_request(client):
+    response = client.get("/organizations/", params={"cursor": encode_cursor([1, "name"])})
+    assert response.status_code == 400
@@ -0,0 +1,77 @@
+"""
+Число SQL-запросов на запрос к API (регрессия N+1): считается инструментированием
+движка (db/instrumentation.py) и читается из заголовка Server-Timing.
+"""
+import re
+
+import pytest
+
+from db.features import db_features
+
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries')
+
+
+@pytest.fixture(params=[False, True], ids=["orm", "documents"])
+def documents(request):
+    return request.param
+
+
+def query_count(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(QUERIES.search(response.headers["server-timing"]).group(1))
+
+
+def test_list_is_one_query(client, organization_count):
+    response = client.get("/organizations/", params={"limit": organization_count})
+    assert len(response.json()["items"]) == organization_count
+    assert query_count(response) == 1
+
+
+def test_detail_query_count(client):
+    response = client.get("/organizations/1")
+    body = response.json()
+    assert len(body["phones"]) == 2 and len(body["activities"]) == 2
+    # ORM: организация с зданием (JOIN) + selectin телефонов + selectin видов деятельности;
+    # read-модель — один документ по первичному ключу
+    assert query_count(response) == (1 if db_features.documents else 3)
+
+
+
+@pytest.mark.parametrize("params", [
+    {"lat": 55.76, "lon": 37.61, "radius_km": 50},
+    {"lat_min": 55, "lat_max": 56, "lon_min": 37, "lon_max": 38},
+], ids=["radius", "bbox"])
+def test_map_is_one_query(client, organization_count, params):
+    response = client.get("/organizations/map", params=params)
+    assert len(response.json()["items"]) == organization_count
+    assert query_count(response) == 1
+
+
+def test_nearest_loads_organizations_once(client):
+    # Организации 2 и 4 — в здании в точке запроса, остальные в ~1,1 км: три ближайших
+    # набираются со второй попытки (радиус 1 км, затем 4 км)
+    response = client.get("/organizations/nearest", params={"lat": 55.76, "lon": 37.61, "k": 3})
+    assert [item["organization"]["id"] for item in response.json()] == [2, 4, 1]
+    # две попытки (id и расстояние) + организации с зданием, телефоны, виды деятельности
+    assert query_count(response) == 5
+
+
+@pytest.mark.parametrize("tile, clusters, points", [
+    ("3/4/2", 1, 0),
+    ("16/39614/20485", 0, 2),
+], ids=["clusters", "points"])
+def test_tile_is_one_query(client, tile, clusters, points):
+    response = client.get(f"/organizations/tiles/{tile}")
+    body = response.json()
+    assert (len(body["clusters"]), len(body["points"])) == (clusters, points)
+    assert query_count(response) == 1
+
+
+def test_batch_get_query_count(client, organization_count):
+    ids = list(range(1, organization_count + 1))
+    response = client.post("/organizations/batch-get", json={"ids": [*ids, 99]})
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == ids and body["missing"] == [99]
+    # Число запросов не зависит от числа id: ORM — организации, телефоны, виды деятельности
+    # (по одному запросу на всю пачку); read-модель — документы одним запросом
+    assert query_count(response) == (1 if db_features.documents else 3)
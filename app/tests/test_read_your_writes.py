@@ -0,0 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.middleware import ReadYourWritesMiddleware
+from db.routing import LAST_WRITE_COOKIE, ReplicaRouter
+
+PRIMARY, REPLICA = "primary", "replica"
+
+
+def make_client() -> TestClient:
+    router = ReplicaRouter(PRIMARY, [REPLICA], sticky_seconds=5, health_check_seconds=1)
+    app = FastAPI()
+
+    @app.post("/write")
+    async def write():
+        router.mark_write()
+
+    @app.get("/read")
+    async def read():
+        return router.choose()
+
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=5)
+    return TestClient(app)
+
+
+def test_write_window_belongs_to_the_writing_client():
+    writer, reader = make_client(), make_client()
+    response = writer.post("/write")
+    assert LAST_WRITE_COOKIE in response.cookies
+
+    assert writer.get("/read").json() == PRIMARY
+    assert reader.get("/read").json() == REPLICA
+
+
+def test_bogus_cookie_is_ignored():
+    client = make_client()
+    client.cookies.set(LAST_WRITE_COOKIE, "nan")
+    assert client.get("/read").json() == REPLICA
+
+
+def test_health_check_times_out_on_connect():
+    @asynccontextmanager
+    async def hanging_connect():
+        await asyncio.sleep(10)
+        yield
+
+    replica = SimpleNamespace(connect=hanging_connect, url=SimpleNamespace(host="replica"))
+    router = ReplicaRouter(PRIMARY, [replica], sticky_seconds=5, health_check_seconds=0.05)
+    asyncio.run(asyncio.wait_for(router.check(), 1))
+    assert router.healthy[id(replica)] is False
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from schemas.organization import OrganizationFilters
+from services.organization import OrganizationService
+
+
+def search_key(name: str, version: int = 1) -> str:
+    db = SimpleNamespace(info={"data_version": version})
+    return OrganizationService()._search_key(db, OrganizationFilters(name=name), 50, None)
+
+
+def test_name_case_shares_cache_key():
+    assert search_key("Ромашка") == search_key("РОМАШКА")
+
+
+def test_name_key_follows_ilike_not_casefold():
+    # "ß".casefold() == "ss", но ILIKE '%straße%' не находит "Strasse"
+    assert search_key("Straße") != search_key("Strasse")
+
+
+def test_data_version_is_part_of_cache_key():
+    # Ответ, собранный на старой версии данных, не должен уйти клиенту с новым ETag
+    assert search_key("Ромашка", 1) != search_key("Ромашка", 2)